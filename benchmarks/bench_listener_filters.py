@@ -0,0 +1,104 @@
+'''
+    Compares the per event cost of the listener filter paths.
+
+        legacy   -> event.data._to_dict() then walking the filter fields with traverseFields,
+                    lowercasing the condition for every comparison (the previous ListenerObject.check).
+        compiled -> predicates from src.ext.filterCompiler reading the slotted attributes directly.
+
+    The resource is a slotted stand-in for a MESSAGE_CREATE Message with an author, mentions and embeds
+    so that _to_dict() has to recurse like it does for the real object.
+
+    Run from the repository root:
+        python -m benchmarks.bench_listener_filters
+'''
+import timeit
+
+from src.models.base import BaseResourceObject
+from src.ext.filterCompiler import compileFilter
+
+EVENTS = 20000
+
+#-------------------------------------------------------------------------------------------
+class BenchUser(BaseResourceObject):
+    __slots__ = ('id', 'username', 'global_name', 'avatar', 'bot', 'public_flags')
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            setattr(self, key, kwargs.get(key))
+
+class BenchEmbed(BaseResourceObject):
+    __slots__ = ('title', 'description', 'url', 'color', 'fields')
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            setattr(self, key, kwargs.get(key))
+
+class BenchMessage(BaseResourceObject):
+    __slots__ = ('id', 'channel_id', 'guild_id', 'author', 'content', 'timestamp', 'tts', 'mention_everyone',
+                 'mentions', 'mention_roles', 'embeds', 'pinned', 'type', 'flags')
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            setattr(self, key, kwargs.get(key))
+
+#-------------------------------------------------------------------------------------------
+def legacyTraverse(obj, key=None, val=None):
+    if key not in obj:
+        return False
+    elif isinstance(val, dict):
+        for k, v in val.items():
+            return legacyTraverse(obj[key], k, v)
+    else:
+        return [obj[key], val]
+
+def legacyCheck(filters, resource) -> bool:
+    event = resource._to_dict()
+    for condition, fields in filters:
+        for field_key, field_val in fields.items():
+            result = legacyTraverse(event, field_key, field_val)
+            if not result:
+                return False
+            if condition.lower() == "equals" and not result[0] == result[1]:
+                return False
+            elif condition.lower() == "contains" and not result[1] in result[0]:
+                return False
+            elif condition.lower() == "contains_any" and not any(val in result[0] for val in result[1]):
+                return False
+    return True
+
+def compiledCheck(predicates, resource) -> bool:
+    for predicate in predicates:
+        if not predicate(resource, None):
+            return False
+    return True
+
+#-------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    author = BenchUser(id='343235146389913601', username='squirrel', global_name='Squirrel', avatar='abc', bot=False, public_flags=0)
+    message = BenchMessage(id='1404889758995578921',
+                           channel_id='1297327176697253972',
+                           guild_id='1297327176697253000',
+                           author=author,
+                           content='this is a test message about a patent and an alligator',
+                           timestamp='2025-01-01T00:00:00.000000+00:00',
+                           tts=False,
+                           mention_everyone=False,
+                           mentions=[BenchUser(id=str(x), username=f'user{x}') for x in range(5)],
+                           mention_roles=['1', '2'],
+                           embeds=[BenchEmbed(title='t', description='d' * 100, url='https://x', color=1, fields=[{'name': 'a', 'value': 'b'}])],
+                           pinned=False,
+                           type=0,
+                           flags=0)
+
+    filters = [
+        ('equals', {'channel_id': '1297327176697253972', 'author': {'id': '343235146389913601'}}),
+        ('contains', {'content': 'test'}),
+        ('contains_any', {'content': ['patent', 'turvy', 'alligator']})
+    ]
+    predicates = [p for condition, fields in filters for p in compileFilter(condition, fields)]
+
+    assert legacyCheck(filters, message) and compiledCheck(predicates, message)
+
+    legacy = timeit.timeit(lambda: legacyCheck(filters, message), number=EVENTS)
+    compiled = timeit.timeit(lambda: compiledCheck(predicates, message), number=EVENTS)
+
+    print(f"legacy   {legacy / EVENTS * 1e6:8.2f} us/event")
+    print(f"compiled {compiled / EVENTS * 1e6:8.2f} us/event")
+    print(f"speedup  {legacy / compiled:8.1f}x")
@@ -0,0 +1,55 @@
+'''
+    Compares the cost of the per event DEBUG lines in HandlerClient.handle_event when logLevel is INFO.
+
+        eager -> f-string with resourceObject._to_dict() put on the LOGGER queue as a LogEvent,
+                 which LoggerClient then drops (the previous behaviour).
+        facade -> ProcLogger.debug with a lambda, dropped before formatting or queueing.
+
+    The queue is a multiprocessing JoinableQueue so the eager path pays for pickling in the feeder
+    thread like it does in the bot.
+
+    Run from the repository root:
+        python -m benchmarks.bench_log_facade
+'''
+import time
+from multiprocessing import JoinableQueue
+
+from src.ext.procLogger import ProcLogger
+from src.models.procs.event import LogEvent
+from benchmarks.bench_listener_filters import BenchMessage, BenchUser
+
+EVENTS = 20000
+
+#-------------------------------------------------------------------------------------------
+def drain(logQueue: JoinableQueue, count: int) -> None:
+    for _ in range(count):
+        logQueue.get()
+        logQueue.task_done()
+
+#-------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    message = BenchMessage(id='1404889758995578921',
+                           channel_id='1297327176697253972',
+                           author=BenchUser(id='343235146389913601', username='squirrel'),
+                           content='this is a test message about a patent and an alligator',
+                           mentions=[BenchUser(id=str(x), username=f'user{x}') for x in range(5)])
+
+    logQueue = JoinableQueue()
+    log = ProcLogger("HANDLER", logQueue, level="INFO")
+
+    start = time.perf_counter()
+    for _ in range(EVENTS):
+        logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] type: {type(message)} data: {message._to_dict()}"))
+        logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] Listener event received: MESSAGE_CREATE"))
+    drain(logQueue, EVENTS * 2)
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(EVENTS):
+        log.debug(lambda: f"[EventHandler] type: {type(message)} data: {message._to_dict()}")
+        log.debug(lambda: f"[EventHandler] Listener event received: MESSAGE_CREATE")
+    facade = time.perf_counter() - start
+
+    print(f"eager  {eager / EVENTS * 1e6:8.2f} us/event")
+    print(f"facade {facade / EVENTS * 1e6:8.2f} us/event")
+    print(f"speedup {eager / facade:7.1f}x")
@@ -0,0 +1,74 @@
+'''
+    Compares the memory held per cached member by the GuildMember object graph and by the MemberStore.
+
+        objects -> the GuildMember (and its User) objects built from GUILD_CREATE's member list.
+        columns -> the same members loaded into a MemberStore table.
+
+    Memory is measured with tracemalloc around decoding the member list and building each representation,
+    so it counts everything the representation keeps alive, strings included. Lookup time is reported
+    for both.
+
+    Run from the repository root:
+        python -m benchmarks.bench_member_store
+'''
+import json
+import random
+import timeit
+import tracemalloc
+
+from src.ext.memberStore import MemberStore
+from src.models.bot.resources.user import GuildMember
+
+MEMBERS = 100000
+ROLES = [str(1100000000000000000 + x) for x in range(40)]
+
+#-------------------------------------------------------------------------------------------
+def payloads(count: int) -> list:
+    rng = random.Random(7)
+    members = list()
+    for n in range(count):
+        userId = str(200000000000000000 + rng.randrange(10 ** 18))
+        members.append({
+            'user': {'id': userId, 'username': f'member{n:010d}', 'global_name': None, 'avatar': 'a' * 32,
+                     'discriminator': '0', 'public_flags': 0, 'bot': False},
+            'nick': None,
+            'roles': sorted(rng.sample(ROLES, rng.randrange(4))),
+            'joined_at': '2024-01-01T00:00:00.000000+00:00',
+            'premium_since': None, 'deaf': False, 'mute': False, 'pending': False, 'flags': 0
+        })
+    return members
+
+#-------------------------------------------------------------------------------------------
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    held = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return kept, held
+
+#-------------------------------------------------------------------------------------------
+def main() -> None:
+    members = json.dumps(payloads(MEMBERS))
+    userIds = [member['user']['id'] for member in json.loads(members)]
+
+    objects, objectBytes = measure(lambda: {member.user.id: member for member in (GuildMember(**x) for x in json.loads(members))})
+
+    def columns():
+        store = MemberStore()
+        store.load('1', [GuildMember(**x) for x in json.loads(members)])
+        return store
+    store, columnBytes = measure(columns)
+
+    print(f"{MEMBERS} members")
+    print(f"  objects: {objectBytes / MEMBERS:8.0f} bytes/member  {objectBytes / 2 ** 20:8.1f} MiB")
+    print(f"  columns: {columnBytes / MEMBERS:8.0f} bytes/member  {columnBytes / 2 ** 20:8.1f} MiB")
+
+    lookups = userIds[::100]
+    objectTime = timeit.timeit(lambda: [objects[x] for x in lookups], number=20) / (20 * len(lookups))
+    columnTime = timeit.timeit(lambda: [store.get('1', x) for x in lookups], number=20) / (20 * len(lookups))
+    print(f"  lookup objects: {objectTime * 1e6:6.2f} us  columns (view): {columnTime * 1e6:6.2f} us")
+
+if __name__ == '__main__':
+    main()
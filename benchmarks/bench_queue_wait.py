@@ -0,0 +1,80 @@
+'''
+    Compares the old get_nowait() + sleep polling loop against QueueConsumer.waitForEvent.
+
+    Measures:
+        - CPU time used by an idle consumer process over a fixed wall clock window.
+        - Latency of a single hop (put in the parent, picked up in the consumer).
+
+    Run from the repository root:
+        python -m benchmarks.bench_queue_wait
+'''
+import queue
+import statistics
+import time
+
+from multiprocessing import Process, JoinableQueue, Value
+
+from src.app.queueConsumer import QueueConsumer
+
+IDLE_SECONDS = 2.0
+HOPS = 200
+
+#-------------------------------------------------------------------------------------------
+def pollingConsumer(eventQueue, resultQueue, cpuTime, sleepTime) -> None:
+    start = time.process_time()
+    while True:
+        try:
+            evnt = eventQueue.get_nowait()
+        except queue.Empty:
+            time.sleep(sleepTime)
+            continue
+        if evnt is None:
+            break
+        resultQueue.put_nowait(time.perf_counter() - evnt)
+    cpuTime.value = time.process_time() - start
+
+#-------------------------------------------------------------------------------------------
+def blockingConsumer(eventQueue, resultQueue, cpuTime, sleepTime) -> None:
+    consumer = QueueConsumer()
+    start = time.process_time()
+    while True:
+        evnt = consumer.waitForEvent(eventQueue)
+        if evnt is None:
+            continue
+        if evnt == -1:
+            break
+        resultQueue.put_nowait(time.perf_counter() - evnt)
+    cpuTime.value = time.process_time() - start
+
+#-------------------------------------------------------------------------------------------
+def run(name, target, sleepTime=0.01) -> None:
+    eventQueue = JoinableQueue()
+    resultQueue = JoinableQueue()
+    cpuTime = Value('d', 0.0)
+    stop = None if target is pollingConsumer else -1
+
+    proc = Process(target=target, args=(eventQueue, resultQueue, cpuTime, sleepTime))
+    proc.start()
+
+    # Idle window
+    time.sleep(IDLE_SECONDS)
+
+    # Latency, spaced out so each hop starts with an idle consumer
+    latencies = list()
+    for _ in range(HOPS):
+        eventQueue.put_nowait(time.perf_counter())
+        latencies.append(resultQueue.get())
+        time.sleep(0.002)
+
+    eventQueue.put_nowait(stop)
+    proc.join()
+
+    latencies.sort()
+    print(f"{name:<28} cpu: {cpuTime.value:6.3f}s   "
+          f"p50: {statistics.median(latencies) * 1000:6.3f}ms   "
+          f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.3f}ms")
+
+if __name__ == '__main__':
+    run("poll (sleep 0.01)", pollingConsumer, 0.01)
+    run("poll (sleep 0.001)", pollingConsumer, 0.001)
+    run("QueueConsumer.waitForEvent", blockingConsumer)
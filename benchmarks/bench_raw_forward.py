@@ -0,0 +1,56 @@
+'''
+    Compares the gateway side cost and IPC size of forwarding a MESSAGE_CREATE to the handler.
+
+        decoded -> decode the payload and pickle the decoded "d" inside a HandlerEvent.
+        raw     -> peek the header and pickle the payload as received inside a HandlerEvent.
+
+    Pickling is what multiprocessing does to every object put on a queue. The decoded dict stands in
+    for the Message that EventGenerator.createResource builds, which costs more to build and pickle,
+    so the decoded numbers are a lower bound of the previous behaviour.
+
+    The raw frame pickles larger than the decoded dict, the JSON text carries every key and quote. What
+    forwarding raw saves is the gateway's decode, not IPC bytes, which is why gatewayForwardRaw is off
+    by default. Against the real Message the comparison is unmeasured, the resource models need
+    src.obj_types which this benchmark doesn't depend on.
+
+    Run from the repository root:
+        python -m benchmarks.bench_raw_forward
+'''
+import json
+import pickle
+import timeit
+
+from src.models.bot.events.gateway_event import GatewayEvent
+from src.ext.framePeek import peekHeader
+from src.models.procs.event import HandlerEvent
+
+EVENTS = 5000
+
+USER = {'id': '343235146389913601', 'username': 'squirrel', 'global_name': 'Squirrel', 'avatar': 'abc', 'discriminator': '0', 'public_flags': 0}
+MESSAGE = {
+    'type': 0, 'tts': False, 'timestamp': '2025-01-01T00:00:00.000000+00:00', 'pinned': False,
+    'mentions': [dict(USER, id=str(x), username=f'user{x}') for x in range(3)], 'mention_roles': [], 'mention_everyone': False,
+    'member': {'roles': ['1', '2'], 'joined_at': '2024-01-01T00:00:00.000000+00:00', 'deaf': False, 'mute': False, 'flags': 0},
+    'id': '1404889758995578921', 'flags': 0, 'embeds': [], 'edited_timestamp': None,
+    'content': 'this is a test message about a patent and an alligator', 'components': [],
+    'channel_id': '1297327176697253972', 'author': USER, 'attachments': [], 'guild_id': '1297327176697253000'
+}
+
+#-------------------------------------------------------------------------------------------
+def forwardDecoded(frame: str) -> bytes:
+    evnt = GatewayEvent(**json.loads(frame))
+    return pickle.dumps(HandlerEvent(eventType=evnt.t, resourceObject=evnt.d, shard=0))
+
+def forwardRaw(frame: str) -> bytes:
+    header = peekHeader(frame)
+    return pickle.dumps(HandlerEvent(eventType=header.t, raw=frame, partition=header.partition, shard=0))
+
+#-------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    frame = json.dumps({'t': 'MESSAGE_CREATE', 's': 42, 'op': 0, 'd': MESSAGE}, separators=(',', ':'))
+
+    decoded = timeit.timeit(lambda: forwardDecoded(frame), number=EVENTS)
+    raw = timeit.timeit(lambda: forwardRaw(frame), number=EVENTS)
+
+    print(f"decoded {decoded / EVENTS * 1e6:8.2f} us/event {len(forwardDecoded(frame)):6d} bytes")
+    print(f"raw     {raw / EVENTS * 1e6:8.2f} us/event {len(forwardRaw(frame)):6d} bytes")
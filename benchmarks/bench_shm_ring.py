@@ -0,0 +1,59 @@
+'''
+    Compares the gateway -> handler hop over a JoinableQueue and over a ShmRingQueue.
+
+        throughput -> a producer process puts BURST events as fast as it can, the consumer reports msgs/sec.
+        latency    -> a producer process puts PACED events with a short sleep in between, the consumer
+                      reports p50/p99 of the time from put to get.
+
+    The events are HandlerEvents carrying a raw MESSAGE_CREATE sized payload.
+
+    Run from the repository root:
+        python -m benchmarks.bench_shm_ring
+'''
+import time
+import statistics
+import multiprocessing
+
+from src.app.shmRing import ShmRingQueue
+from src.models.procs.event import HandlerEvent
+
+BURST = 50000
+PACED = 5000
+PAYLOAD = '{"t":"MESSAGE_CREATE","s":42,"op":0,"d":{' + '"x":"' + 'a' * 900 + '"}}'
+
+#-------------------------------------------------------------------------------------------
+def produce(eventQueue, count: int, pause: float) -> None:
+    for n in range(count):
+        eventQueue.put_nowait(HandlerEvent(eventType='MESSAGE_CREATE', raw=PAYLOAD, partition=str(time.perf_counter()), shard=n))
+        if pause:
+            time.sleep(pause)
+
+def consume(eventQueue, count: int) -> list:
+    latencies = list()
+    for _ in range(count):
+        event = eventQueue.get()
+        eventQueue.task_done()
+        latencies.append(time.perf_counter() - float(event.partition))
+    return latencies
+
+def run(ctx, eventQueue, count: int, pause: float):
+    producer = ctx.Process(target=produce, args=(eventQueue, count, pause))
+    start = time.perf_counter()
+    producer.start()
+    latencies = consume(eventQueue, count)
+    elapsed = time.perf_counter() - start
+    producer.join()
+    return elapsed, latencies
+
+#-------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    ctx = multiprocessing.get_context('fork')
+
+    for name, factory in (('JoinableQueue', ctx.JoinableQueue), ('ShmRingQueue', lambda: ShmRingQueue('BENCH', ctx=ctx))):
+        eventQueue = factory()
+        elapsed, _ = run(ctx, eventQueue, BURST, 0)
+        _, latencies = run(ctx, eventQueue, PACED, 0.0001)
+        latencies.sort()
+        print(f"{name:14s} {BURST / elapsed:10.0f} msgs/sec   "
+              f"p50 {statistics.median(latencies) * 1e6:7.1f} us   p99 {latencies[int(len(latencies) * 0.99)] * 1e6:7.1f} us")
+        eventQueue.close()
@@ -0,0 +1,95 @@
+'''
+    Compares how long a handler takes to get its entity cache back after a restart.
+
+        cold -> decode the GUILD_CREATE payloads and feed them to an empty EntityCache, what a
+                handler does after a full IDENTIFY. The time the gateway takes to send the
+                GUILD_CREATE flood is not included, so this is a lower bound.
+        warm -> map the handler's snapshot and restore the EntityCache from it.
+
+    GuildCreate can't be built without the full model package, the guild, channels and roles are
+    SimpleNamespaces built from the payload and the members are real GuildMembers. The cold numbers
+    are a lower bound of the real cost for that reason too.
+
+    Run from the repository root:
+        python -m benchmarks.bench_warm_start
+'''
+import os
+import json
+import time
+import tempfile
+
+from types import SimpleNamespace
+
+from src.ext.entityCache import EntityCache
+from src.ext.snapshot import Snapshot, writeSnapshot
+from src.models.bot.resources.user import GuildMember
+
+# (guilds, members per guild)
+GUILDS = [(1, 100000), (200, 500)]
+CHANNELS = 40
+ROLES = 20
+
+#-------------------------------------------------------------------------------------------
+def payloads() -> list:
+    guilds = list()
+    userId = 300000000000000000
+    for count, members in GUILDS:
+        for _ in range(count):
+            guildId = str(900000000000000000 + len(guilds))
+            roles = [{'id': f'{guildId[:-3]}{n:03d}', 'name': f'role{n}', 'permissions': '0'} for n in range(ROLES)]
+            memberList = list()
+            for n in range(members):
+                userId += 7919
+                memberList.append({'user': {'id': str(userId), 'username': f'member{userId}', 'avatar': 'a' * 32},
+                                   'roles': [roles[n % ROLES]['id']], 'joined_at': '2024-01-01T00:00:00.000000+00:00',
+                                   'deaf': False, 'mute': False, 'flags': 0})
+            guilds.append(json.dumps({'id': guildId, 'name': f'guild{guildId}', 'roles': roles, 'threads': [],
+                                      'channels': [{'id': f'{guildId[:-4]}{n:04d}', 'name': f'channel{n}', 'type': 0} for n in range(CHANNELS)],
+                                      'members': memberList}))
+    return guilds
+
+#-------------------------------------------------------------------------------------------
+def coldStart(guilds: list) -> EntityCache:
+    cache = EntityCache()
+    for payload in guilds:
+        d = json.loads(payload)
+        cache.update('GUILD_CREATE', SimpleNamespace(id=d['id'],
+                                                     name=d['name'],
+                                                     roles=[SimpleNamespace(**x) for x in d['roles']],
+                                                     channels=[SimpleNamespace(**x) for x in d['channels']],
+                                                     threads=[],
+                                                     members=[GuildMember(**x) for x in d['members']]))
+    return cache
+
+def warmStart(path: str) -> EntityCache:
+    cache = EntityCache()
+    with Snapshot(path) as snapshot:
+        cache.restore(snapshot)
+    return cache
+
+#-------------------------------------------------------------------------------------------
+def main() -> None:
+    guilds = payloads()
+
+    started = time.perf_counter()
+    cache = coldStart(guilds)
+    cold = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as snapshotDir:
+        path = os.path.join(snapshotDir, 'HANDLER_0.snap')
+        started = time.perf_counter()
+        size = writeSnapshot(path, cache.snapshot())
+        written = time.perf_counter() - started
+
+        started = time.perf_counter()
+        restored = warmStart(path)
+        warm = time.perf_counter() - started
+
+    assert restored.stats() == cache.stats()
+    members = cache.stats()['members']['entries']
+    print(f"{len(guilds)} guilds, {members} members, snapshot {size / 2 ** 20:.1f} MiB written in {written:.3f}s")
+    print(f"  cold start: {cold:7.3f}s")
+    print(f"  warm start: {warm:7.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,45 @@ OPTS = {
             'logFile': dict,
             'logLevel': str,
             'logMaxBytes': int,
-            'database': dict
+            'database': dict,
+            'gatewayCompress': False,
+            'gatewayEncoding': 'json',
+            'gatewayForwardRaw': False,
+            'shardCount': None,
+            'shardProcesses': 1,
+            'httpMaxInFlight': 10,
+            'httpBackend': 'simple',
+            'httpPoolSize': 20,
+            'httpDnsCacheTtl': 300,
+            'httpStatsInterval': 60,
+            'logBatchSize': 32,
+            'logBatchInterval': 0.25,
+            'logFlushInterval': 1.0,
+            'queueLimits': {
+                'LOGGER': {'capacity': 10000, 'policy': 'drop_oldest'},
+                'HTTP': {'capacity': 5000, 'policy': 'block'},
+                'HANDLER': {'capacity': 10000, 'policy': 'drop_by_type', 'shedTypes': ['PRESENCE_UPDATE', 'TYPING_START']},
+                'DB': {'capacity': 5000, 'policy': 'spill'}
+            },
+            'queueSpillDir': '/tmp',
+            'queueStatsInterval': 60,
+            'handlerProcesses': 1,
+            'handlerTransport': 'queue',
+            'shmRingBytes': 8388608,
+            'entityCache': {
+                'guilds': {'enabled': True, 'maxEntries': 10000},
+                'channels': {'enabled': True, 'maxEntries': 250000},
+                'roles': {'enabled': True, 'maxEntries': 250000},
+                'members': {'enabled': True, 'maxEntries': 1000000}
+            },
+            'presenceMode': 'status',
+            'messageCache': {'enabled': True, 'channelCapacity': 100, 'maxMessages': 50000},
+            'cacheStatsInterval': 300,
+            'snapshotDir': None,
+            'snapshotInterval': 60,
+            'snapshotMaxAge': 3600,
+            'sessionResumeWindow': 120,
+            'latencySamples': 256
         }
 
 RESPONSE_CODES = ResponseCodes()
@@ -1,10 +1,15 @@
+import argparse
 import config
 from src.app.bot import BotClient
+from src.app.asyncBot import AsyncBotClient
 
 config._prepare_config()
 
 if __name__ == '__main__':
-    bot = BotClient()
-    bot.start()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--single-process', action='store_true',
+                        help='Run every component on one asyncio loop in this process instead of one process each.')
+    args = parser.parse_args()
 
-    
\ No newline at end of file
+    bot = AsyncBotClient() if args.single_process else BotClient()
+    bot.start()
@@ -0,0 +1,265 @@
+import queue
+import signal
+import asyncio
+import traceback
+import config
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.app.gatewayClient import GatewayListener
+from src.app.loggerClient import LoggerClient
+from src.app.httpClient import RequestClient
+from src.app.handlerClient import HandlerClient
+from src.app.dbClient import DBClient
+from src.ext.sharding import IdentifyLimiter, resolveShards
+from src.ext.gatewayLatency import getLatency
+from src.ext.sessionState import SessionState
+from src.models.procs.event import ProcessEvent, DatabaseEvent
+
+__all__ = ['AsyncBotClient', 'LocalQueue', 'LocalRequestClient']
+
+# Seconds before a shard that stopped on its own is started again.
+SHARD_RESTART_DELAY = 5
+
+#-----------------------------------------------------------------------------------------------------------
+class LocalQueue(asyncio.Queue):
+    '''
+        asyncio.Queue with the non blocking part of the multiprocessing queue interface, so the clients
+        can use it in place of a JoinableQueue: put_nowait() and get_nowait() raise queue.Full and
+        queue.Empty instead of the asyncio exceptions.
+    '''
+    def put_nowait(self, item) -> None:
+        try:
+            super().put_nowait(item)
+        except asyncio.QueueFull:
+            raise queue.Full
+
+    def get_nowait(self):
+        try:
+            return super().get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+
+#-----------------------------------------------------------------------------------------------------------
+class LocalRequestClient(RequestClient):
+    '''
+        RequestClient reading its requests straight off of a LocalQueue instead of through the executor.
+        The handler's HttpEvents are put on the same queue the multiprocess HttpClient would forward them to.
+    '''
+    __slots__ = ()
+
+    async def nextRequest(self):
+        reqObj = await self.requestQueue.get()
+        self.requestQueue.task_done()
+        return reqObj
+
+#-----------------------------------------------------------------------------------------------------------
+class AsyncBotClient(object):
+    '''
+        Runs the whole bot in a single process, selected with --single-process.
+
+        The shards (GatewayListeners), the RequestClient, the handler, the DB writer and the logger all run
+        as tasks on one asyncio loop and hand events to each other over in-memory LocalQueues, so nothing is
+        pickled between them. The multiprocess BotClient remains the option for scaling out.
+
+        The handler and the logger run on the loop. Database calls are blocking, so they run one at a
+        time on a single worker thread, which keeps them in order. ProcLoggers ship every line on its
+        own, since there is no IPC cost to batch away.
+
+        The components are supervised the way BotClient.manageProcs supervises the processes. An event
+        the handler fails on is logged and skipped. A shard that stops while the bot is not stopping is
+        started again after SHARD_RESTART_DELAY with a new GatewayListener, which resumes the session
+        kept in the shard's SessionState.
+
+        Attributes:
+            queues (Dict[str, LocalQueue]): The queues between the components, named like BotClient.queues.
+            listenerQueues (List[LocalQueue]): The stop queue of each shard.
+            tasks (List[asyncio.Task]): The component tasks.
+            stopping (bool): Set by stop(), components that end are not restarted anymore.
+
+        Methods:
+            start() -> None: Run the bot until it is stopped with SIGINT or SIGTERM.
+            stop()  -> None: Signal every component to stop.
+    '''
+    __slots__ = ('queues', 'listenerQueues', 'tasks', 'stopping')
+
+    def __init__(self):
+        self.queues: Dict[str, Optional[LocalQueue]] = dict()
+        self.listenerQueues: List[LocalQueue] = list()
+        self.tasks: List[asyncio.Task] = list()
+        self.stopping: bool = False
+
+    #-------------------------------------------------------------------------------------------
+    def start(self) -> None:
+        asyncio.run(self.run())
+
+    #-------------------------------------------------------------------------------------------
+    async def run(self) -> None:
+        config.OPTS['logBatchSize'] = 1
+
+        self.queues = {
+            'LOGGER': LocalQueue(),
+            'HTTP': LocalQueue(),
+            'HTTP_RESPONSE': LocalQueue(),
+            'HANDLER': LocalQueue(),
+            'DB': LocalQueue() if config.OPTS['database'] else None,
+            'DB_RESPONSE': LocalQueue() if config.OPTS['database'] else None
+        }
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        #-----------------------------------------------------------------
+        # The components, created the same way the processes create them.
+        #-----------------------------------------------------------------
+        logger = LoggerClient("LOGGER", None, self.queues['LOGGER'])
+        logger.create_logger()
+
+        handler = HandlerClient("HANDLER",
+                                self.queues['HANDLER'],
+                                self.queues['LOGGER'],
+                                self.queues['HTTP'],
+                                self.queues['HTTP_RESPONSE'],
+                                self.queues['DB'],
+                                self.queues['DB_RESPONSE'])
+
+        requestClient = LocalRequestClient(self.queues['HTTP'], self.queues['HTTP_RESPONSE'], self.queues['LOGGER'])
+
+        shardCount, maxConcurrency = resolveShards()
+        identifyLimiter = IdentifyLimiter(maxConcurrency)
+        self.listenerQueues = [LocalQueue() for _ in range(shardCount)]
+
+        def newListener(shardId: int, sessionState: SessionState) -> GatewayListener:
+            return GatewayListener(self.queues['LOGGER'],
+                                   self.queues['HANDLER'],
+                                   self.queues['DB'],
+                                   self.queues['DB_RESPONSE'],
+                                   self.queues['HTTP'],
+                                   self.queues['HTTP_RESPONSE'],
+                                   self.listenerQueues[shardId],
+                                   shard_id=shardId,
+                                   shard_count=shardCount,
+                                   identifyLimiter=identifyLimiter,
+                                   sessionState=sessionState,
+                                   latency=getLatency())
+
+        print(f"Started single process bot with {shardCount} shards")
+
+        self.tasks = [asyncio.create_task(self.runShard(shardId, newListener)) for shardId in range(shardCount)]
+        self.tasks.append(asyncio.create_task(self.runHandler(handler)))
+        self.tasks.append(asyncio.create_task(requestClient.asyncRequest(self.queues['HTTP'], self.queues['HTTP_RESPONSE'])))
+        self.tasks.append(asyncio.create_task(self.runLogger(logger)))
+        if self.queues['DB'] is not None:
+            self.tasks.append(asyncio.create_task(self.runDatabase()))
+
+        results = await asyncio.gather(*self.tasks, return_exceptions=True)
+        for task, result in zip(self.tasks, results):
+            if isinstance(result, Exception):
+                print(f"Single process bot task {task.get_name()} failed: {result!r}")
+
+    #-------------------------------------------------------------------------------------------
+    def stop(self) -> None:
+        '''
+            Signal every component to stop the way BotClient does.
+            The shards only look at their stop queue between connections, so their tasks are cancelled.
+        '''
+        self.stopping = True
+        for listenerQueue in self.listenerQueues:
+            listenerQueue.put_nowait(None)
+        for task in self.tasks[:len(self.listenerQueues)]:
+            task.cancel()
+
+        self.queues['HTTP'].put_nowait(None)
+        self.queues['HANDLER'].put_nowait(ProcessEvent(action="STOP"))
+        if self.queues['DB'] is not None:
+            self.queues['DB'].put_nowait(ProcessEvent(action="STOP"))
+        self.queues['LOGGER'].put_nowait(ProcessEvent(action="STOP"))
+
+    #-------------------------------------------------------------------------------------------
+    async def runShard(self, shardId: int, newListener) -> None:
+        '''
+            Run a shard, starting it again with a new listener when it stops or fails while the bot
+            is not stopping. The SessionState outlives the listeners, so a restarted shard resumes.
+        '''
+        sessionState = SessionState()
+        while True:
+            listener = newListener(shardId, sessionState)
+            try:
+                await listener.socketClient()
+            except Exception:
+                listener.log.error(lambda: f"[GatewayClient] Shard {shardId} failed\n{traceback.format_exc()}")
+
+            if self.stopping:
+                return
+
+            listener.log.error(f"[GatewayClient] Shard {shardId} stopped, restarting in {SHARD_RESTART_DELAY} seconds")
+            await asyncio.sleep(SHARD_RESTART_DELAY)
+
+    #-------------------------------------------------------------------------------------------
+    async def runHandler(self, handler: HandlerClient) -> None:
+        handler.restoreSnapshot()
+
+        handlerQueue = self.queues['HANDLER']
+        while True:
+            event = await handlerQueue.get()
+            handlerQueue.task_done()
+
+            if event.action == "STOP":
+                handler.writeSnapshot()
+                break
+
+            #----------------------------------------
+            #   An event the handler fails on must
+            #   not end the handler, the process
+            #   runtime would restart it instead.
+            #----------------------------------------
+            try:
+                handler.dispatch(event)
+            except Exception:
+                handler.log.error(lambda: f"[EventHandler] Failed to handle {getattr(event, 'eventType', None)}\n{traceback.format_exc()}")
+
+    #-------------------------------------------------------------------------------------------
+    async def runLogger(self, logger: LoggerClient) -> None:
+        '''
+            Write the log events as they arrive, syncing the files once the queue is drained.
+        '''
+        logQueue = self.queues['LOGGER']
+        try:
+            while True:
+                log = await logQueue.get()
+                logQueue.task_done()
+
+                if log.action == "STOP":
+                    break
+
+                logger.writeEvent(log)
+                if logQueue.empty():
+                    logger.syncHandlers()
+        finally:
+            logger.syncHandlers()
+
+    #-------------------------------------------------------------------------------------------
+    async def runDatabase(self) -> None:
+        '''
+            Run the database events on a single worker thread, the Database calls are blocking.
+        '''
+        dbClient = DBClient("DB", None, self.queues['LOGGER'], self.queues['DB'], self.queues['DB_RESPONSE'])
+        dbQueue = self.queues['DB']
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                evnt = await dbQueue.get()
+                dbQueue.task_done()
+
+                if evnt.action == "STOP":
+                    break
+
+                if evnt.action == "DB":
+                    result = await loop.run_in_executor(executor, dbClient.processEvent, evnt)
+                    if evnt.response is not None:
+                        self.queues['DB_RESPONSE'].put_nowait(DatabaseEvent.create_response(evnt, result))
+
+        dbClient.db.engine.close()
@@ -1,7 +1,6 @@
 import time
 import config
-import queue
-from typing import Dict
+from typing import Dict, List
 
 from multiprocessing import Process, JoinableQueue
 from src.app.gatewayClient import GatewayClient
@@ -9,11 +8,16 @@ from src.app.loggerClient import LoggerClient
 from src.app.httpClient import HttpClient
 from src.app.dbClient import DBClient
 from src.app.handlerClient import HandlerClient
+from src.app.queueConsumer import QueueConsumer
+from src.app.boundedQueue import BoundedQueue
+from src.app.handlerPool import HandlerPool
+from src.app.shmRing import ShmRingQueue
+from src.ext.gatewayLatency import getLatency
 from src.models.procs.event import ProcessEvent
 
 config._prepare_config()
 
-class BotClient():
+class BotClient(QueueConsumer):
     '''
         Accepts no arguments and initializes the bot client.
         This class manages the bot's processes, including the gateway, logger, and HTTP client.
@@ -33,24 +37,31 @@ class BotClient():
             initializeBotClient()       -> None: Initializes the bot client and starts necessary processes.
             manageProcs()               -> None: Checks and manages the status of processes, restarting them if necessary.
             newProc(procName)           -> Process: Creates a new process based on the provided process name and returns the process object.
+            newQueue(queueName)         -> BoundedQueue: Creates the queue for a process with its configured capacity and overload policy.
+            handlerNames()              -> List[str]: The process names of the handler pool, HANDLER_0 to HANDLER_n.
+            newHandlerQueue(handlerName)-> Queue: Creates a handler's queue for the configured handlerTransport.
+            reportQueues()              -> None: Prints the depth and shed counts of the queues that are shedding, spilling or blocking.
 
         Attribute Layout:
             In each of these attributes, ClientType refers to the type of client (e.g., 'GATEWAY', 'LOGGER', 'HTTP'),
+            each handler in the pool is its own ClientType (HANDLER_0, HANDLER_1, ...) with its own queue and process.
             -----------
             botQueue: JoinableQueue, used for communication between the main bot process and all of the sub-processes for each client type.
             -----------
-            queues: Dict,  { ClientType, JoinableQueue }
+            queues: Dict,  { ClientType, BoundedQueue }, handlers may use a ShmRingQueue instead (handlerTransport)
             -----------
             processes: Dict, { ClientType, {'proc': Process, 'status': str} }
                        Process statuses: 'running', 'stopped', 'failed'
     '''
 
-    __slots__ = ('botQueue', 'processes', 'queues')
+    __slots__ = ('botQueue', 'processes', 'queues', 'queueStats', 'lastQueueReport')
 
     def __init__(self):
         self.botQueue: JoinableQueue = JoinableQueue()
         self.processes: Dict[str, dict] = dict()
-        self.queues: Dict[str, JoinableQueue] = dict()
+        self.queues: Dict[str, BoundedQueue] = dict()
+        self.queueStats: Dict[str, dict] = dict()
+        self.lastQueueReport: float = time.monotonic()
 
     #-------------------------------------------------------------------------------------------
     def start(self) -> None:
@@ -63,16 +74,21 @@ class BotClient():
         self.initializeBotClient()
 
         while True:
-            time.sleep(0.001)
+            #-----------------------------------------------------------
+            # Block until an event arrives or one of the processes exits
+            #-----------------------------------------------------------
+            sentinels = [procObj['proc'].sentinel for procObj in self.processes.values() if procObj['proc'] is not None]
+            procEvent = self.waitForEvent(self.botQueue, sentinels=sentinels)
             self.manageProcs()
 
-            try:
-                procEvent = self.botQueue.get_nowait()
-                self.botQueue.task_done()
+            if time.monotonic() - self.lastQueueReport >= config.OPTS['queueStatsInterval']:
+                self.reportQueues()
 
-            except queue.Empty:
+            if procEvent is None:
                 continue
 
+            self.botQueue.task_done()
+
             if procEvent.action == "GATEWAY_ERROR":
                 self.uninitializedBotClient()
                 self.initializeBotClient()
@@ -118,20 +134,22 @@ class BotClient():
         # processes because they are passed to the process constructors.
         #-----------------------------------------------------------------
         self.queues = {
-            'LOGGER': JoinableQueue(),
-            'GATEWAY': JoinableQueue(),
-            'HTTP': JoinableQueue(),
-            'HTTP_RESPONSE': JoinableQueue(),
-            'HANDLER': JoinableQueue()
+            'LOGGER': self.newQueue('LOGGER'),
+            'GATEWAY': self.newQueue('GATEWAY'),
+            'HTTP': self.newQueue('HTTP'),
+            'HTTP_RESPONSE': self.newQueue('HTTP_RESPONSE')
         }
 
+        for handlerName in self.handlerNames():
+            self.queues[handlerName] = self.newHandlerQueue(handlerName)
+
         #-----------------------------------------------------------------
         # If the database configuration is not provided, remove the DB and
         # DB_RESPONSE queues from the queues dictionary.
         #-----------------------------------------------------------------
         if config.OPTS['database']:
-            self.queues['DB'] = JoinableQueue()
-            self.queues['DB_RESPONSE'] = JoinableQueue()
+            self.queues['DB'] = self.newQueue('DB')
+            self.queues['DB_RESPONSE'] = self.newQueue('DB_RESPONSE')
 
         else:
             self.queues['DB'] = None
@@ -144,10 +162,12 @@ class BotClient():
         self.processes = {
             "GATEWAY": {'proc': self.newProc("GATEWAY"), 'status': 'stopped'},
             "LOGGER": {'proc': self.newProc("LOGGER"), 'status': 'stopped'},
-            "HTTP": {'proc': self.newProc("HTTP"), 'status': 'stopped'},
-            "HANDLER": {'proc': self.newProc("HANDLER"), 'status': 'stopped'}
+            "HTTP": {'proc': self.newProc("HTTP"), 'status': 'stopped'}
         }
 
+        for handlerName in self.handlerNames():
+            self.processes[handlerName] = {'proc': self.newProc(handlerName), 'status': 'stopped'}
+
         if config.OPTS['database']:
             self.processes["DB"] = {'proc': self.newProc("DB"), 'status': 'stopped'}
 
@@ -187,6 +207,56 @@ class BotClient():
                 self.processes[procName] = {'proc': newProc, 'status': 'running'}
                 newProc.start()
 
+    #-------------------------------------------------------------------------------------------
+    def newQueue(self, queueName: str, limitsName: str = None) -> BoundedQueue:
+        '''
+            Creates the queue for a process type from config.OPTS['queueLimits'].
+            Queues without an entry are unbounded.
+            limitsName -> The queueLimits entry to use when it differs from the queue name.
+        '''
+        limits = config.OPTS['queueLimits'].get(limitsName or queueName) or dict()
+        return BoundedQueue(queueName,
+                            capacity=limits.get('capacity', 0),
+                            policy=limits.get('policy', 'block'),
+                            shedTypes=limits.get('shedTypes', ()),
+                            shedAt=limits.get('shedAt', 0.8),
+                            spillDir=config.OPTS['queueSpillDir'])
+
+    #-------------------------------------------------------------------------------------------
+    def newHandlerQueue(self, handlerName: str):
+        '''
+            Creates the queue the gateway feeds a handler through.
+            With handlerTransport 'shm' that is a ShmRingQueue, which needs the gateway to be the single
+            producer, so it falls back to a BoundedQueue when the shards are spread over several processes.
+        '''
+        if config.OPTS['handlerTransport'] == 'shm':
+            if config.OPTS['shardProcesses'] == 1:
+                return ShmRingQueue(handlerName, capacity=config.OPTS['shmRingBytes'])
+            print(f"handlerTransport shm needs shardProcesses: 1, using a queue for {handlerName}")
+
+        return self.newQueue(handlerName, limitsName='HANDLER')
+
+    #-------------------------------------------------------------------------------------------
+    def handlerNames(self) -> List[str]:
+        return [f"HANDLER_{handlerNum}" for handlerNum in range(max(1, config.OPTS['handlerProcesses']))]
+
+    #-------------------------------------------------------------------------------------------
+    def reportQueues(self) -> None:
+        '''
+            Prints the stats of every queue whose shed, spilled or blocked counts changed since the last report.
+        '''
+        for queueName, queueObj in self.queues.items():
+            if queueObj is None:
+                continue
+
+            stats = queueObj.stats()
+            lastStats = self.queueStats.get(queueName, dict())
+            if any(stats[key] != lastStats.get(key, 0) for key in ('shed', 'spilled', 'blocked')):
+                print(f"Queue {queueName} - depth {stats['depth']}/{stats['capacity']} shed {stats['shed']} spilled {stats['spilled']} blocked {stats['blocked']}")
+            self.queueStats[queueName] = stats
+
+        self.lastQueueReport = time.monotonic()
+
     #-------------------------------------------------------------------------------------------
     def newProc(self, procName) -> Process:
         '''
@@ -196,13 +266,14 @@ class BotClient():
         if procName == 'GATEWAY':
             newGateClient = GatewayClient("GATEWAY",
                                           self.botQueue,
-                                          self.queues['HANDLER'],
+                                          HandlerPool([self.queues[handlerName] for handlerName in self.handlerNames()]),
                                           self.queues['GATEWAY'],
                                           self.queues['LOGGER'],
                                           self.queues['DB'],
                                           self.queues['DB_RESPONSE'],
                                           self.queues['HTTP'],
-                                          self.queues['HTTP_RESPONSE'])
+                                          self.queues['HTTP_RESPONSE'],
+                                          latency=getLatency())
             return newGateClient
 
         if procName == 'LOGGER':
@@ -227,12 +298,13 @@ class BotClient():
                                     self.queues['DB_RESPONSE'])
             return newDbClient
 
-        if procName == "HANDLER":
-            newHandlerClient = HandlerClient("HANDLER",
-                                              self.queues['HANDLER'],
+        if procName.startswith("HANDLER_"):
+            newHandlerClient = HandlerClient(procName,
+                                              self.queues[procName],
                                               self.queues['LOGGER'],
                                               self.queues['HTTP'],
                                               self.queues['HTTP_RESPONSE'],
                                               self.queues['DB'],
-                                              self.queues['DB_RESPONSE'])
+                                              self.queues['DB_RESPONSE'],
+                                              latency=getLatency())
             return newHandlerClient
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import queue
+import pickle
+import struct
+import multiprocessing
+
+from multiprocessing.queues import JoinableQueue
+from typing import Any, Dict, Iterable, Optional
+
+__all__ = ['BoundedQueue', 'QUEUE_POLICIES', 'CONTROL_ACTIONS']
+
+QUEUE_POLICIES = ('block', 'drop_oldest', 'drop_by_type', 'spill')
+
+# Actions of the events that drive the processes, these are never shed.
+CONTROL_ACTIONS = frozenset(('STOP', 'STOPPED', 'GATEWAY_ERROR'))
+
+# Indexes into the shared counters.
+SHED, SPILLED, BLOCKED = 0, 1, 2
+# Indexes into the shared spill state.
+PENDING, OFFSET = 0, 1
+
+RECORD_HEADER = struct.Struct('!I')
+
+class BoundedQueue(JoinableQueue):
+    '''
+        JoinableQueue with a capacity and a policy for what happens to a put when the queue is full.
+
+        A drop-in replacement for the JoinableQueues passed between the processes. put() and
+        put_nowait() apply the policy, every other method behaves like JoinableQueue.
+
+        Policies:
+            block        -> put() waits until there is room, which pushes back on the producer.
+            drop_oldest  -> The oldest event on the queue is dropped to make room.
+            drop_by_type -> Once the queue is shedAt full, events whose type is in shedTypes are dropped
+                            on put. Other events keep the remaining room and wait like block when it runs out.
+            spill        -> Events that don't fit are pickled to spillDir/<name>.spill. Until the spill
+                            file is drained every put goes to it, so the consumer still sees events in order.
+
+        Where block and drop_by_type would wait, put_nowait() (put with block=False) sheds the event
+        instead. The gateway puts from its event loop, waiting there would stop the heartbeats of every
+        shard on the loop.
+        Control events (an action in CONTROL_ACTIONS, like STOP) are never shed. They wait for room even
+        from put_nowait(), and drop_oldest keeps them on the queue.
+
+        The shed, spilled and blocked counters are shared, so stats() reports the totals of every
+        producer from any process.
+
+        Attributes:
+            name (str): Name of the queue, used for the spill file and in stats().
+            capacity (int): Maximum number of events on the queue, 0 for no limit.
+            policy (str): One of QUEUE_POLICIES.
+            shedTypes (frozenset): Event types that drop_by_type sheds.
+            shedDepth (int): Depth at which drop_by_type starts shedding.
+            spillPath (str): File the spill policy writes to.
+    '''
+    __slots__ = ('name', 'capacity', 'policy', 'shedTypes', 'shedDepth', 'spillPath', '_counters', '_spillState', '_spillLock')
+
+    def __init__(self, name: str, capacity: int = 0, policy: str = 'block', shedTypes: Iterable[str] = (), shedAt: float = 0.8, spillDir: str = '/tmp', ctx=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"BoundedQueue() - Unknown overload policy: {policy}")
+
+        ctx = ctx or multiprocessing.get_context()
+        super().__init__(capacity, ctx=ctx)
+
+        self.name: str = name
+        self.capacity: int = capacity
+        self.policy: str = policy
+        self.shedTypes: frozenset = frozenset(shedTypes)
+        self.shedDepth: int = max(1, int(capacity * shedAt))
+        self.spillPath: str = os.path.join(spillDir, f"{name}.spill")
+        self._counters = ctx.Array('q', 3)
+        self._spillState = ctx.Array('q', 2)
+        self._spillLock = ctx.Lock()
+
+    #-------------------------------------------------------------------------------------------
+    def __getstate__(self):
+        return (super().__getstate__(),
+                self.name, self.capacity, self.policy, self.shedTypes, self.shedDepth, self.spillPath,
+                self._counters, self._spillState, self._spillLock)
+
+    def __setstate__(self, state):
+        super().__setstate__(state[0])
+        (self.name, self.capacity, self.policy, self.shedTypes, self.shedDepth, self.spillPath,
+         self._counters, self._spillState, self._spillLock) = state[1:]
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, obj: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        '''
+            Put an event on the queue, applying the overload policy when the queue is full.
+            When the policy waits for room, block=False sheds the event and timeout bounds the wait.
+        '''
+        if not self.capacity:
+            return super().put(obj, block, timeout)
+
+        if self.policy == 'spill':
+            return self._putOrSpill(obj)
+
+        control = self.isControl(obj)
+        if self.policy == 'drop_by_type' and self.shedTypes and not control and self.qsize() >= self.shedDepth:
+            if (getattr(obj, 'eventType', None) or getattr(obj, 'name', None)) in self.shedTypes:
+                self._count(SHED)
+                return
+
+        try:
+            return super().put(obj, False)
+        except queue.Full:
+            pass
+
+        if self.policy == 'drop_oldest' and self._dropOldest(obj):
+            return
+
+        if not block and not control:
+            self._count(SHED)
+            return
+
+        self._count(BLOCKED)
+        super().put(obj, True, timeout if block else None)
+
+    #-------------------------------------------------------------------------------------------
+    @staticmethod
+    def isControl(obj: Any) -> bool:
+        return getattr(obj, 'action', None) in CONTROL_ACTIONS
+
+    #-------------------------------------------------------------------------------------------
+    def _dropOldest(self, obj: Any) -> bool:
+        '''
+            Drop the oldest events until obj fits, control events taken off the front are put back
+            at the end. Returns False when no event could be dropped, every event left is a control event.
+        '''
+        recycled = 0
+        while recycled <= self.capacity:
+            try:
+                oldest = super().get(False)
+                self.task_done()
+                if self.isControl(oldest):
+                    super().put(oldest, True)
+                    recycled += 1
+                else:
+                    self._count(SHED)
+            except queue.Empty:
+                pass
+            try:
+                super().put(obj, False)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    #-------------------------------------------------------------------------------------------
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        '''
+            Events on the queue come before spilled events, which were put after them. qsize() also
+            counts events still in the producer's feeder thread, so the spill file is only read once
+            everything put before the spill has been consumed.
+        '''
+        if self._spillState[PENDING] and not self.qsize():
+            spilled = self._readSpill()
+            if spilled is not None:
+                return spilled[0]
+        return super().get(block, timeout)
+
+    #-------------------------------------------------------------------------------------------
+    @property
+    def spilled(self) -> int:
+        '''
+            Number of events waiting in the spill file.
+        '''
+        return self._spillState[PENDING]
+
+    #-------------------------------------------------------------------------------------------
+    def depth(self) -> int:
+        return self.qsize() + self._spillState[PENDING]
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'policy': self.policy,
+            'capacity': self.capacity,
+            'depth': self.depth(),
+            'shed': self._counters[SHED],
+            'spilled': self._counters[SPILLED],
+            'blocked': self._counters[BLOCKED]
+        }
+
+    #-------------------------------------------------------------------------------------------
+    def _count(self, counter: int) -> None:
+        with self._counters.get_lock():
+            self._counters[counter] += 1
+
+    #-------------------------------------------------------------------------------------------
+    def _putOrSpill(self, obj: Any) -> None:
+        if not self._spillState[PENDING]:
+            try:
+                return super().put(obj, False)
+            except queue.Full:
+                pass
+
+        record = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._spillLock:
+            with open(self.spillPath, 'ab') as spillFile:
+                spillFile.write(RECORD_HEADER.pack(len(record)))
+                spillFile.write(record)
+            self._spillState[PENDING] += 1
+
+        #----------------------------------------
+        #   Count the spilled event as a task so
+        #   task_done() and join() still balance.
+        #----------------------------------------
+        with self._cond:
+            self._unfinished_tasks.release()
+        self._count(SPILLED)
+
+    #-------------------------------------------------------------------------------------------
+    def _readSpill(self) -> Optional[tuple]:
+        '''
+            Read the next spilled event. Returns a 1-tuple so a spilled None can be told apart from no event.
+        '''
+        with self._spillLock:
+            if not self._spillState[PENDING]:
+                return None
+
+            with open(self.spillPath, 'rb') as spillFile:
+                spillFile.seek(self._spillState[OFFSET])
+                (length,) = RECORD_HEADER.unpack(spillFile.read(RECORD_HEADER.size))
+                obj = pickle.loads(spillFile.read(length))
+
+            self._spillState[OFFSET] += RECORD_HEADER.size + length
+            self._spillState[PENDING] -= 1
+
+            if not self._spillState[PENDING]:
+                os.truncate(self.spillPath, 0)
+                self._spillState[OFFSET] = 0
+
+        return (obj,)
@@ -1,11 +1,10 @@
 import config
-import time
-import queue
 from multiprocessing import Process, JoinableQueue
+from src.app.queueConsumer import QueueConsumer
 from src.models.procs.event import ProcessEvent, LogEvent, DatabaseEvent
 from src.db.core import Database
 
-class DBClient(Process):
+class DBClient(Process, QueueConsumer):
     '''
         DBClient is a Process that handles database operations for the bot.
         It listens for DatabaseEvent objects on the dbQueue and processes them.
@@ -31,14 +30,12 @@ class DBClient(Process):
     #-------------------------------------------------------------------------------------------
     def run(self):
         while True:
-            try:
-                evnt = self.dbRequestQueue.get_nowait()
-                self.dbRequestQueue.task_done()
-
-            except queue.Empty:
-                time.sleep(0.001)
+            evnt = self.waitForEvent(self.dbRequestQueue)
+            if evnt is None:
                 continue
 
+            self.dbRequestQueue.task_done()
+
             if evnt.action == "STOP":
                 self.killDbClient = True
                 break
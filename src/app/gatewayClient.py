@@ -1,16 +1,32 @@
+import os
+import time
+import random
 import asyncio
 import websockets
-import time
 import config
 import queue
 
 from multiprocessing import Process, JoinableQueue
 
+from src.app.queueConsumer import QueueConsumer
 from src.ext.generator import EventGenerator
-from src.models.procs.event import ProcessEvent, LogEvent, HandlerEvent
+from src.ext.inflator import ZlibStreamInflator
+from src.ext.framePeek import peekHeader
+from src.ext.sharding import IdentifyLimiter, resolveShards, shardLayout
+from src.models.procs.event import ProcessEvent, HandlerEvent
+from src.ext.procLogger import ProcLogger
+from src.ext.snapshot import Snapshot, writeSnapshot
+from src.ext.sessionState import SessionState
+from src.ext.gatewayLatency import GatewayLatency
+from src.app.handlerPool import dataKey, GUILD_ID_TYPES
+
+
+__all__ = ['GatewayClient', 'GatewayListener', 'ShardGroup', 'ReconnectWebSocket']
 
+GATEWAY_URL = 'wss://gateway.discord.gg'
 
-__all__ = ['GatewayClient', 'GatewayListener', 'ReconnectWebSocket']
+# Dispatch events the listener needs for the session, never forwarded raw.
+SESSION_EVENTS = ('READY', 'RESUMED')
 
 #-----------------------------------------------------------------------------------------------------------
 class ReconnectWebSocket(Exception):
@@ -25,76 +41,169 @@ class ReconnectWebSocket(Exception):
         self.op         = 'RESUME' if resume else 'IDENTIFY'
 
 #-----------------------------------------------------------------------------------------------------------
-class GatewayClient(Process):
+class GatewayClient(Process, QueueConsumer):
     '''
         Manages the process related to connecting to the Discord Gateway API and receiving events from it.
-        This class is a Process that runs the GatewayListener, which connects to the Discord Gateway API via websockets and asyncio.
+        This class is a Process that supervises the shards, each shard being a GatewayListener which connects to the Discord Gateway API via websockets and asyncio.
         
         The reason it is split into a separate process is so that the main websocket event loop can be managed without blocking the main bot process.
         It also allows us to write other client processes for other uses such as logging, database access, etc.
 
+        The shard count is read from the config (shardCount) or requested from /gateway/bot, and the shards
+        are spread over shardProcesses child processes. Each child runs a ShardGroup which hosts its shards
+        on a single event loop. Every shard feeds the shared handler queue, tagging its events with its shard id.
+
         Recieves events from the botQueue for communication between the main process and itself.
+
+        Every shard has a SessionState in shared memory that outlives its listener, so the listener that
+        replaces a dead one resumes the session. The listeners add their heartbeat latencies to the
+        GatewayLatency the BotClient shares with the handlers.
+
+        Attribute Layout:
+            shardGroups: List, [ {'shards': List[int], 'queues': List[JoinableQueue], 'sessions': List[SessionState], 'proc': Process} ]
     '''
-    __slots__ = ('gatewayQueue', 'botQueue', 'listenerQueue', 'GatewayListener')
+    __slots__ = ('gatewayQueue', 'botQueue', 'logQueue', 'log', 'handlerQueue', 'dbRequestQueue', 'dbResponseQueue',
+                 'httpQueue', 'httpResponseQueue', 'shardCount', 'identifyLimiter', 'shardGroups', 'latency')
 
-    def __init__(self, name, botQueue, handlerQueue, gatewayQueue, logQueue, dbRequestQueue, dbResponseQueue, httpQueue, httpResponseQueue):
+    def __init__(self, name, botQueue, handlerQueue, gatewayQueue, logQueue, dbRequestQueue, dbResponseQueue, httpQueue, httpResponseQueue, latency=None):
         super().__init__(name=name)
         self.gatewayQueue = gatewayQueue
         self.botQueue = botQueue
-        self.listenerQueue = JoinableQueue()
-        self.GatewayListener = GatewayListener(logQueue, handlerQueue, dbRequestQueue, dbResponseQueue, httpQueue, httpResponseQueue, self.listenerQueue)
+        self.logQueue = logQueue
+        self.log = ProcLogger("GATEWAY", logQueue)
+        self.handlerQueue = handlerQueue
+        self.dbRequestQueue = dbRequestQueue
+        self.dbResponseQueue = dbResponseQueue
+        self.httpQueue = httpQueue
+        self.httpResponseQueue = httpResponseQueue
+        self.shardCount = 1
+        self.identifyLimiter = None
+        self.shardGroups = list()
+        self.latency = latency
 
     #-------------------------------------------------------------------------------------------
     def run(self) -> None:
         '''
-            Starts the GatewayListener process which connects to the Discord Gateway API via websockets and asyncio.
+            Starts the shard processes which connect to the Discord Gateway API via websockets and asyncio.
             The reason for it being split into a separate process is to allow for the main bot process to continue running while the GatewayListener handles events asynchronously.
             Unfuntately, for all its bonuses, asyncio will still block the main process if it is run in the same process as the bot.
 
-            The GatewayListener will handle all events from the Gateway API and pass them to the EventHandler for processing.
-            It will also handle the heartbeat and reconnection logic for the websocket connection.
+            The GatewayListeners will handle all events from the Gateway API and pass them to the EventHandler for processing.
+            They will also handle the heartbeat and reconnection logic for the websocket connection.
         '''
-        gatewayProc = Process(target = self.GatewayListener.asyncRunner)
-        gatewayProc.start()
+        self.startShards()
 
         while True:
-            try:
-                evnt = self.gatewayQueue.get_nowait()
-                self.gatewayQueue.task_done()
+            evnt = self.waitForEvent(self.gatewayQueue, sentinels=[group['proc'].sentinel for group in self.shardGroups])
 
-            except queue.Empty:
-                procCheck = self.checkGatewayProcess(gatewayProc)
-                if procCheck is not None:
-                    gatewayProc = procCheck
-                time.sleep(0.01)
+            if evnt is None:
+                for group in self.shardGroups:
+                    self.checkGatewayProcess(group)
+                self.log.flush()
                 continue
 
+            self.gatewayQueue.task_done()
+
             if evnt.action == "STOP":
-                self.listenerQueue.put_nowait(None)
-                self.listenerQueue.join()
-                gatewayProc.terminate()
-                gatewayProc.join()
-                gatewayProc = None
+                self.stopShards()
+                self.log.flush()
                 break
 
         procEvent = ProcessEvent("GATEWAY", "STOPPED")
         self.botQueue.put_nowait(procEvent)
 
     #-------------------------------------------------------------------------------------------
-    def checkGatewayProcess(self, proc) -> Process:
+    def startShards(self) -> None:
+        '''
+            Determine the shard count and identify concurrency, then create and start a process
+            for each group of shards.
+        '''
+        self.shardCount, maxConcurrency = resolveShards()
+        self.identifyLimiter = IdentifyLimiter(maxConcurrency)
+        self.log.info(f"[GatewayClient] Starting {self.shardCount} shards over {config.OPTS['shardProcesses']} processes, max_concurrency: {maxConcurrency}")
+
+        for shardIds in shardLayout(self.shardCount, config.OPTS['shardProcesses']):
+            group = {'shards': shardIds, 'queues': [JoinableQueue() for _ in shardIds], 'sessions': [SessionState() for _ in shardIds], 'proc': None}
+            group['proc'] = self.newShardProcess(group)
+            group['proc'].start()
+            self.shardGroups.append(group)
+
+    #-------------------------------------------------------------------------------------------
+    def stopShards(self) -> None:
+        '''
+            Signal every shard to stop, then terminate the shard processes.
+        '''
+        for group in self.shardGroups:
+            for listenerQueue in group['queues']:
+                listenerQueue.put_nowait(None)
+                listenerQueue.join()
+            group['proc'].terminate()
+            group['proc'].join()
+            group['proc'] = None
+
+    #-------------------------------------------------------------------------------------------
+    def newShardProcess(self, group: dict) -> Process:
         '''
-            Determines if the GatewayListener process is still alive.
+            Create the process hosting a group of shards. The listeners are created fresh so a
+            restarted process does not inherit the state of the one that died, apart from the
+            shared SessionStates they resume from.
+        '''
+        listeners = [GatewayListener(self.logQueue,
+                                     self.handlerQueue,
+                                     self.dbRequestQueue,
+                                     self.dbResponseQueue,
+                                     self.httpQueue,
+                                     self.httpResponseQueue,
+                                     listenerQueue,
+                                     shard_id=shardId,
+                                     shard_count=self.shardCount,
+                                     identifyLimiter=self.identifyLimiter,
+                                     sessionState=sessionState,
+                                     latency=self.latency) for shardId, listenerQueue, sessionState in zip(group['shards'], group['queues'], group['sessions'])]
+
+        return Process(target = ShardGroup(listeners).asyncRunner)
+
+    #-------------------------------------------------------------------------------------------
+    def checkGatewayProcess(self, group: dict) -> None:
+        '''
+            Determines if the process for a group of shards is still alive.
             If it is not alive, it will terminate the process and start a new one.
         '''
-        if proc.is_alive():
+        if group['proc'].is_alive():
             return
 
-        elif not proc.is_alive():
-            proc.terminate()
-            proc.join()
-            proc = Process(target = self.GatewayListener.asyncRunner)
-            proc.start()
-            return proc
+        group['proc'].terminate()
+        group['proc'].join()
+        self.log.error(f"[GatewayClient] Shard process for shards {group['shards']} died, restarting")
+        group['proc'] = self.newShardProcess(group)
+        group['proc'].start()
+
+#-----------------------------------------------------------------------------------------------------------
+class ShardGroup():
+    '''
+        Runs a group of GatewayListeners, one per shard, on a single event loop inside a shard process.
+    '''
+    __slots__ = ('listeners',)
+
+    def __init__(self, listeners):
+        self.listeners = listeners
+
+    #-------------------------------------------------------------------------------------------
+    def asyncRunner(self) -> None:
+        '''
+            Starts the AsyncIO Loop with a socket client for every shard in the group.
+        '''
+        asyncio.run(self.runShards())
+
+    #-------------------------------------------------------------------------------------------
+    async def runShards(self) -> None:
+        flushTasks = [asyncio.create_task(listener.log.autoFlush()) for listener in self.listeners]
+        try:
+            await asyncio.gather(*[listener.socketClient() for listener in self.listeners])
+        finally:
+            for task in flushTasks:
+                task.cancel()
+            await asyncio.gather(*flushTasks, return_exceptions=True)
 
 #-----------------------------------------------------------------------------------------------------------
 class GatewayListener():
@@ -104,8 +213,24 @@ class GatewayListener():
 
         The first handles the heartbeat and reconnection logic for the websocket connection.
         The second handles the events from the Gateway API and passes them to the EventHandler for processing.
+
+        shard_id -> The id of the shard this listener connects as, sent as [shard_id, shard_count] in identify.
+        shard_count -> The total number of shards. None when the bot is not sharded.
+        identifyLimiter -> IdentifyLimiter shared by all shards to respect the max_concurrency identify buckets.
+        sessionState -> SessionState the session is kept in, a listener started with a live session resumes it.
+        latency -> GatewayLatency the time between each heartbeat and its ACK is added to.
+
+        The first heartbeat of a connection is sent after a random part of the interval from HELLO, so
+        shards that connect together don't beat together. A heartbeat is only sent once the previous one
+        was acknowledged (op 11), when the ACK is missing the connection is a zombie and it is closed
+        and resumed.
+
+        With a snapshotDir configured, the session (session_id, sequence, resume_gateway_url) is saved to
+        <snapshotDir>/session_<shard_id>.snap with every heartbeat, and a new listener whose saved session
+        is younger than sessionResumeWindow starts with a RESUME instead of an IDENTIFY.
     '''
     __slots__ = ('logQueue', 
+                    'log', 
                     'httpQueue', 
                     'handlerQueue', 
                     'listenerQueue', 
@@ -114,20 +239,48 @@ class GatewayListener():
                     'session_id', 
                     'shard', 
                     'resume_gateway_url', 
-                    'websocket')
-
-    def __init__(self, logQueue, handlerQueue, dbRequestQueue, dbResponseQueue, httpQueue, httpResponseQueue, listenerQueue):
+                    'websocket',
+                    'inflator',
+                    'shard_id',
+                    'shard_count',
+                    'identifyLimiter',
+                    'sessionState',
+                    'latency',
+                    'acked',
+                    'lastBeat',
+                    'forwardRaw',
+                    'rawTypes',
+                    'dropTypes')
+
+    def __init__(self, logQueue, handlerQueue, dbRequestQueue, dbResponseQueue, httpQueue, httpResponseQueue, listenerQueue, shard_id=0, shard_count=None, identifyLimiter=None, sessionState=None, latency=None):
         self.logQueue: JoinableQueue = logQueue
+        self.log: ProcLogger = ProcLogger("GATEWAY", logQueue)
         self.httpQueue: JoinableQueue = httpQueue
         self.handlerQueue: JoinableQueue = handlerQueue
         self.listenerQueue: JoinableQueue = listenerQueue
+        self.shard_id: int = shard_id
+        self.shard_count = shard_count
+        self.identifyLimiter: IdentifyLimiter = identifyLimiter
+        self.sessionState: SessionState = sessionState
+        self.latency: GatewayLatency = latency
 
         self.interval = None
+        self.acked: bool = True
+        self.lastBeat: float = 0.0
         self.sequence = None
         self.session_id = None
         self.shard = list()
         self.resume_gateway_url = ""
         self.websocket = None
+        self.inflator = ZlibStreamInflator() if config.OPTS['gatewayCompress'] else None
+        self.forwardRaw: bool = config.OPTS['gatewayForwardRaw']
+        #----------------------------------------
+        #   PRESENCE_UPDATE goes to the handler's
+        #   presence cache raw, or is dropped.
+        #----------------------------------------
+        presenceTypes = frozenset(('PRESENCE_UPDATE',))
+        self.rawTypes: frozenset = presenceTypes if config.OPTS['presenceMode'] != 'none' else frozenset()
+        self.dropTypes: frozenset = presenceTypes if config.OPTS['presenceMode'] == 'none' else frozenset()
 
     #-------------------------------------------------------------------------------------------
     def asyncRunner(self) -> None:
@@ -144,6 +297,16 @@ class GatewayListener():
         '''
             Main loop for the bot
         '''
+        if self.restoreSession():
+            await self.resume()
+
+        try:
+            await self.runSocket()
+        finally:
+            self.saveSession()
+
+    #-------------------------------------------------------------------------------------------
+    async def runSocket(self) -> None:
         while True:
 
             #----------------------------------------
@@ -166,16 +329,21 @@ class GatewayListener():
 
             #----------------------------------------
             #   Run both the heartbeat response and
-            #   the receive api in parallel
+            #   the receive api in parallel, when one
+            #   of them stops the other is cancelled
+            #   so no heartbeat outlives its socket.
             #----------------------------------------
+            tasks = [asyncio.ensure_future(self.heartbeat()), asyncio.ensure_future(self.receive())]
             try:
-                await asyncio.gather(self.heartbeat(), self.receive())
+                await asyncio.gather(*tasks)
             
             #----------------------------------------
             #   If the connection is lost, reconnect
             #----------------------------------------
             except ReconnectWebSocket as e:
-                self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="Reconnecting"))
+                for task in tasks:
+                    task.cancel()
+                self.log.info("Reconnecting")
                 await self.websocket.close()
                 
                 if e.resume:
@@ -191,14 +359,16 @@ class GatewayListener():
             #   process.
             #----------------------------------------
             except websockets.exceptions.ConnectionClosed as e:
+                for task in tasks:
+                    task.cancel()
                 if e.code in config.RESPONSE_CODES.gateway_close_codes:
                     closeCode = config.RESPONSE_CODES.gateway_close_codes[e.code]
 
                 else:
-                    self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="ERROR", message=f"[GatewayClient] Websocket Connection Closed, code: {e.code}, which isnt in the known error codes."))
+                    self.log.error(f"[GatewayClient] Websocket Connection Closed, code: {e.code}, which isnt in the known error codes.")
                     return
 
-                self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message=f"[GatewayClient] Connection Close Frame was sent: {closeCode._to_dict()}"))
+                self.log.info(lambda: f"[GatewayClient] Connection Close Frame was sent: {closeCode._to_dict()}")
                 if closeCode.reconnect:
 
                     #-----------------------------------------
@@ -210,12 +380,12 @@ class GatewayListener():
                         await self.resume()
 
                     if closeCode.code in [4000, 4009]:
-                        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Reconnecting in 5 seconds"))
+                        self.log.info("[GatewayClient] Reconnecting in 5 seconds")
                         self.websocket = None
                         await asyncio.sleep(5)
 
                     if closeCode.code in [4003, 4004, 4010, 4011, 4012, 4013, 4014]:
-                        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Problem bad, shouldnt reconnect"))
+                        self.log.info("[GatewayClient] Problem bad, shouldnt reconnect")
                         return
                 else:
                     return
@@ -240,6 +410,33 @@ class GatewayListener():
             t -> The event name
         '''
         async for message in self.websocket:
+            #----------------------------------------
+            #   With zlib-stream compression a
+            #   payload can span several messages,
+            #   wait until the frame is complete.
+            #----------------------------------------
+            message = self.inflate(message)
+            if message is None:
+                continue
+
+            #----------------------------------------
+            #   Pass raw forwarded dispatch events on
+            #   to the handler from their header
+            #   without decoding, drop dropped ones.
+            #   The guild id of GUILD_CREATE/UPDATE/
+            #   DELETE is their "id", which the peek
+            #   can't find, they are decoded for it.
+            #----------------------------------------
+            header = peekHeader(message)
+            if header is not None and header.op == 0 and header.t not in SESSION_EVENTS:
+                if header.t in self.dropTypes:
+                    self.setSequence(header.s)
+                    continue
+                if (self.forwardRaw or header.t in self.rawTypes) and header.t not in GUILD_ID_TYPES:
+                    self.setSequence(header.s)
+                    self.handlerQueue.put_nowait(HandlerEvent(eventType=header.t, raw=message, partition=header.partition, shard=self.shard_id))
+                    continue
+
             #----------------------------------------
             #   Get the incoming message from the 
             #   async generator and create a 
@@ -248,11 +445,11 @@ class GatewayListener():
             evnt = EventGenerator.incoming_event(message)
 
             if evnt is None:
-                self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="ERROR", message="[GatewayClient] Received None from incoming_event"))
+                self.log.error("[GatewayClient] Received None from incoming_event")
                 continue
 
             # for debugging
-            #self.logQueue.put_nowait(LogEvent(action="LOG", level="INFO", message=f"[GatewayClient] {evnt._to_dict()}"))
+            #self.log.debug(lambda: f"[GatewayClient] {evnt._to_dict()}")
 
             #----------------------------------------
             #   Get the OpCode object from the
@@ -262,7 +459,7 @@ class GatewayListener():
                 opCode = config.RESPONSE_CODES.gateway_op_codes[evnt.op]
 
             except KeyError:
-                self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="ERROR", message=f"[GatewayClient] Unknown OpCode -- {evnt._to_dict()}"))
+                self.log.error(lambda: f"[GatewayClient] Unknown OpCode -- {evnt._to_dict()}")
                 continue
 
             #----------------------------------------
@@ -270,12 +467,24 @@ class GatewayListener():
             #----------------------------------------
             if opCode.name == "Heartbeat":
                 heart_event = EventGenerator.heartbeat_event(self.sequence)
+                self.lastBeat = time.perf_counter()
                 await self.websocket.send(heart_event._to_payload())
 
+            #----------------------------------------
+            #   Heartbeat ACK Event
+            #----------------------------------------
+            if opCode.name == "Heartbeat ACK":
+                self.acked = True
+                if self.latency is not None:
+                    self.latency.add(self.shard_id, time.perf_counter() - self.lastBeat)
+
             #----------------------------------------
             #   InvalidSession Event
             #----------------------------------------
             if opCode.name == "Invalid Session":
+                self.session_id = None
+                if self.sessionState is not None:
+                    self.sessionState.clear()
                 raise ReconnectWebSocket(resume = False)
 
             #----------------------------------------
@@ -290,19 +499,21 @@ class GatewayListener():
             #   to the websocket connection.
             #----------------------------------------------------------------------
             if opCode.name == "Dispatch":
-                self.sequence = int(evnt.s)
+                self.setSequence(int(evnt.s))
 
                 if evnt.t == "READY":
                     self.session_id = evnt.d["session_id"]
-                    self.resume_gateway_url = f'{evnt.d["resume_gateway_url"]}/?v=6&encoding=json'
+                    self.resume_gateway_url = evnt.d["resume_gateway_url"]
+                    if self.sessionState is not None:
+                        self.sessionState.setSession(self.session_id, self.resume_gateway_url)
 
                     if "shard" in evnt.d:
                         self.shard = evnt.d["shard"]
 
-                    self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message=f"[GatewayClient] Got session ID: {self.session_id}"))
+                    self.log.info(f"[GatewayClient] Got session ID: {self.session_id}")
 
                 elif evnt.t == "RESUMED":
-                    self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Successfully resumed"))
+                    self.log.info("[GatewayClient] Successfully resumed")
 
                 #----------------------------------------------------------------------
                 #   All other events before this point
@@ -310,12 +521,25 @@ class GatewayListener():
                 #   connection.
                 #----------------------------------------------------------------------
                 else:
+                    if evnt.t in self.dropTypes:
+                        continue
+
                     #----------------------------------------
                     #   Skip events from the bot
                     #----------------------------------------
                     if 'author' in evnt.d and evnt.d['author']['id'] == config.OPTS['appId']:
                         continue
 
+                    #----------------------------------------
+                    #   Payloads the header could not be
+                    #   read from (ETF) and guild events
+                    #   are still forwarded raw, only the
+                    #   decode is repeated.
+                    #----------------------------------------
+                    if self.forwardRaw or evnt.t in self.rawTypes:
+                        self.handlerQueue.put_nowait(HandlerEvent(eventType=evnt.t, raw=message, partition=dataKey(evnt.t, evnt.d), shard=self.shard_id))
+                        continue
+
                     discordResource = EventGenerator.createResource(evnt)
 
                     #----------------------------------------
@@ -326,27 +550,108 @@ class GatewayListener():
                     #   file for the supported event types.
                     #-----------------------------------------
                     if discordResource is None:
-                        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="ERROR", message=f"[GatewayClient] Could not create resource for event: {evnt.t}"))
+                        self.log.error(f"[GatewayClient] Could not create resource for event: {evnt.t}")
                         continue
 
-                    self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="DEBUG", message=f"[GatewayClient] Dispatching event: {evnt.t}\n{discordResource._to_dict()}"))
-                    self.handlerQueue.put_nowait(HandlerEvent(eventType=evnt.t, resourceObject=discordResource))
+                    self.log.debug(lambda: f"[GatewayClient] Dispatching event: {evnt.t}\n{discordResource._to_dict()}")
+                    self.handlerQueue.put_nowait(HandlerEvent(eventType=evnt.t, resourceObject=discordResource, shard=self.shard_id))
 
     #-------------------------------------------------------------------------------------------
     # Heartbeat loop
     #-------------------------------------------------------------------------------------------
     async def heartbeat(self) -> None:
-        while self.interval is not None:
+        '''
+            Send a heartbeat every interval, the first one after a random part of it.
+            Raises ReconnectWebSocket when the previous heartbeat was never acknowledged.
+        '''
+        if self.interval is None:
+            self.log.error(f"[GatewayClient] Shard {self.shard_id} has no heartbeat interval, reconnecting")
+            raise ReconnectWebSocket(resume = self.session_id is not None)
+
+        await asyncio.sleep(self.interval * random.random())
+
+        while True:
+            #----------------------------------------
+            #   No ACK since the last heartbeat, the
+            #   connection is dead even though the
+            #   socket is still open.
+            #----------------------------------------
+            if not self.acked:
+                self.log.error(f"[GatewayClient] Shard {self.shard_id} missed a heartbeat ACK, reconnecting")
+                if self.latency is not None:
+                    self.latency.missed()
+                raise ReconnectWebSocket()
+
             evnt = EventGenerator.heartbeat_event(self.sequence)
+            self.acked = False
+            self.lastBeat = time.perf_counter()
             await self.websocket.send(evnt._to_payload())
+            if self.sessionState is not None:
+                self.sessionState.touch()
+            self.saveSession()
             await asyncio.sleep(self.interval)
+
+    #-------------------------------------------------------------------------------------------
+    # Session state
+    #-------------------------------------------------------------------------------------------
+    def setSequence(self, sequence: int) -> None:
+        self.sequence = sequence
+        if self.sessionState is not None:
+            self.sessionState.setSequence(sequence)
+
+    #-------------------------------------------------------------------------------------------
+    def sessionPath(self) -> str:
+        return os.path.join(config.OPTS['snapshotDir'], f"session_{self.shard_id}.snap")
+
+    #-------------------------------------------------------------------------------------------
+    def saveSession(self) -> None:
+        if not config.OPTS['snapshotDir'] or self.session_id is None:
+            return
+        try:
+            writeSnapshot(self.sessionPath(), {'session': {'session_id': self.session_id,
+                                                           'sequence': self.sequence,
+                                                           'resume_gateway_url': self.resume_gateway_url,
+                                                           'shard_count': self.shard_count}})
+        except OSError as e:
+            self.log.error(f"[GatewayClient] Could not save the session of shard {self.shard_id}: {e}")
+
+    #-------------------------------------------------------------------------------------------
+    def restoreSession(self) -> bool:
+        '''
+            Load the session of this shard, from the SessionState left by the previous listener or else
+            from the session snapshot. Returns True when it can be resumed.
+        '''
+        session = self.sessionState.load() if self.sessionState is not None else None
+        if session is not None and self.sessionState.age() <= config.OPTS['sessionResumeWindow']:
+            self.session_id, self.sequence, self.resume_gateway_url = session
+            self.log.info(f"[GatewayClient] Shard {self.shard_id} resuming session {self.session_id} of the previous listener at sequence {self.sequence}")
+            return True
+
+        if not config.OPTS['snapshotDir']:
+            return False
+
+        snapshot = Snapshot.open(self.sessionPath())
+        if snapshot is None:
+            return False
+
+        with snapshot:
+            session = snapshot.load('session') or dict()
+            if snapshot.age() > config.OPTS['sessionResumeWindow'] or session.get('shard_count') != self.shard_count or not session.get('resume_gateway_url'):
+                return False
+
+        self.session_id = session['session_id']
+        self.sequence = session['sequence']
+        self.resume_gateway_url = session['resume_gateway_url']
+        self.log.info(f"[GatewayClient] Shard {self.shard_id} resuming saved session {self.session_id} at sequence {self.sequence}")
+        return True
     
     #-------------------------------------------------------------------------------------------
     # Resume the connection
     #-------------------------------------------------------------------------------------------
     async def resume(self) -> None:
-        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="DEBUG", message="[GatewayClient] Attempting to resume connection"))
-        self.websocket = await websockets.connect(self.resume_gateway_url)
+        self.log.debug("[GatewayClient] Attempting to resume connection")
+        self.websocket = await self.openSocket(self.resume_gateway_url)
+        await self.readHello()
         evnt = EventGenerator.resume_event(self.sequence, self.session_id)
         await self.websocket.send(evnt._to_payload())
 
@@ -354,7 +659,7 @@ class GatewayListener():
     # Connect
     #-------------------------------------------------------------------------------------------
     async def connect(self) -> None:
-        self.websocket = await websockets.connect('wss://gateway.discord.gg/?v=6&encoding=json')
+        self.websocket = await self.openSocket(GATEWAY_URL)
         #----------------------------------------
         # inital handshake
         #----------------------------------------
@@ -364,18 +669,64 @@ class GatewayListener():
     # Handshake and authentication
     #-------------------------------------------------------------------------------------------
     async def identify(self) -> None:
-        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Attempting Handshake and authentication"))
-        await self.websocket.send(EventGenerator.auth_event()._to_payload())
+        self.log.info(f"[GatewayClient] Shard {self.shard_id} attempting Handshake and authentication")
+        #----------------------------------------
+        #   Wait for this shard's identify bucket
+        #----------------------------------------
+        if self.identifyLimiter is not None:
+            await self.identifyLimiter.wait(self.shard_id)
+
+        shard = [self.shard_id, self.shard_count] if self.shard_count else None
+        await self.websocket.send(EventGenerator.auth_event(shard)._to_payload())
+        await self.readHello()
 
-        ret = await self.websocket.recv()
+    #-------------------------------------------------------------------------------------------
+    async def readHello(self) -> None:
+        '''
+            Read the HELLO the gateway sends on a new connection for the heartbeat interval.
+        '''
+        ret = None
+        while ret is None:
+            ret = self.inflate(await self.websocket.recv())
         evnt = EventGenerator.incoming_event(ret)
 
         if evnt.op != 10:
-            self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Unexpected reply"))
-            self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="DEBUG", message=ret))
+            self.log.info("[GatewayClient] Unexpected reply")
+            self.log.debug(ret)
 
         if evnt.op == 10:
-            self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message="[GatewayClient] Authenticated"))
+            self.log.info("[GatewayClient] Authenticated")
 
         self.interval = evnt.d["heartbeat_interval"] / 1000
-        self.logQueue.put_nowait(LogEvent(component="GATEWAY", action="LOG", level="INFO", message=f"[GatewayClient] interval: {self.interval}"))
+        self.acked = True
+        self.log.info(f"[GatewayClient] interval: {self.interval}")
+
+    #-------------------------------------------------------------------------------------------
+    # Open the websocket
+    #-------------------------------------------------------------------------------------------
+    async def openSocket(self, baseUrl: str):
+        '''
+            Open a websocket to the gateway with the configured query parameters.
+            Every new connection needs a fresh zlib context, so the inflator is reset here
+            for both the connect and resume paths.
+        '''
+        url = f"{baseUrl}/?v=6&encoding={config.OPTS['gatewayEncoding']}"
+
+        if self.inflator is not None:
+            url = f'{url}&compress=zlib-stream'
+            self.inflator.reset()
+
+        return await websockets.connect(url)
+
+    #-------------------------------------------------------------------------------------------
+    # Decompress an incoming message
+    #-------------------------------------------------------------------------------------------
+    def inflate(self, message):
+        '''
+            Pass the message through the zlib-stream inflator when compression is enabled.
+            Returns None if the message is only part of a payload.
+        '''
+        if self.inflator is None or isinstance(message, str):
+            return message
+
+        return self.inflator.feed(message)
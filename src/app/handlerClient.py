@@ -1,34 +1,65 @@
+import os
 import time
-import queue
-
 import config
 
 from multiprocessing import Process
 
-from src.models.procs.event import LogEvent, HttpEvent, DatabaseEvent
+from src.app.queueConsumer import QueueConsumer
+
+from src.models.procs.event import HttpEvent, DatabaseEvent
+from src.ext.procLogger import ProcLogger
 from src.models.bot.resources.message import Message
 from src.models.base import BaseResourceObject
 from src.ext.listeners.botListeners import BotListeners
 from src.ext.botTriggeredActions import BotTriggeredActions
 from src.ext.stateHandler import StateHandler
+from src.ext.commandRouter import CommandRouter
+from src.ext.entityCache import getCache
+from src.ext.presenceCache import getPresences
+from src.ext.messageCache import getMessages
+from src.ext.gatewayLatency import GatewayLatency, setLatency
+from src.ext.snapshot import Snapshot, writeSnapshot
+from src.ext.generator import EventGenerator
 
 __all__ = ['HandlerClient']
 
-class HandlerClient(Process):
+# Message events that can run a command.
+COMMAND_TYPES = ('MESSAGE_CREATE', 'MESSAGE_UPDATE')
+
+class HandlerClient(Process, QueueConsumer):
     '''
         Process for handling events from the WebSocket client.
 
         Ingests events from the listener queue and determines where they need to go.
+
+        Several HandlerClients can run as a pool (handlerProcesses), each with its own queue. The gateway
+        routes every guild to the same handler (see HandlerPool), so a handler sees a guild's events in order.
+
+        Every event also updates the handler's entity cache (see EntityCache) once it has been handled.
+        PRESENCE_UPDATE arrives raw and goes to the presence cache (see PresenceCache) without building
+        a Presence, unless a listener handles it. Recent messages are kept in the message cache (see
+        MessageCache), MESSAGE_DELETE is handled with the cached message when there is one.
+
+        With a snapshotDir configured, the entity cache is written to <snapshotDir>/<name>.snap every
+        snapshotInterval and on STOP, and a restarted handler starts from it instead of an empty cache.
+
+        The gateway latency the shards measure is shared with the handler, commands read it with getLatency().
     '''
 
     __slots__ = ('handlerQueue',
                  'logQueue',
+                 'log',
                  'dbRequestQueue',
                  'dbResponseQueue',
                  'httpQueue',
                  'httpResponseQueue',
                  'botListeners',
-                 'botCommands')
+                 'botCommands',
+                 'commandRouter',
+                 'handledTypes',
+                 'lastCacheReport',
+                 'lastSnapshot',
+                 'latency')
 
     def __init__(self, 
                  name, 
@@ -37,11 +68,13 @@ class HandlerClient(Process):
                  httpQueue, 
                  httpResponseQueue,
                  dbRequestQueue=None, 
-                 dbResponseQueue=None
+                 dbResponseQueue=None,
+                 latency=None
                 ):
         super().__init__(name=name)
         self.handlerQueue = handlerQueue
         self.logQueue = logQueue
+        self.log = ProcLogger("HANDLER", logQueue)
         self.dbRequestQueue = dbRequestQueue
         self.dbResponseQueue = dbResponseQueue
         self.httpQueue = httpQueue
@@ -50,23 +83,175 @@ class HandlerClient(Process):
         self.botListeners = BotListeners()
         self.botTriggeredActions = BotTriggeredActions(httpQueue, httpResponseQueue, logQueue, self.stateHandler, dbRequestQueue=dbRequestQueue, dbResponseQueue=dbResponseQueue)
         self.botTriggeredActions.initialize_actions()
+        self.commandRouter = CommandRouter(config.OPTS['commandPrefix'])
+        self.commandRouter.registerActions(self.botTriggeredActions.triggerableActions['commands'])
+        self.handledTypes = self.findHandledTypes()
+        self.lastCacheReport = time.monotonic()
+        self.lastSnapshot = time.monotonic()
+        self.latency: GatewayLatency = latency
 
 
     #-------------------------------------------------------------------------------------------
     def run(self):
+        if self.latency is not None:
+            setLatency(self.latency)
+        self.restoreSnapshot()
 
         while True:
             # Process events from the handler queue
-            try:
-                event = self.handlerQueue.get_nowait()
-            except queue.Empty:
-                time.sleep(0.01)  # Sleep briefly to avoid busy waiting
+            event = self.waitForEvent(self.handlerQueue)
+            if event is None:
+                self.log.flush()
                 continue
 
+            self.handlerQueue.task_done()
+
             if event.action == "STOP":
+                self.writeSnapshot()
+                self.log.flush()
                 break
 
-            self.handle_event(event.eventType, event.resourceObject)
+            self.dispatch(event)
+
+    #-------------------------------------------------------------------------------------------
+    def dispatch(self, event) -> None:
+        '''
+            Handle a HandlerEvent, building the resource first for raw events.
+        '''
+        resourceObject = event.resourceObject
+        if event.raw is not None:
+            evnt = None
+            if event.eventType == "PRESENCE_UPDATE":
+                evnt = EventGenerator.incoming_event(event.raw)
+                getPresences().update(evnt.d)
+
+            resourceObject = self.buildResource(event, evnt)
+            if resourceObject is None:
+                return
+
+        #----------------------------------------
+        #   MESSAGE_DELETE only has the ids, hand
+        #   the deleted message on if it's cached.
+        #----------------------------------------
+        if event.eventType == "MESSAGE_DELETE":
+            resourceObject = getMessages().get(resourceObject.channel_id, resourceObject.id) or resourceObject
+
+        self.handle_event(event.eventType, resourceObject)
+        self.updateCaches(event.eventType, resourceObject)
+
+    #-------------------------------------------------------------------------------------------
+    def updateCaches(self, eventType: str, resourceObject: BaseResourceObject) -> None:
+        '''
+            Apply a handled event to the entity, presence and message caches, and log their stats every cacheStatsInterval.
+        '''
+        if eventType == "GUILD_CREATE":
+            getPresences().loadGuild(resourceObject.id, getattr(resourceObject, 'presences', None))
+        elif eventType == "GUILD_DELETE" and not getattr(resourceObject, 'unavailable', False):
+            getPresences().removeGuild(resourceObject.id)
+
+        getCache().update(eventType, resourceObject)
+        getMessages().update(eventType, resourceObject)
+
+        now = time.monotonic()
+        if now - self.lastCacheReport >= config.OPTS['cacheStatsInterval']:
+            self.lastCacheReport = now
+            self.log.info(lambda: f"[EventHandler] {self.name} entity cache: {getCache().stats()} presences: {getPresences().stats()} messages: {getMessages().stats()}")
+
+        if config.OPTS['snapshotDir'] and now - self.lastSnapshot >= config.OPTS['snapshotInterval']:
+            self.lastSnapshot = now
+            self.writeSnapshot()
+
+    #-------------------------------------------------------------------------------------------
+    # Snapshots
+    #-------------------------------------------------------------------------------------------
+    def snapshotPath(self) -> str:
+        return os.path.join(config.OPTS['snapshotDir'], f"{self.name}.snap")
+
+    #-------------------------------------------------------------------------------------------
+    def writeSnapshot(self) -> None:
+        '''
+            Write the entity cache to the snapshot file, when snapshots are configured.
+        '''
+        if not config.OPTS['snapshotDir']:
+            return
+
+        started = time.perf_counter()
+        sections = getCache().snapshot()
+        sections['handler'] = {'handlerProcesses': config.OPTS['handlerProcesses']}
+        try:
+            size = writeSnapshot(self.snapshotPath(), sections)
+        except OSError as e:
+            self.log.error(f"[EventHandler] Could not write snapshot {self.snapshotPath()}: {e}")
+            return
+        self.log.info(lambda: f"[EventHandler] Wrote snapshot {self.snapshotPath()}, {size} bytes in {time.perf_counter() - started:.3f}s")
+
+    #-------------------------------------------------------------------------------------------
+    def restoreSnapshot(self) -> None:
+        '''
+            Fill the entity cache from the snapshot file. Snapshots older than snapshotMaxAge, or written
+            with another number of handlers (which serve other guilds), are ignored.
+        '''
+        if not config.OPTS['snapshotDir']:
+            return
+
+        snapshot = Snapshot.open(self.snapshotPath())
+        if snapshot is None:
+            return
+
+        started = time.perf_counter()
+        with snapshot:
+            handlerOpts = snapshot.load('handler') or dict()
+            if snapshot.age() > config.OPTS['snapshotMaxAge'] or handlerOpts.get('handlerProcesses') != config.OPTS['handlerProcesses']:
+                self.log.info(f"[EventHandler] Ignoring stale snapshot {self.snapshotPath()}")
+                return
+            getCache().restore(snapshot)
+
+        self.log.info(lambda: f"[EventHandler] Restored snapshot in {time.perf_counter() - started:.3f}s: {getCache().stats()}")
+
+    #-------------------------------------------------------------------------------------------
+    def findHandledTypes(self) -> frozenset:
+        '''
+            The event types handle_event does something with: interactions, the message events
+            commands come from, every type with a handler in GATEWAY_EVENTS and the types the
+            entity and message caches are fed with.
+        '''
+        handledTypes = {"INTERACTION_CREATE"}
+        handledTypes.update(getCache().eventTypes)
+        handledTypes.update(getMessages().eventTypes)
+        handledTypes.update(eventType for eventType, resource in EventGenerator.event_map.items() if resource is Message)
+
+        for eventType, eventOpts in config.GATEWAY_EVENTS.items():
+            handlers = eventOpts['handler'] if isinstance(eventOpts['handler'], list) else [eventOpts['handler']]
+            if any(handler != "None" for handler in handlers):
+                handledTypes.add(eventType)
+
+        return frozenset(handledTypes)
+
+    #-------------------------------------------------------------------------------------------
+    def buildResource(self, event, evnt=None) -> BaseResourceObject:
+        '''
+            Build the resource object of a raw event, only for event types that are handled.
+            evnt -> The GatewayEvent when the payload has already been decoded.
+            Returns None when the event should be skipped.
+        '''
+        if event.eventType not in self.handledTypes:
+            self.log.debug(lambda: f"[EventHandler] Event type {event.eventType} has no handler")
+            return None
+
+        if evnt is None:
+            evnt = EventGenerator.incoming_event(event.raw)
+
+        #----------------------------------------
+        #   Skip events from the bot
+        #----------------------------------------
+        if 'author' in evnt.d and evnt.d['author']['id'] == config.OPTS['appId']:
+            return None
+
+        resourceObject = EventGenerator.createResource(evnt)
+        if resourceObject is None:
+            self.log.error(f"[EventHandler] Could not create resource for event: {evnt.t}")
+
+        return resourceObject
 
 
     #-------------------------------------------------------------------------------------------
@@ -79,13 +264,13 @@ class HandlerClient(Process):
         #---------------------------------------------------
         # For debugging purposes
         #---------------------------------------------------
-        self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] type: {type(resourceObject)} data: {resourceObject._to_dict()}"))
+        self.log.debug(lambda: f"[EventHandler] type: {type(resourceObject)} data: {resourceObject._to_dict()}")
 
         #------------------------------------------------------------------------
         #   Check if the event is an interaction
         #------------------------------------------------------------------------
         if eventType == "INTERACTION_CREATE":
-            self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] Interaction event received: {resourceObject._to_dict()}"))
+            self.log.debug(lambda: f"[EventHandler] Interaction event received: {resourceObject._to_dict()}")
             self.stateHandler.add_interaction_state(resourceObject)
             
             # Check if the user that triggered the interaction is the one that sent the command on it.
@@ -94,24 +279,29 @@ class HandlerClient(Process):
 
         #------------------------------------------------------------------------
         #  Check if the event is for a command.
+        #  The router rejects anything without the command prefix on the first
+        #  character and parses command messages once into a CommandView.
+        #  Deleted messages (from the message cache) are never commands.
         #------------------------------------------------------------------------
-        elif isinstance(resourceObject, Message) and (len(resourceObject.content) > 0 and resourceObject.content[0] == "!"):
-            self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] Command event received: {resourceObject.content}"))
+        elif eventType in COMMAND_TYPES and isinstance(resourceObject, Message) and self.commandRouter.isCommand(resourceObject.content):
+            self.log.debug(lambda: f"[EventHandler] Command event received: {resourceObject.content}")
+
+            action, commandView = self.commandRouter.route(resourceObject.content)
 
-            if resourceObject.content.split()[0][1:] in self.botTriggeredActions.triggerableActions['commands']:
+            if action is not None:
                 #----- Update the state -------
                 newState = self.stateHandler.create_state(resourceObject)
                 if not newState:
-                    self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="ERROR", message=f"[EventHandler] State already exists for user ID: {resourceObject.author.id}"))
+                    self.log.error(f"[EventHandler] State already exists for user ID: {resourceObject.author.id}")
 
-                self.botTriggeredActions.triggerableActions['commands'][resourceObject.content.split()[0][1:]].execute(resourceObject)
+                action.execute(resourceObject, commandView)
 
                 
         #------------------------------------------------------------------------
         #  If the event is not for a command, then send for the listeners to handle.
         #------------------------------------------------------------------------
         else:
-            self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] Listener event received: {eventType}"))
+            self.log.debug(lambda: f"[EventHandler] Listener event received: {eventType}")
             self.handle_listener_event(eventType, resourceObject)
 
         #---------------------------------------------------
@@ -134,7 +324,7 @@ class HandlerClient(Process):
         # not in the GATEWAY_EVENTS
         #---------------------------------------------------
         if eventType not in config.GATEWAY_EVENTS:
-            self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="ERROR", message=f"[EventHandler] Event type {eventType} not found in GATEWAY_EVENTS"))
+            self.log.error(f"[EventHandler] Event type {eventType} not found in GATEWAY_EVENTS")
             return
 
         #---------------------------------------------------
@@ -159,7 +349,7 @@ class HandlerClient(Process):
     #-------------------------------------------------------------------------------------------
     def process_listener_event(self, handler, eventType: str, resourceObject: BaseResourceObject) -> None:
         if handler == "None":
-            self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="DEBUG", message=f"[EventHandler] Event type {eventType} has no handler"))
+            self.log.debug(lambda: f"[EventHandler] Event type {eventType} has no handler")
 
         #-------------------------------------------
         # Check if the handler is HTTP
@@ -176,7 +366,7 @@ class HandlerClient(Process):
         #-------------------------------------------
         elif handler == "DB":
             if not config.OPTS['database']:
-                self.logQueue.put_nowait(LogEvent(component="HANDLER", action="LOG", level="ERROR", message=f"[EventHandler] Event type {eventType} has DB handler but no database configured"))
+                self.log.error(f"[EventHandler] Event type {eventType} has DB handler but no database configured")
                 return
             dbEvent = DatabaseEvent(action="DB")
             if "CREATE" in eventType or "UPDATE" in eventType:
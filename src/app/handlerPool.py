@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from src.ext.hashRing import HashRing
+
+__all__ = ['HandlerPool', 'partitionKey', 'dataKey', 'GUILD_ID_TYPES']
+
+# Events whose payload is the guild itself, their guild id is the "id".
+GUILD_ID_TYPES = frozenset(('GUILD_CREATE', 'GUILD_UPDATE', 'GUILD_DELETE'))
+
+#-------------------------------------------------------------------------------------------
+def partitionKey(event: Any) -> Optional[str]:
+    '''
+        The key an event is partitioned on: its guild_id, the id of the guild for GUILD_* events
+        without one, or its channel_id for DMs. None for events that belong to neither, like READY.
+        Raw events carry the key the gateway read from the payload.
+    '''
+    partition = getattr(event, 'partition', None)
+    if partition is not None:
+        return partition
+
+    resource = getattr(event, 'resourceObject', None)
+    if resource is None:
+        return None
+
+    key = getattr(resource, 'guild_id', None)
+    if not key and str(getattr(event, 'eventType', None) or '').startswith('GUILD_'):
+        key = getattr(resource, 'id', None)
+    key = key or getattr(resource, 'channel_id', None)
+    return str(key) if key else None
+
+#-------------------------------------------------------------------------------------------
+def dataKey(eventType: str, data: Any) -> Optional[str]:
+    '''
+        The partition key of a decoded payload "d", the same key partitionKey gives the resource built from it.
+    '''
+    if not isinstance(data, dict):
+        return None
+
+    key = data.get('guild_id')
+    if not key and eventType.startswith('GUILD_'):
+        key = data.get('id')
+    key = key or data.get('channel_id')
+    return str(key) if key else None
+
+#-----------------------------------------------------------------------------------------------------------
+class HandlerPool(object):
+    '''
+        Stands in for the handler queue on the producer side when several HandlerClients are running.
+
+        Events are routed to a handler's queue by consistent hashing of their guild_id (channel_id for DMs),
+        so all events of a guild are handled in order by the same process while different guilds are spread
+        over the pool. Events without a key go to the first handler.
+
+        The handler of each key is remembered for the maxAssigned most recently seen keys, so the ring is
+        only hashed for new keys without every DM channel ever seen staying in memory.
+
+        Attributes:
+            queues (List[BoundedQueue]): The queue of each handler, indexed by handler number.
+            ring (HashRing): Maps partition keys onto handler numbers.
+            assigned (OrderedDict[str, int]): Handler number of the recently seen keys, least recent first.
+            maxAssigned (int): Keys remembered in assigned.
+
+        Methods:
+            queueFor(event)     -> BoundedQueue: The queue of the handler that owns the event.
+            put_nowait(event)   -> None: Put the event on its handler's queue.
+    '''
+    __slots__ = ('queues', 'ring', 'assigned', 'maxAssigned')
+
+    def __init__(self, queues: List[Any], maxAssigned: int = 65536):
+        self.queues: List[Any] = list(queues)
+        self.ring: HashRing = HashRing(range(len(self.queues)))
+        self.assigned: OrderedDict = OrderedDict()
+        self.maxAssigned: int = max(1, maxAssigned)
+
+    #-------------------------------------------------------------------------------------------
+    def queueFor(self, event: Any) -> Any:
+        key = partitionKey(event)
+        if key is None:
+            return self.queues[0]
+
+        handlerNum = self.assigned.get(key)
+        if handlerNum is None:
+            handlerNum = self.assigned[key] = self.ring.lookup(key)
+            if len(self.assigned) > self.maxAssigned:
+                self.assigned.popitem(last=False)
+        else:
+            self.assigned.move_to_end(key)
+        return self.queues[handlerNum]
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, event: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        self.queueFor(event).put(event, block, timeout)
+
+    def put_nowait(self, event: Any) -> None:
+        self.queueFor(event).put_nowait(event)
@@ -2,16 +2,18 @@ import asyncio
 import http
 import config
 import json
-import queue
-import time
 from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPClientError
 
 from multiprocessing import Process, JoinableQueue
-from src.models.procs.event import HttpEvent, HttpResponseEvent, ProcessEvent, LogEvent
+from src.app.queueConsumer import QueueConsumer
+from src.ext.rateLimiter import RateLimiter
+from src.ext.httpPool import HttpPoolStats, createHttpClient
+from src.models.procs.event import HttpEvent, HttpResponseEvent, ProcessEvent
+from src.ext.procLogger import ProcLogger
 
 __all__ = ['HttpClient', 'RequestClient']
 
-class HttpClient(Process):
+class HttpClient(Process, QueueConsumer):
     '''
         HttpClient is a Process that handles HTTP requests for the bot.
         It listens for HTTPEvent objects on the httpQueue and processes them asynchronously.
@@ -56,17 +58,16 @@ class HttpClient(Process):
             #---------------------------------------------------
             # Get a HTTPEvent object off of the httpQueue
             #---------------------------------------------------
-            try:
-                evnt = self.httpQueue.get_nowait()
-                self.httpQueue.task_done()
+            evnt = self.waitForEvent(self.httpQueue, sentinels=[requestProc.sentinel])
 
-            except queue.Empty:
+            if evnt is None:
                 procCheck = self.checkRequestProcess(requestProc)
                 if procCheck is not None:
                     requestProc = procCheck
-                time.sleep(0.01)
                 continue
 
+            self.httpQueue.task_done()
+
             #---------------------------------------------------
             # Check if the event is a stop event
             #---------------------------------------------------
@@ -122,37 +123,70 @@ class RequestClient():
 
         Its sole purpose is to recieve HTTPRequest object from the requestQueue and send them asynchronously to the server.
 
-
         Purely a means of sending HTTP requests asynchronously while making use of multiprocessing and asyncio.
         It will not handle any events or responses, just send the requests and log any errors that occur.
+
+        Requests are dispatched as their own tasks so several can be in flight at once, up to httpMaxInFlight.
+        Once the limit is reached no more requests are pulled off the requestQueue until one finishes.
+        The requestQueue is read through a blocking get() run in the default executor, so waiting for the
+        next request does not block the event loop or the requests that are in flight.
+
+        Every request waits on its rate limit bucket (see RateLimiter) before it is sent, so requests
+        are held back before they would hit a 429 and an exhausted bucket only stalls its own route.
+
+        All requests go through a single HTTP client created when the event loop starts (see createHttpClient),
+        which pools connections to discord.com. Pool statistics are logged every httpStatsInterval seconds.
     '''
-    __slots__ = ('requestQueue', 'logQueue', 'httpResponseQueue')
+    __slots__ = ('requestQueue', 'logQueue', 'log', 'httpResponseQueue', 'maxInFlight', 'rateLimiter', 'httpClient', 'poolStats')
 
     def __init__(self, requestQueue, responseQueue, logQueue):
         self.requestQueue: JoinableQueue = requestQueue
         self.httpResponseQueue: JoinableQueue = responseQueue
         self.logQueue: JoinableQueue = logQueue
+        self.log: ProcLogger = ProcLogger("HTTP", logQueue)
+        self.maxInFlight: int = config.OPTS['httpMaxInFlight']
+        self.rateLimiter: RateLimiter = RateLimiter()
+        self.httpClient: AsyncHTTPClient = None
+        self.poolStats: HttpPoolStats = HttpPoolStats(config.OPTS['httpBackend'])
 
     #-------------------------------------------------------------------------------------------
     def asyncRunner(self):
         asyncio.run(self.asyncRequest(self.requestQueue, self.httpResponseQueue))
 
+    #-------------------------------------------------------------------------------------------
+    def getRequest(self):
+        '''
+            Blocking get of the next request, run inside the executor.
+        '''
+        reqObj = self.requestQueue.get()
+        self.requestQueue.task_done()
+        return reqObj
+
+    #-------------------------------------------------------------------------------------------
+    async def nextRequest(self):
+        '''
+            Wait for the next request without blocking the event loop.
+        '''
+        return await asyncio.get_running_loop().run_in_executor(None, self.getRequest)
+
     #-------------------------------------------------------------------------------------------
     async def asyncRequest(self, requestQueue, httpResponseQueue):
         '''
-            request -> HTTPRequest object that will be sent to the server.
+            Dispatcher loop, pulls requests off of the requestQueue and schedules each one as a task.
         '''
-        while True:
-            try:
-                reqObj = self.requestQueue.get_nowait()
-                print(type(reqObj))
+        inFlight = asyncio.Semaphore(self.maxInFlight)
+        tasks = set()
 
-                self.requestQueue.task_done()
-                self.logQueue.put_nowait(LogEvent(component="HTTP", action="LOG", level="DEBUG", message=f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}"))
+        self.httpClient = createHttpClient(self.poolStats)
+        statsTask = asyncio.create_task(self.logPoolStats())
+        flushTask = asyncio.create_task(self.log.autoFlush())
 
-            except queue.Empty:
-                time.sleep(0.01)
-                continue
+        while True:
+            #---------------------------------------------------
+            # Wait for a free slot before taking another request
+            #---------------------------------------------------
+            await inFlight.acquire()
+            reqObj = await self.nextRequest()
 
             #---------------------------------------------------
             # If the request object is None, then we are done.
@@ -160,31 +194,84 @@ class RequestClient():
             # should stop processing requests.
             #---------------------------------------------------
             if reqObj is None:
-                return
+                inFlight.release()
+                break
 
-            #---------------------------------------------------
-            # Send the request to the server
-            # Retry up to 5 times if a 429 error is returned
-            # which means the rate limit has been exceeded.
-            #---------------------------------------------------
-            counter = 0
+            task = asyncio.create_task(self.sendRequest(reqObj, inFlight))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        #-------------------------------------------------------
+        # Let the requests that are in flight finish
+        #-------------------------------------------------------
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        statsTask.cancel()
+        flushTask.cancel()
+        await asyncio.gather(statsTask, flushTask, return_exceptions=True)
+        self.httpClient.close()
+
+    #-------------------------------------------------------------------------------------------
+    async def logPoolStats(self) -> None:
+        '''
+            Periodically log the connection pool statistics.
+        '''
+        while True:
+            await asyncio.sleep(config.OPTS['httpStatsInterval'])
+            self.log.info(f"[RequestClient] Pool stats: {self.poolStats}")
 
+    #-------------------------------------------------------------------------------------------
+    async def sendRequest(self, reqObj, inFlight: asyncio.Semaphore) -> None:
+        '''
+            reqObj -> HttpEvent holding the HTTPRequest object that will be sent to the server.
+            inFlight -> Semaphore slot held by this request, released once it is done.
+        '''
+        self.log.debug(lambda: f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}")
+
+        #---------------------------------------------------
+        # Send the request to the server
+        # Retry up to 5 times if a 429 error is returned
+        # which means the rate limit has been exceeded.
+        #---------------------------------------------------
+        counter = 0
+        method = reqObj.data.method
+        url = reqObj.data.url
+
+        try:
             while counter < 5:
+                #-----------------------------------------------
+                # Wait for the global limit and a free slot in
+                # the route's bucket before sending.
+                #-----------------------------------------------
+                bucket = self.rateLimiter.getBucket(method, url)
+                await self.rateLimiter.acquire(bucket)
+
                 try:
-                    response = await AsyncHTTPClient().fetch(reqObj.data)
-                    self.logQueue.put_nowait(LogEvent(component="HTTP", action="LOG", level="INFO", message=f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}  response-->{response.body.decode('utf-8')}  response code --> {response.code}"))
+                    response = await self.httpClient.fetch(reqObj.data)
+                    self.poolStats.record(response)
+                    self.rateLimiter.update(method, url, bucket, response.headers)
+                    self.log.info(lambda: f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}  response-->{response.body.decode('utf-8')}  response code --> {response.code}")
 
                 except HTTPClientError as e:
+                    if e.response is not None:
+                        self.poolStats.record(e.response)
+                        self.rateLimiter.update(method, url, bucket, e.response.headers)
+
                     #------------------------------------------------
                     #   Check if the error is a rate limit error
-                    #   If it is, wait a bit and try again.
+                    #   If it is, mark the bucket (or the global
+                    #   limit) as exhausted and try again, the
+                    #   retry waits in acquire() until the reset.
                     #------------------------------------------------
                     if e.code == 429:
                         counter += 1
-                        time.sleep(0.3)
+                        headers = e.response.headers if e.response is not None else dict()
+                        retryAfter = self.rateLimiter.rateLimited(bucket, headers)
+                        self.log.warning(f"[RequestClient] Rate limited on {bucket.key}, retrying in {retryAfter}s")
                         continue
                     else:
-                        self.logQueue.put_nowait(LogEvent(component="HTTP", action="LOG", level="ERROR", message=f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}   body ---> {reqObj.data.body}   message-->{e.message}"))
+                        self.log.error(f"[RequestClient] HTTP: method --> {reqObj.data.method}   url --->  {reqObj.data.url}   body ---> {reqObj.data.body}   message-->{e.message}")
                         if reqObj.response:
                             errorObj = {'error': e.message, 'code': e.code, 'url': reqObj.data.url}
                             self.httpResponseQueue.put_nowait(HttpResponseEvent(id=reqObj.id, data=errorObj))
@@ -194,4 +281,7 @@ class RequestClient():
                     if reqObj.response:
                         responseEvent = HttpResponseEvent(id=reqObj.id, data=response)
                         self.httpResponseQueue.put_nowait(responseEvent)
-                    break
\ No newline at end of file
+                    break
+
+        finally:
+            inFlight.release()
@@ -1,8 +1,11 @@
+import time
+import queue
 import logging
 import logging.handlers
 import config
 from multiprocessing import Process, JoinableQueue
-from src.models.procs.event import ProcessEvent
+from src.models.procs.event import ProcessEvent, LogBatch
+from src.app.queueConsumer import QueueConsumer
 
 #config._prepare_config()
 LOGGING_LEVELS = {
@@ -13,18 +16,44 @@ LOGGING_LEVELS = {
     "CRITICAL": logging.CRITICAL
 }
 
-class LoggerClient(Process):
+# Most events taken off of the queue in one drain.
+DRAIN_MAX = 256
+
+#-----------------------------------------------------------------------------------------------------------
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    '''
+        RotatingFileHandler that leaves the lines in the file buffer instead of flushing after every record.
+        The LoggerClient calls sync() periodically and when it stops, ERROR and above are synced right away.
+    '''
+    def flush(self):
+        pass
+
+    def sync(self):
+        super().flush()
+
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.ERROR:
+            self.sync()
+
+#-----------------------------------------------------------------------------------------------------------
+class LoggerClient(Process, QueueConsumer):
     '''
         LoggerClient is a Process that writes logs to a file.
 
+        Events arrive as single LogEvents or as LogBatches from the ProcLoggers. The logger drains up to
+        DRAIN_MAX events per wake up and writes them through buffered handlers, which are flushed every
+        logFlushInterval seconds and when the logger stops or crashes.
+
         Attributes:
             killLoggerClient (bool): Flag to indicate if the logger client should stop.
-            logQueue (JoinableQueue): Accepts LogEvent objects to write to the log file.
+            logQueue (JoinableQueue): Accepts LogEvent and LogBatch objects to write to the log file.
             botQueue (JoinableQueue): Queue for communication with the main bot process.
             logger (logging.Logger): Logger instance that writes to a file.
+            handlers (list): The BufferedRotatingFileHandlers of the loggers.
     '''
     
-    __slots__ = ('killLoggerClient', 'logQueue', 'botQueue', 'logger')
+    __slots__ = ('killLoggerClient', 'logQueue', 'botQueue', 'logger', 'handlers')
 
     def __init__(self, name, botQueue, logQueue):
         super().__init__(name=name)
@@ -40,6 +69,7 @@ class LoggerClient(Process):
             "COMMANDS": None,
             "HANDLER": None
         }
+        self.handlers = list()
 
     #-------------------------------------------------------------------------------------------
     def run(self):
@@ -48,21 +78,62 @@ class LoggerClient(Process):
             It listens for LogEvent objects on the logQueue and writes them to the log file.
         '''
         self.create_logger()
+        flushInterval = config.OPTS['logFlushInterval']
+        lastFlush = time.monotonic()
 
-        while True:
-            log = self.logQueue.get()
+        try:
+            while not self.killLoggerClient:
+                for log in self.drain():
+                    if log.action == "STOP":
+                        self.killLoggerClient = True
+                    else:
+                        self.writeEvent(log)
 
-            self.logQueue.task_done()
+                if time.monotonic() - lastFlush >= flushInterval:
+                    self.syncHandlers()
+                    lastFlush = time.monotonic()
+        finally:
+            self.syncHandlers()
+
+        procEvent = ProcessEvent("LOGGER", "STOPPED")
+        self.botQueue.put_nowait(procEvent)
 
-            if log.action == "STOP":
-                self.killLoggerClient = True
+    #-------------------------------------------------------------------------------------------
+    def drain(self) -> list:
+        '''
+            Block until an event arrives, or the flush interval passes, then take whatever else is
+            already waiting on the queue up to DRAIN_MAX events.
+        '''
+        log = self.waitForEvent(self.logQueue, timeout=config.OPTS['logFlushInterval'])
+        if log is None:
+            return []
+        self.logQueue.task_done()
+
+        logs = [log]
+        while len(logs) < DRAIN_MAX:
+            try:
+                logs.append(self.logQueue.get_nowait())
+            except queue.Empty:
                 break
+            self.logQueue.task_done()
 
-            if log.action == "LOG":
-                self.writeLog(log)
+        return logs
 
-        procEvent = ProcessEvent("LOGGER", "STOPPED")
-        self.botQueue.put_nowait(procEvent)
+    #-------------------------------------------------------------------------------------------
+    def writeEvent(self, log) -> None:
+        '''
+            Write a LogEvent or every LogEvent of a LogBatch.
+        '''
+        if log.action == "LOG_BATCH":
+            for batchLog in log.events:
+                self.writeLog(batchLog)
+        elif log.action == "LOG":
+            self.writeLog(log)
+
+    #-------------------------------------------------------------------------------------------
+    def syncHandlers(self) -> None:
+        for handler in self.handlers:
+            handler.sync()
 
     #-------------------------------------------------------------------------------------------
     def create_logger(self):
@@ -73,13 +144,14 @@ class LoggerClient(Process):
         for key in loggerKeys:
             self.logger[key] = logging.getLogger(f'squirrel_bo_{key}')
             self.logger[key].setLevel(LOGGING_LEVELS[config.OPTS['logLevel']])
-            handler = logging.handlers.RotatingFileHandler(filename=config.OPTS['logFile'][key],
+            handler = BufferedRotatingFileHandler(filename=config.OPTS['logFile'][key],
                                                             encoding='utf-8',
                                                             mode='a',
                                                             maxBytes=config.OPTS['logMaxBytes'], 
                                                             backupCount=2)
             handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s'))
             self.logger[key].addHandler(handler)
+            self.handlers.append(handler)
 
     #-------------------------------------------------------------------------------------------
     def writeLog(self, log):
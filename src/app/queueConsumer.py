@@ -0,0 +1,64 @@
+import queue
+
+from multiprocessing.connection import wait
+from typing import Any, Iterable, Optional
+
+__all__ = ['QueueConsumer', 'WAIT_TIMEOUT']
+
+# Longest time a consumer blocks before returning control to its process loop.
+WAIT_TIMEOUT = 0.5
+
+class QueueConsumer(object):
+    '''
+        Mixin for the client processes that consume events from a queue.
+
+        Replaces polling with get_nowait() and sleeping between attempts. The process blocks until an
+        event is put on the queue, so an idle process uses no CPU and an event is picked up as soon as
+        it arrives instead of after the next sleep.
+
+        Processes that also supervise child processes pass the children's sentinels, the wait then
+        returns as soon as either an event arrives or a child exits, so health checks run right away
+        without having to poll for them.
+
+        Methods:
+            waitForEvent(eventQueue, timeout, sentinels) -> Any: Returns the next event, or None if the wait ended without one.
+    '''
+    __slots__ = ()
+
+    #-------------------------------------------------------------------------------------------
+    def waitForEvent(self, eventQueue, timeout: float = WAIT_TIMEOUT, sentinels: Iterable = ()) -> Optional[Any]:
+        '''
+            Block until an event is available on the queue, a sentinel becomes ready or the timeout expires.
+
+            eventQueue -> The queue to consume from.
+            timeout -> Maximum number of seconds to block.
+            sentinels -> Process sentinels (or other waitable objects) that should also end the wait.
+
+            Returns the event, or None if there was no event to return.
+        '''
+        sentinels = list(sentinels)
+        reader = getattr(eventQueue, '_reader', None)
+
+        #----------------------------------------
+        #   Plain blocking get when there is
+        #   nothing else to wait on, or when a
+        #   BoundedQueue has spilled events that
+        #   won't show up on its pipe.
+        #----------------------------------------
+        if not sentinels or reader is None or getattr(eventQueue, 'spilled', 0):
+            try:
+                return eventQueue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        #----------------------------------------
+        #   Wait on the queue's pipe and the
+        #   sentinels together.
+        #----------------------------------------
+        if reader not in wait([reader] + sentinels, timeout):
+            return None
+
+        try:
+            return eventQueue.get_nowait()
+        except queue.Empty:
+            return None
@@ -0,0 +1,257 @@
+import os
+import time
+import queue
+import pickle
+import struct
+import multiprocessing
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+__all__ = ['ShmRingQueue']
+
+#-----------------------------------------------------------------------------------------------------------
+# Layout of the shared memory block. The counters are 8 byte words, the producer's and the consumer's
+# live on separate cache lines. The frames start at DATA_OFFSET.
+#-----------------------------------------------------------------------------------------------------------
+HEAD, PUT_COUNT = 0, 1          # Written by the producer.
+TAIL, GET_COUNT = 8, 9          # Written by the consumer.
+SLEEPING = 16                   # Set by the consumer before it waits for a wakeup.
+PRODUCER = 17                   # Pid of the process that owns the producer side.
+BLOCKED = 18                    # Number of puts that waited for room.
+HEADER_WORDS = 24
+DATA_OFFSET = HEADER_WORDS * 8
+
+FRAME_HEADER = struct.Struct('=I')
+WRAP = 0xFFFFFFFF
+
+# Longest time a consumer sleeps before checking the ring again. Only matters when a wakeup is missed,
+# which can happen because the flag and the counters are plain shared memory without atomics.
+WAKE_TIMEOUT = 0.05
+# Sleep between checks when the producer is waiting for room.
+FULL_BACKOFF = 0.0005
+
+class ShmRingQueue(object):
+    '''
+        Single producer, single consumer queue over a ring of length prefixed frames in shared memory.
+
+        Events are pickled straight into the ring by the producer and unpickled by the consumer, with no
+        pipe or feeder thread in between. The consumer sleeps on a semaphore that the producer only
+        releases when the consumer has flagged that it is waiting.
+
+        It has the put/get interface of the JoinableQueues it replaces. The first child process that puts
+        becomes the producer (again if it dies and another one puts). Every other process, like the BotClient
+        that created the ring sending STOP, goes through a small control queue that the consumer reads once
+        the ring is empty.
+        When the ring is full, put() and put_nowait() wait for room like the BoundedQueue block policy.
+        Frames larger than the ring also go through the control queue.
+
+        Attributes:
+            name (str): Name of the queue.
+            capacity (int): Size of the ring in bytes.
+            shm (SharedMemory): The ring.
+            wakeup (Semaphore): Released by the producer when the consumer sleeps.
+            control (JoinableQueue): Events from processes other than the producer.
+            claimLock (Lock): Serializes claiming the producer side.
+            owner (int): Pid of the process that created the ring.
+            ownerProduces (bool): Whether the creating process may claim the producer side.
+    '''
+    __slots__ = ('name', 'capacity', 'shm', 'wakeup', 'control', 'claimLock', 'owner', 'ownerProduces', 'index', 'data', 'isProducer')
+
+    def __init__(self, name: str, capacity: int = 8 * 1024 * 1024, ownerProduces: bool = False, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.name: str = name
+        self.capacity: int = capacity
+        self.shm = shared_memory.SharedMemory(create=True, size=DATA_OFFSET + capacity)
+        self.wakeup = ctx.Semaphore(0)
+        self.control = ctx.JoinableQueue()
+        self.claimLock = ctx.Lock()
+        self.owner: int = os.getpid()
+        self.ownerProduces: bool = ownerProduces
+        self.attach()
+
+    #-------------------------------------------------------------------------------------------
+    def attach(self) -> None:
+        self.index = self.shm.buf[:DATA_OFFSET].cast('Q')
+        self.data = self.shm.buf[DATA_OFFSET:DATA_OFFSET + self.capacity]
+        self.isProducer: Optional[bool] = None
+
+    def __getstate__(self):
+        return (self.name, self.capacity, self.shm, self.wakeup, self.control, self.claimLock, self.owner, self.ownerProduces)
+
+    def __setstate__(self, state):
+        self.name, self.capacity, self.shm, self.wakeup, self.control, self.claimLock, self.owner, self.ownerProduces = state
+        self.attach()
+
+    #-------------------------------------------------------------------------------------------
+    def claimProducer(self) -> bool:
+        '''
+            Whether this process is the producer, claiming the producer side if nobody holds it.
+            The answer is cached, a process that isn't the producer never becomes it.
+        '''
+        if self.isProducer is None:
+            pid = os.getpid()
+            if pid == self.owner and not self.ownerProduces:
+                self.isProducer = False
+                return False
+            with self.claimLock:
+                producer = self.index[PRODUCER]
+                if producer and producer != pid:
+                    try:
+                        os.kill(producer, 0)
+                    except OSError:
+                        producer = 0
+                if not producer:
+                    self.index[PRODUCER] = producer = pid
+            self.isProducer = producer == pid
+        return self.isProducer
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, obj: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        frame = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if not self.claimProducer() or FRAME_HEADER.size + len(frame) > self.capacity // 2:
+            self.control.put(obj)
+            self.wakeup.release()
+            return
+
+        index = self.index
+        size = FRAME_HEADER.size + len(frame)
+
+        #----------------------------------------
+        #   Frames never wrap, when a frame does
+        #   not fit before the end of the ring it
+        #   starts over at the beginning.
+        #----------------------------------------
+        head = index[HEAD]
+        position = head % self.capacity
+        skip = self.capacity - position if self.capacity - position < size else 0
+
+        if self.capacity - (head - index[TAIL]) < skip + size:
+            index[BLOCKED] += 1
+            while self.capacity - (head - index[TAIL]) < skip + size:
+                time.sleep(FULL_BACKOFF)
+
+        if skip:
+            if skip >= FRAME_HEADER.size:
+                FRAME_HEADER.pack_into(self.data, position, WRAP)
+            position = 0
+
+        FRAME_HEADER.pack_into(self.data, position, len(frame))
+        self.data[position + FRAME_HEADER.size:position + size] = frame
+
+        index[HEAD] = head + skip + size
+        index[PUT_COUNT] += 1
+
+        if index[SLEEPING]:
+            index[SLEEPING] = 0
+            self.wakeup.release()
+
+    def put_nowait(self, obj: Any) -> None:
+        self.put(obj, False)
+
+    #-------------------------------------------------------------------------------------------
+    def readFrame(self) -> Optional[tuple]:
+        '''
+            Take the next frame off of the ring. Returns a 1-tuple so a None event can be told apart from no event.
+        '''
+        index = self.index
+        tail = index[TAIL]
+        if tail == index[HEAD]:
+            return None
+
+        position = tail % self.capacity
+        if self.capacity - position < FRAME_HEADER.size:
+            tail += self.capacity - position
+            position = 0
+        else:
+            (length,) = FRAME_HEADER.unpack_from(self.data, position)
+            if length == WRAP:
+                tail += self.capacity - position
+                position = 0
+
+        (length,) = FRAME_HEADER.unpack_from(self.data, position)
+        start = position + FRAME_HEADER.size
+        obj = pickle.loads(self.data[start:start + length])
+
+        index[TAIL] = tail + FRAME_HEADER.size + length
+        index[GET_COUNT] += 1
+        return (obj,)
+
+    #-------------------------------------------------------------------------------------------
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            frame = self.readFrame()
+            if frame is not None:
+                return frame[0]
+
+            try:
+                obj = self.control.get_nowait()
+                self.control.task_done()
+                return obj
+            except queue.Empty:
+                pass
+
+            remaining = WAKE_TIMEOUT if deadline is None else deadline - time.monotonic()
+            if not block or remaining <= 0:
+                raise queue.Empty
+
+            #----------------------------------------
+            #   Flag that we are going to sleep, then
+            #   check again so a frame written before
+            #   the flag was seen is not missed.
+            #----------------------------------------
+            self.index[SLEEPING] = 1
+            if self.index[TAIL] == self.index[HEAD]:
+                self.wakeup.acquire(timeout=min(remaining, WAKE_TIMEOUT))
+            self.index[SLEEPING] = 0
+
+    def get_nowait(self) -> Any:
+        return self.get(False)
+
+    #-------------------------------------------------------------------------------------------
+    def task_done(self) -> None:
+        '''
+            Events are done when they are taken off of the ring, kept for the JoinableQueue interface.
+        '''
+
+    def join(self) -> None:
+        '''
+            Block until the consumer has taken everything off of the ring and the control queue.
+        '''
+        while self.index[TAIL] != self.index[HEAD]:
+            time.sleep(FULL_BACKOFF)
+        self.control.join()
+
+    #-------------------------------------------------------------------------------------------
+    def qsize(self) -> int:
+        return self.index[PUT_COUNT] - self.index[GET_COUNT] + self.control.qsize()
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'policy': 'shm',
+            'capacity': self.capacity,
+            'depth': self.qsize(),
+            'shed': 0,
+            'spilled': 0,
+            'blocked': self.index[BLOCKED]
+        }
+
+    #-------------------------------------------------------------------------------------------
+    def close(self) -> None:
+        '''
+            Release the shared memory, the process that created the ring also removes it.
+        '''
+        self.control.close()
+        self.index.release()
+        self.data.release()
+        self.shm.close()
+        if os.getpid() == self.owner:
+            self.shm.unlink()
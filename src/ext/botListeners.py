@@ -3,6 +3,7 @@ from yaml import Loader
 
 from typing import List, Generator
 from src.models.bot.listener import ListenerObject
+from src.ext.keywordMatcher import KeywordMatcher
 from src.endpoints.message import ChannelMessage
 from src.obj_types.proc_event import HttpEvent
 
@@ -28,14 +29,21 @@ class BotListeners(object):
         filters fields should match the fields in an event object that you wish to match against based on the condition specified.
         actions define how to react to the event should the filter match up.
         the data section of an action should be capable of being serialized into an HTTP API Event object.
+
+        contains and contains_any filters on the content field take a keyword or a list of keywords, the filter
+        passes if any of them is found. The keywords of every listener for an event type are compiled into a single
+        KeywordMatcher so the content is scanned once per event no matter how many listeners there are.
     '''
 
-    __slots__ = ('listeners', 'chanMessage')
+    __slots__ = ('listeners', 'chanMessage', 'index', 'matchers')
 
     def __init__(self):
         self.listeners = list()
         self.chanMessage = ChannelMessage()
+        self.index = dict()
+        self.matchers = dict()
         self.loadListeners()
+        self.buildIndex()
 
     #-------------------------------------------------------------------------------------------
     def loadListeners(self):
@@ -49,14 +57,84 @@ class BotListeners(object):
             for x in yamlListeners:
                 self.listeners.append(ListenerObject(self.chanMessage, **x))
 
+    #-------------------------------------------------------------------------------------------
+    def buildIndex(self):
+        '''
+            Index the listeners by gateway event type so an event is only checked against the
+            listeners that can match it.
+
+            Listeners with an equals filter on a top level channel_id or guild_id are further
+            indexed by that value, the rest go in the wildcard list for their event type.
+
+            Index Layout:
+                { eventType, {'wildcard': List[(position, ListenerObject)],
+                              'channel_id': { value, List[(position, ListenerObject)] },
+                              'guild_id': { value, List[(position, ListenerObject)] }} }
+        '''
+        self.index = dict()
+        self.matchers = dict()
+
+        for position, listener in enumerate(self.listeners):
+            #----------------------------------------
+            #   Compile the content keywords into
+            #   the event type's matcher.
+            #----------------------------------------
+            for filterIndex, keywords in listener.keywordFilters():
+                tag = (position, filterIndex)
+                listener.keywordTags[filterIndex] = tag
+                matcher = self.matchers.setdefault(listener.type, KeywordMatcher())
+                for keyword in keywords:
+                    matcher.add(keyword, tag)
+            listener.compileFilters()
+
+            typeIndex = self.index.setdefault(listener.type, {'wildcard': list(), 'channel_id': dict(), 'guild_id': dict()})
+            field, value = listener.indexKey()
+
+            if field is None:
+                typeIndex['wildcard'].append((position, listener))
+            else:
+                typeIndex[field].setdefault(value, list()).append((position, listener))
+
+    #-------------------------------------------------------------------------------------------
+    def candidates(self, eventType: str, resource) -> List[ListenerObject]:
+        '''
+            Return the listeners that could match the event, in the order they were loaded.
+        '''
+        typeIndex = self.index.get(eventType)
+        if typeIndex is None:
+            return list()
+
+        matches = typeIndex['wildcard']
+
+        for field in ('channel_id', 'guild_id'):
+            if typeIndex[field]:
+                value = getattr(resource, field, None)
+                if value is not None and str(value) in typeIndex[field]:
+                    matches = matches + typeIndex[field][str(value)]
+
+        if len(matches) != len(typeIndex['wildcard']):
+            matches = sorted(matches, key=lambda x: x[0])
+
+        return [listener for _, listener in matches]
+
     #-------------------------------------------------------------------------------------------
     def checkListeners(self, event: HttpEvent) -> Generator[ListenerObject, None, None]:
         '''
-            Check the event against the listeners.
+            Check the event against the listeners indexed for its event type.
         '''
+        candidates = self.candidates(event.name, event.data)
+        matched = None
+
+        #----------------------------------------
+        #   Scan the content once for every
+        #   listener's keywords.
+        #----------------------------------------
+        if candidates and event.name in self.matchers:
+            matched = self.matchers[event.name].search(getattr(event.data, 'content', None) or "")
+
         # x is a ListenerObject
-        for x in self.listeners:
-            if x.check(event):
+        for x in candidates:
+            if x.check(event, matched):
                 # can send the event to the listener action here and have it create the request object
                 for action in x.actions:
-                    yield action.createRequest(event.data)
\ No newline at end of file
+                    yield action.createRequest(event.data)
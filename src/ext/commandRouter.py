@@ -0,0 +1,142 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+__all__ = ['CommandRouter', 'CommandNode', 'CommandView']
+
+#-----------------------------------------------------------------------------------------------------------
+class CommandView(object):
+    '''
+        Tokenized view of a command message, built once per message and handed to the command.
+
+        content -> The full message content.
+        tokens -> The content after the prefix split on whitespace.
+        path -> The tokens that selected the command, e.g. ['links', 'add'].
+        args -> The remaining tokens after the command path.
+    '''
+    __slots__ = ('content', 'tokens', 'path', 'args')
+
+    def __init__(self, content: str, tokens: List[str], depth: int):
+        self.content: str = content
+        self.tokens: List[str] = tokens
+        self.path: List[str] = tokens[:depth]
+        self.args: List[str] = tokens[depth:]
+
+    #-------------------------------------------------------------------------------------------
+    @property
+    def name(self) -> str:
+        return self.path[0] if self.path else ""
+
+    #-------------------------------------------------------------------------------------------
+    def rest(self) -> str:
+        '''
+            The arguments as a single string.
+        '''
+        return " ".join(self.args)
+
+#-----------------------------------------------------------------------------------------------------------
+class CommandNode(object):
+    '''
+        Node of the command trie. Each token of a command (name, then subcommands) is one level.
+    '''
+    __slots__ = ('children', 'action')
+
+    def __init__(self):
+        self.children: Dict[str, CommandNode] = dict()
+        self.action: Any = None
+
+#-----------------------------------------------------------------------------------------------------------
+class CommandRouter(object):
+    '''
+        Precompiled command router for MESSAGE_CREATE events.
+
+        Messages that don't start with the command prefix are rejected by comparing their first
+        character against the prefix's first character, the full prefix is only checked after that.
+        Command messages are split once into a CommandView and walked through a trie of command
+        names, aliases and subcommands. The deepest node with an action wins, so `!links add x`
+        runs the `add` subcommand of `links` if there is one, otherwise `links` itself.
+
+        Attributes:
+            prefix (str): The command prefix, from config.OPTS['commandPrefix'].
+            root (CommandNode): The root of the command trie.
+
+        Methods:
+            register(name, action, aliases, subcommands) -> None: Add a command to the trie.
+            registerActions(actions)                     -> None: Add every action from a {name: action} mapping.
+            route(content)                               -> Optional[Tuple[Any, CommandView]]: Resolve a message.
+    '''
+    __slots__ = ('prefix', 'prefixChar', 'prefixLength', 'root')
+
+    def __init__(self, prefix: str = "!"):
+        self.prefix: str = prefix
+        self.prefixChar: str = prefix[:1]
+        self.prefixLength: int = len(prefix)
+        self.root: CommandNode = CommandNode()
+
+    #-------------------------------------------------------------------------------------------
+    def register(self, name: str, action: Any, aliases: Iterable[str] = (), subcommands: Optional[Dict[str, Any]] = None, parent: Optional[CommandNode] = None) -> None:
+        '''
+            Add a command under every one of its names.
+
+            subcommands -> { name, action } of the command's subcommands. Subcommand actions may
+                           have their own aliases and subcommands attributes.
+        '''
+        parent = parent if parent is not None else self.root
+        node = parent.children.get(name)
+        if node is None:
+            node = CommandNode()
+        node.action = action
+
+        for commandName in [name, *aliases]:
+            parent.children[commandName] = node
+
+        for subName, subAction in (subcommands or dict()).items():
+            self.register(subName,
+                          subAction,
+                          getattr(subAction, 'aliases', None) or (),
+                          getattr(subAction, 'subcommands', None),
+                          parent=node)
+
+    #-------------------------------------------------------------------------------------------
+    def registerActions(self, actions: Dict[str, Any]) -> None:
+        '''
+            Register the commands from BotTriggeredActions.triggerableActions['commands'].
+            Aliases and subcommands are read from the action's aliases and subcommands attributes.
+        '''
+        for name, action in actions.items():
+            self.register(name,
+                          action,
+                          getattr(action, 'aliases', None) or (),
+                          getattr(action, 'subcommands', None))
+
+    #-------------------------------------------------------------------------------------------
+    def isCommand(self, content: str) -> bool:
+        if content[:1] != self.prefixChar:
+            return False
+        return self.prefixLength == 1 or content.startswith(self.prefix)
+
+    #-------------------------------------------------------------------------------------------
+    def route(self, content: str) -> Optional[Tuple[Any, CommandView]]:
+        '''
+            Resolve a message to its command.
+
+            Returns None if the message is not a command, otherwise (action, view). action is None
+            when the message starts with the prefix but does not name a known command.
+        '''
+        if content[:1] != self.prefixChar:
+            return None
+        if self.prefixLength > 1 and not content.startswith(self.prefix):
+            return None
+
+        tokens = content[self.prefixLength:].split()
+        node = self.root
+        action = None
+        depth = 0
+
+        for position, token in enumerate(tokens):
+            node = node.children.get(token)
+            if node is None:
+                break
+            if node.action is not None:
+                action = node.action
+                depth = position + 1
+
+        return action, CommandView(content, tokens, depth)
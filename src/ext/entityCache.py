@@ -0,0 +1,330 @@
+import copy
+import config
+
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Set
+
+from src.ext.memberStore import MemberStore, MemberView
+
+__all__ = ['EntityCache', 'EntityStore', 'getCache', 'CACHE_DEFAULTS']
+
+#-----------------------------------------------------------------------------------------------------------
+# Defaults for config.OPTS['entityCache'], a store missing from the config uses these.
+#-----------------------------------------------------------------------------------------------------------
+CACHE_DEFAULTS = {
+    'guilds': {'enabled': True, 'maxEntries': 10000},
+    'channels': {'enabled': True, 'maxEntries': 250000},
+    'roles': {'enabled': True, 'maxEntries': 250000},
+    'members': {'enabled': True, 'maxEntries': 1000000}
+}
+
+# The event types that feed each store.
+STORE_EVENTS = {
+    'guilds': ('GUILD_CREATE', 'GUILD_UPDATE', 'GUILD_DELETE'),
+    'channels': ('GUILD_CREATE', 'GUILD_DELETE', 'CHANNEL_CREATE', 'CHANNEL_UPDATE', 'CHANNEL_DELETE',
+                 'THREAD_CREATE', 'THREAD_UPDATE', 'THREAD_DELETE'),
+    'roles': ('GUILD_CREATE', 'GUILD_UPDATE', 'GUILD_DELETE', 'GUILD_ROLE_CREATE', 'GUILD_ROLE_UPDATE', 'GUILD_ROLE_DELETE'),
+    'members': ('GUILD_CREATE', 'GUILD_DELETE', 'GUILD_MEMBER_ADD', 'GUILD_MEMBER_UPDATE', 'GUILD_MEMBER_REMOVE')
+}
+
+# Lists of GuildCreate (and the roles of Guild) that are cached in their own store, the presences are in the PresenceCache.
+GUILD_LISTS = ('channels', 'threads', 'members', 'roles', 'presences')
+
+#-----------------------------------------------------------------------------------------------------------
+class EntityStore(object):
+    '''
+        Snowflake -> entity mapping with an entry limit.
+
+        Entries are kept in insertion order and an update moves the entry to the end, so once the
+        store is full the least recently written entry is evicted to make room.
+
+        Attributes:
+            name (str): Name of the store, used in stats().
+            enabled (bool): A disabled store ignores every write.
+            maxEntries (int): Maximum number of entries, 0 for no limit.
+            entries (Dict[Hashable, Any]): The cached entities.
+            evicted (int): Number of entries evicted to make room.
+    '''
+    __slots__ = ('name', 'enabled', 'maxEntries', 'entries', 'evicted')
+
+    def __init__(self, name: str, enabled: bool = True, maxEntries: int = 0):
+        self.name: str = name
+        self.enabled: bool = enabled
+        self.maxEntries: int = maxEntries
+        self.entries: Dict[Hashable, Any] = dict()
+        self.evicted: int = 0
+
+    #-------------------------------------------------------------------------------------------
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.entries.get(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, key: Hashable, entity: Any) -> None:
+        if not self.enabled:
+            return
+
+        entries = self.entries
+        if entries.pop(key, None) is None and self.maxEntries and len(entries) >= self.maxEntries:
+            del entries[next(iter(entries))]
+            self.evicted += 1
+        entries[key] = entity
+
+    #-------------------------------------------------------------------------------------------
+    def remove(self, key: Hashable) -> Optional[Any]:
+        return self.entries.pop(key, None)
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'enabled': self.enabled,
+            'entries': len(self.entries),
+            'maxEntries': self.maxEntries,
+            'evicted': self.evicted
+        }
+
+#-----------------------------------------------------------------------------------------------------------
+class EntityCache(object):
+    '''
+        Cache of the guilds, channels, roles and members seen on the gateway.
+
+        Each handler process has its own cache, fed by update() with every event the handler receives.
+        Since the gateway routes a guild to one handler, the handler's cache holds every guild it serves.
+        Commands and listeners read it through getCache(). Lookups are a single dict access by snowflake,
+        members are a binary search in their guild's MemberStore table.
+
+        GUILD_CREATE fills every store. The guild entry keeps the guild's own fields, its channels,
+        threads, members and roles are moved to their stores and read with guildChannels(),
+        guildRoles() and getMember(), which returns a MemberView. GUILD_DELETE for an unavailable
+        guild (an outage) keeps the cache, the guild comes back with a GUILD_CREATE.
+
+        Attributes:
+            guilds (EntityStore): guild_id -> Guild.
+            channels (EntityStore): channel_id -> Channel, threads included.
+            roles (EntityStore): role_id -> Role.
+            members (MemberStore): The members of every guild, stored column by column.
+            guildChannelIds (Dict[str, Set[str]]): guild_id -> ids of the guild's channels.
+            guildRoleIds (Dict[str, Set[str]]): guild_id -> ids of the guild's roles.
+
+        Methods:
+            update(eventType, resourceObject) -> None: Apply a gateway event to the cache.
+            getGuild(guildId)                 -> Optional[Guild]
+            getChannel(channelId)             -> Optional[Channel]
+            getRole(roleId)                   -> Optional[Role]
+            getMember(guildId, userId)        -> Optional[MemberView]
+            guildChannels(guildId)            -> List[Channel]
+            guildRoles(guildId)               -> List[Role]
+            guildMembers(guildId)             -> Iterator[MemberView]
+    '''
+    __slots__ = ('guilds', 'channels', 'roles', 'members', 'guildChannelIds', 'guildRoleIds', 'eventTypes')
+
+    def __init__(self, options: Optional[Dict[str, Dict[str, Any]]] = None):
+        options = options or dict()
+        stores = dict()
+        for name, defaults in CACHE_DEFAULTS.items():
+            storeOpts = {**defaults, **(options.get(name) or dict())}
+            storeType = MemberStore if name == 'members' else EntityStore
+            stores[name] = storeType(name, bool(storeOpts['enabled']), int(storeOpts['maxEntries'] or 0))
+
+        self.guilds: EntityStore = stores['guilds']
+        self.channels: EntityStore = stores['channels']
+        self.roles: EntityStore = stores['roles']
+        self.members: MemberStore = stores['members']
+        self.guildChannelIds: Dict[str, Set[str]] = dict()
+        self.guildRoleIds: Dict[str, Set[str]] = dict()
+        self.eventTypes: frozenset = frozenset(eventType for name, events in STORE_EVENTS.items() if stores[name].enabled for eventType in events)
+
+    #-------------------------------------------------------------------------------------------
+    # Accessors
+    #-------------------------------------------------------------------------------------------
+    def getGuild(self, guildId) -> Optional[Any]:
+        return self.guilds.get(str(guildId))
+
+    def getChannel(self, channelId) -> Optional[Any]:
+        return self.channels.get(str(channelId))
+
+    def getRole(self, roleId) -> Optional[Any]:
+        return self.roles.get(str(roleId))
+
+    def getMember(self, guildId, userId) -> Optional[MemberView]:
+        return self.members.get(str(guildId), userId)
+
+    #-------------------------------------------------------------------------------------------
+    def guildChannels(self, guildId) -> List[Any]:
+        return list(self._resolve(self.channels, self.guildChannelIds.get(str(guildId), ())))
+
+    def guildRoles(self, guildId) -> List[Any]:
+        return list(self._resolve(self.roles, self.guildRoleIds.get(str(guildId), ())))
+
+    def guildMembers(self, guildId) -> Iterator[MemberView]:
+        return self.members.members(str(guildId))
+
+    @staticmethod
+    def _resolve(store: EntityStore, ids) -> Iterator[Any]:
+        for entityId in ids:
+            entity = store.get(entityId)
+            if entity is not None:
+                yield entity
+
+    #-------------------------------------------------------------------------------------------
+    # Snapshots
+    #-------------------------------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+            The cache as sections for writeSnapshot().
+        '''
+        sections = {
+            'guilds': self.guilds.entries,
+            'channels': self.channels.entries,
+            'roles': self.roles.entries,
+            'guildChannelIds': self.guildChannelIds,
+            'guildRoleIds': self.guildRoleIds
+        }
+        sections.update(self.members.snapshot())
+        return sections
+
+    #-------------------------------------------------------------------------------------------
+    def restore(self, snapshot) -> None:
+        '''
+            Replace the cache with the contents of a Snapshot. Disabled stores stay empty.
+        '''
+        for store in (self.guilds, self.channels, self.roles):
+            entries = snapshot.load(store.name) if store.enabled else None
+            store.entries = entries if entries is not None else dict()
+
+        self.guildChannelIds = snapshot.load('guildChannelIds') or dict()
+        self.guildRoleIds = snapshot.load('guildRoleIds') or dict()
+        self.members.restore(snapshot)
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {store.name: store.stats() for store in (self.guilds, self.channels, self.roles, self.members)}
+
+    #-------------------------------------------------------------------------------------------
+    # Updates
+    #-------------------------------------------------------------------------------------------
+    def update(self, eventType: str, resourceObject: Any) -> None:
+        '''
+            Apply a gateway event to the cache, events that don't concern the cache are ignored.
+            Call it after the event has been handled. GUILD_CREATE's lists go to the stores, the event's
+            resource itself is never modified.
+        '''
+        if eventType not in self.eventTypes or resourceObject is None:
+            return
+
+        if eventType in ('GUILD_CREATE', 'GUILD_UPDATE'):
+            self.putGuild(resourceObject)
+
+        elif eventType == 'GUILD_DELETE':
+            if not getattr(resourceObject, 'unavailable', False):
+                self.removeGuild(resourceObject.id)
+
+        elif eventType.startswith(('CHANNEL_', 'THREAD_')):
+            if eventType.endswith('_DELETE'):
+                self.removeChannel(resourceObject)
+            else:
+                self.putChannel(resourceObject, getattr(resourceObject, 'guild_id', None))
+
+        elif eventType == 'GUILD_ROLE_DELETE':
+            guildId, roleId = str(resourceObject.guild_id), str(resourceObject.role_id)
+            self.roles.remove(roleId)
+            self.guildRoleIds.get(guildId, set()).discard(roleId)
+
+        elif eventType.startswith('GUILD_ROLE_'):
+            self.putRole(resourceObject.role, resourceObject.guild_id)
+
+        elif eventType == 'GUILD_MEMBER_REMOVE':
+            self.members.remove(str(resourceObject.guild_id), resourceObject.user.id)
+
+        elif eventType.startswith('GUILD_MEMBER_'):
+            self.putMember(resourceObject, resourceObject.guild_id)
+
+    #-------------------------------------------------------------------------------------------
+    def putGuild(self, guild: Any) -> None:
+        guildId = str(guild.id)
+
+        for channel in (getattr(guild, 'channels', None) or ()):
+            self.putChannel(channel, guildId)
+        for thread in (getattr(guild, 'threads', None) or ()):
+            self.putChannel(thread, guildId)
+        members = getattr(guild, 'members', None)
+        if members is not None:
+            self.members.load(guildId, members)
+
+        roles = getattr(guild, 'roles', None)
+        if roles is not None and self.roles.enabled:
+            for roleId in self.guildRoleIds.pop(guildId, ()):
+                self.roles.remove(roleId)
+            for role in roles:
+                self.putRole(role, guildId)
+
+        #----------------------------------------
+        #   The guild is stored as a copy without
+        #   its lists, the event's resource may
+        #   still be on its way to the DB.
+        #----------------------------------------
+        if self.guilds.enabled:
+            stored = copy.copy(guild)
+            for listName in GUILD_LISTS:
+                if hasattr(stored, listName):
+                    setattr(stored, listName, None)
+            self.guilds.put(guildId, stored)
+
+    #-------------------------------------------------------------------------------------------
+    def removeGuild(self, guildId) -> None:
+        guildId = str(guildId)
+        self.guilds.remove(guildId)
+
+        for channelId in self.guildChannelIds.pop(guildId, ()):
+            self.channels.remove(channelId)
+        for roleId in self.guildRoleIds.pop(guildId, ()):
+            self.roles.remove(roleId)
+
+        self.members.removeGuild(guildId)
+
+    #-------------------------------------------------------------------------------------------
+    def putChannel(self, channel: Any, guildId=None) -> None:
+        if not self.channels.enabled:
+            return
+        channelId = str(channel.id)
+        self.channels.put(channelId, channel)
+        if guildId is not None:
+            self.guildChannelIds.setdefault(str(guildId), set()).add(channelId)
+
+    def removeChannel(self, channel: Any) -> None:
+        channelId = str(channel.id)
+        self.channels.remove(channelId)
+        guildId = getattr(channel, 'guild_id', None)
+        if guildId is not None:
+            self.guildChannelIds.get(str(guildId), set()).discard(channelId)
+
+    #-------------------------------------------------------------------------------------------
+    def putRole(self, role: Any, guildId) -> None:
+        if not self.roles.enabled:
+            return
+        roleId = str(role.id)
+        self.roles.put(roleId, role)
+        self.guildRoleIds.setdefault(str(guildId), set()).add(roleId)
+
+    #-------------------------------------------------------------------------------------------
+    def putMember(self, member: Any, guildId) -> None:
+        self.members.put(str(guildId), member)
+
+#-----------------------------------------------------------------------------------------------------------
+# The cache of this process, created on first use from config.OPTS['entityCache'].
+#-----------------------------------------------------------------------------------------------------------
+CACHE: Optional[EntityCache] = None
+
+def getCache() -> EntityCache:
+    '''
+        The entity cache of the current process, for commands and listeners.
+    '''
+    global CACHE
+    if CACHE is None:
+        CACHE = EntityCache(config.OPTS.get('entityCache'))
+    return CACHE
@@ -0,0 +1,290 @@
+import struct
+import zlib
+
+from typing import Any
+
+__all__ = ['ETFDecoder', 'ETFEncoder', 'ETFError', 'decode', 'encode']
+
+#-------------------------------------------------------------------------------------------
+#   Erlang External Term Format tags
+#   https://www.erlang.org/doc/apps/erts/erl_ext_dist.html
+#-------------------------------------------------------------------------------------------
+FORMAT_VERSION          = 131
+NEW_FLOAT_EXT           = 70
+COMPRESSED              = 80
+SMALL_INTEGER_EXT       = 97
+INTEGER_EXT             = 98
+FLOAT_EXT               = 99
+ATOM_EXT                = 100
+SMALL_TUPLE_EXT         = 104
+LARGE_TUPLE_EXT         = 105
+NIL_EXT                 = 106
+STRING_EXT              = 107
+LIST_EXT                = 108
+BINARY_EXT              = 109
+SMALL_BIG_EXT           = 110
+LARGE_BIG_EXT           = 111
+SMALL_ATOM_EXT          = 115
+MAP_EXT                 = 116
+ATOM_UTF8_EXT           = 118
+SMALL_ATOM_UTF8_EXT     = 119
+
+ATOM_VALUES = {
+    'nil': None,
+    'true': True,
+    'false': False
+}
+
+#-----------------------------------------------------------------------------------------------------------
+class ETFError(Exception):
+    """
+        Raised when a payload can not be decoded or a value can not be encoded.
+    """
+
+#-----------------------------------------------------------------------------------------------------------
+class ETFDecoder(object):
+    '''
+        Pure Python decoder for the subset of the External Term Format used by the Discord gateway.
+
+        Binaries and atoms are decoded to str (with nil/true/false mapped to None/True/False),
+        maps to dicts, lists and tuples to lists. Snowflakes are sent as big integers, so they are
+        decoded straight to int without going through a string first.
+    '''
+    __slots__ = ('data', 'offset', 'decoders')
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+        self.decoders = {
+            NEW_FLOAT_EXT: self.decodeNewFloat,
+            SMALL_INTEGER_EXT: self.decodeSmallInteger,
+            INTEGER_EXT: self.decodeInteger,
+            FLOAT_EXT: self.decodeFloat,
+            ATOM_EXT: self.decodeAtom,
+            ATOM_UTF8_EXT: self.decodeAtom,
+            SMALL_ATOM_EXT: self.decodeSmallAtom,
+            SMALL_ATOM_UTF8_EXT: self.decodeSmallAtom,
+            SMALL_TUPLE_EXT: self.decodeSmallTuple,
+            LARGE_TUPLE_EXT: self.decodeLargeTuple,
+            NIL_EXT: self.decodeNil,
+            STRING_EXT: self.decodeString,
+            LIST_EXT: self.decodeList,
+            BINARY_EXT: self.decodeBinary,
+            SMALL_BIG_EXT: self.decodeSmallBig,
+            LARGE_BIG_EXT: self.decodeLargeBig,
+            MAP_EXT: self.decodeMap
+        }
+
+    #-------------------------------------------------------------------------------------------
+    def decode(self) -> Any:
+        '''
+            Decode the whole payload, starting with the version byte.
+        '''
+        if len(self.data) == 0 or self.data[0] != FORMAT_VERSION:
+            raise ETFError("Invalid ETF payload, missing version byte")
+        self.offset = 1
+
+        if self.data[1] == COMPRESSED:
+            size = struct.unpack_from('>I', self.data, 2)[0]
+            inflated = zlib.decompress(self.data[6:])
+            if len(inflated) != size:
+                raise ETFError("Invalid ETF payload, compressed size mismatch")
+            self.data = memoryview(inflated)
+            self.offset = 0
+
+        return self.decodeTerm()
+
+    #-------------------------------------------------------------------------------------------
+    def decodeTerm(self) -> Any:
+        tag = self.data[self.offset]
+        self.offset += 1
+        try:
+            return self.decoders[tag]()
+        except KeyError:
+            raise ETFError(f"Unsupported ETF tag: {tag}")
+
+    #-------------------------------------------------------------------------------------------
+    def read(self, size: int) -> memoryview:
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    #-------------------------------------------------------------------------------------------
+    def unpack(self, fmt: str, size: int) -> int:
+        value = struct.unpack_from(fmt, self.data, self.offset)[0]
+        self.offset += size
+        return value
+
+    #-------------------------------------------------------------------------------------------
+    def decodeNewFloat(self) -> float:
+        return self.unpack('>d', 8)
+
+    def decodeSmallInteger(self) -> int:
+        return self.unpack('>B', 1)
+
+    def decodeInteger(self) -> int:
+        return self.unpack('>i', 4)
+
+    def decodeFloat(self) -> float:
+        return float(bytes(self.read(31)).split(b'\x00', 1)[0])
+
+    def decodeNil(self) -> list:
+        return list()
+
+    #-------------------------------------------------------------------------------------------
+    def atomValue(self, name: str) -> Any:
+        return ATOM_VALUES.get(name, name)
+
+    def decodeAtom(self) -> Any:
+        return self.atomValue(str(self.read(self.unpack('>H', 2)), 'utf-8'))
+
+    def decodeSmallAtom(self) -> Any:
+        return self.atomValue(str(self.read(self.unpack('>B', 1)), 'utf-8'))
+
+    #-------------------------------------------------------------------------------------------
+    def decodeString(self) -> str:
+        return str(self.read(self.unpack('>H', 2)), 'latin-1')
+
+    def decodeBinary(self) -> str:
+        return str(self.read(self.unpack('>I', 4)), 'utf-8')
+
+    #-------------------------------------------------------------------------------------------
+    def decodeSmallTuple(self) -> list:
+        return [self.decodeTerm() for _ in range(self.unpack('>B', 1))]
+
+    def decodeLargeTuple(self) -> list:
+        return [self.decodeTerm() for _ in range(self.unpack('>I', 4))]
+
+    def decodeList(self) -> list:
+        items = [self.decodeTerm() for _ in range(self.unpack('>I', 4))]
+        #----------------------------------------
+        #   Proper lists end with NIL_EXT as the
+        #   tail, anything else is kept as the
+        #   last element.
+        #----------------------------------------
+        tail = self.decodeTerm()
+        if tail != []:
+            items.append(tail)
+        return items
+
+    def decodeMap(self) -> dict:
+        arity = self.unpack('>I', 4)
+        mapObj = dict()
+        for _ in range(arity):
+            key = self.decodeTerm()
+            mapObj[key] = self.decodeTerm()
+        return mapObj
+
+    #-------------------------------------------------------------------------------------------
+    def decodeBig(self, size: int) -> int:
+        sign = self.unpack('>B', 1)
+        value = int.from_bytes(self.read(size), 'little')
+        return -value if sign else value
+
+    def decodeSmallBig(self) -> int:
+        return self.decodeBig(self.unpack('>B', 1))
+
+    def decodeLargeBig(self) -> int:
+        return self.decodeBig(self.unpack('>I', 4))
+
+#-----------------------------------------------------------------------------------------------------------
+class ETFEncoder(object):
+    '''
+        Pure Python encoder for gateway payloads sent by the bot (identify, heartbeat, resume, etc).
+
+        None/True/False are encoded as the atoms nil/true/false, str as binaries, dicts as maps and
+        lists/tuples as lists.
+    '''
+    __slots__ = ('buffer',)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    #-------------------------------------------------------------------------------------------
+    def encode(self, obj: Any) -> bytes:
+        self.buffer = bytearray([FORMAT_VERSION])
+        self.encodeTerm(obj)
+        return bytes(self.buffer)
+
+    #-------------------------------------------------------------------------------------------
+    def encodeTerm(self, obj: Any) -> None:
+        if obj is None:
+            self.encodeAtom('nil')
+        elif obj is True:
+            self.encodeAtom('true')
+        elif obj is False:
+            self.encodeAtom('false')
+        elif isinstance(obj, int):
+            self.encodeInt(obj)
+        elif isinstance(obj, float):
+            self.buffer += struct.pack('>Bd', NEW_FLOAT_EXT, obj)
+        elif isinstance(obj, str):
+            self.encodeBinary(obj.encode('utf-8'))
+        elif isinstance(obj, (bytes, bytearray)):
+            self.encodeBinary(obj)
+        elif isinstance(obj, (list, tuple)):
+            self.encodeList(obj)
+        elif isinstance(obj, dict):
+            self.encodeMap(obj)
+        else:
+            raise ETFError(f"Can not encode object of type {type(obj).__name__}")
+
+    #-------------------------------------------------------------------------------------------
+    def encodeAtom(self, name: str) -> None:
+        data = name.encode('utf-8')
+        self.buffer += struct.pack('>BB', SMALL_ATOM_UTF8_EXT, len(data))
+        self.buffer += data
+
+    def encodeBinary(self, data: bytes) -> None:
+        self.buffer += struct.pack('>BI', BINARY_EXT, len(data))
+        self.buffer += data
+
+    #-------------------------------------------------------------------------------------------
+    def encodeInt(self, value: int) -> None:
+        if 0 <= value <= 255:
+            self.buffer += struct.pack('>BB', SMALL_INTEGER_EXT, value)
+        elif -2**31 <= value < 2**31:
+            self.buffer += struct.pack('>Bi', INTEGER_EXT, value)
+        else:
+            magnitude = abs(value)
+            data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'little')
+            if len(data) > 255:
+                raise ETFError("Integer too large to encode")
+            self.buffer += struct.pack('>BBB', SMALL_BIG_EXT, len(data), 1 if value < 0 else 0)
+            self.buffer += data
+
+    #-------------------------------------------------------------------------------------------
+    def encodeList(self, obj) -> None:
+        if len(obj) == 0:
+            self.buffer.append(NIL_EXT)
+            return
+        self.buffer += struct.pack('>BI', LIST_EXT, len(obj))
+        for item in obj:
+            self.encodeTerm(item)
+        self.buffer.append(NIL_EXT)
+
+    def encodeMap(self, obj: dict) -> None:
+        self.buffer += struct.pack('>BI', MAP_EXT, len(obj))
+        for key, val in obj.items():
+            self.encodeTerm(key)
+            self.encodeTerm(val)
+
+#-------------------------------------------------------------------------------------------
+#   Use the erlpack C extension when it is installed, otherwise fall back to the pure Python
+#   implementation above.
+#-------------------------------------------------------------------------------------------
+try:
+    import erlpack
+
+    def decode(data: bytes) -> Any:
+        return erlpack.unpack(data)
+
+    def encode(obj: Any) -> bytes:
+        return erlpack.pack(obj)
+
+except ImportError:
+    def decode(data: bytes) -> Any:
+        return ETFDecoder(data).decode()
+
+    def encode(obj: Any) -> bytes:
+        return ETFEncoder().encode(obj)
@@ -0,0 +1,114 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+__all__ = ['compileFilter', 'compileAccessor', 'compileComparison', 'flattenFields', 'MISSING']
+
+# Returned by accessors when a field is not present (or is None) on the resource.
+MISSING = object()
+
+Predicate = Callable[[Any, Optional[set]], bool]
+
+#-------------------------------------------------------------------------------------------
+def flattenFields(fields: Dict, prefix: Tuple[str, ...] = ()) -> List[Tuple[Tuple[str, ...], Any]]:
+    '''
+        Turn the nested fields of a listener filter into (path, value) pairs.
+
+        {'channel_id': '1', 'author': {'id': '2'}} -> [(('channel_id',), '1'), (('author', 'id'), '2')]
+    '''
+    flat = list()
+    for key, val in fields.items():
+        if isinstance(val, dict):
+            flat.extend(flattenFields(val, prefix + (key,)))
+        else:
+            flat.append((prefix + (key,), val))
+    return flat
+
+#-------------------------------------------------------------------------------------------
+def walkPath(obj: Any, path: Tuple[str, ...]) -> Any:
+    '''
+        Slow path for accessors, used when the path goes through a dict or a missing attribute.
+    '''
+    for key in path:
+        if obj is None:
+            return MISSING
+        if isinstance(obj, dict):
+            obj = obj.get(key, MISSING)
+        else:
+            obj = getattr(obj, key, MISSING)
+        if obj is MISSING:
+            return MISSING
+    return MISSING if obj is None else obj
+
+#-------------------------------------------------------------------------------------------
+def compileAccessor(path: Tuple[str, ...]) -> Callable[[Any], Any]:
+    '''
+        Build a function that reads the value at path straight off of a resource object.
+        Uses operator.attrgetter for the common case of plain slotted attributes and falls back to
+        walking the path when an attribute is missing or part of the path is a dict.
+    '''
+    getter = attrgetter('.'.join(path))
+
+    def accessor(obj: Any) -> Any:
+        try:
+            value = getter(obj)
+        except AttributeError:
+            return walkPath(obj, path)
+        return MISSING if value is None else value
+
+    return accessor
+
+#-------------------------------------------------------------------------------------------
+def compileComparison(condition: str, expected: Any) -> Callable[[Any], bool]:
+    '''
+        Build the comparison for a filter condition with the expected value baked in.
+
+        equals -> The field must equal the value. Snowflakes are compared as strings so filters
+                  written with quoted ids match both JSON (str) and ETF (int) payloads.
+        contains -> The field must contain the value, or any of the values when given a list.
+        contains_any -> The field must contain any of the values.
+    '''
+    condition = condition.lower()
+
+    if condition == "equals":
+        expectedStr = str(expected)
+        return lambda value: value == expected or str(value) == expectedStr
+
+    if condition in ("contains", "contains_any"):
+        if isinstance(expected, list):
+            values = tuple(expected)
+            return lambda value: any(x in value for x in values)
+        return lambda value: expected in value
+
+    raise ValueError(f"compileComparison() - Unsupported filter condition: {condition}")
+
+#-------------------------------------------------------------------------------------------
+def compileFilter(condition: str, fields: Dict, keywordTag: Optional[Hashable] = None) -> List[Predicate]:
+    '''
+        Compile a listener filter into a list of predicates, one per field.
+        Each predicate takes the resource object and the set of keyword tags matched in its content
+        (or None when no KeywordMatcher ran) and returns whether the field passes.
+
+        keywordTag -> The filter's tag in the KeywordMatcher, the content field is answered from the matched tags.
+    '''
+    predicates = list()
+
+    for path, expected in flattenFields(fields):
+        accessor = compileAccessor(path)
+        compare = compileComparison(condition, expected)
+
+        def predicate(resource, matched, accessor=accessor, compare=compare):
+            value = accessor(resource)
+            if value is MISSING:
+                return False
+            return compare(value)
+
+        if keywordTag is not None and path == ('content',):
+            def keywordPredicate(resource, matched, tag=keywordTag, fallback=predicate):
+                if matched is None:
+                    return fallback(resource, matched)
+                return tag in matched
+            predicates.append(keywordPredicate)
+        else:
+            predicates.append(predicate)
+
+    return predicates
@@ -0,0 +1,73 @@
+import re
+
+from typing import Optional, Union
+
+__all__ = ['FrameHeader', 'peekHeader']
+
+#-----------------------------------------------------------------------------------------------------------
+# The top level keys of a JSON gateway payload, and the first guild/channel id inside of "d".
+#-----------------------------------------------------------------------------------------------------------
+DATA_KEY = {str: '"d":', bytes: b'"d":'}
+HEADER_FIELD = {
+    str: re.compile(r'"(op|t|s)"\s*:\s*(?:null|"([A-Z0-9_]*)"|(\d+))'),
+    bytes: re.compile(rb'"(op|t|s)"\s*:\s*(?:null|"([A-Z0-9_]*)"|(\d+))')
+}
+# Discord sends compact JSON, the ids are found with a plain substring search.
+PARTITION_KEYS = {
+    str: ('"guild_id":"', '"channel_id":"'),
+    bytes: (b'"guild_id":"', b'"channel_id":"')
+}
+QUOTE = {str: '"', bytes: b'"'}
+
+#-----------------------------------------------------------------------------------------------------------
+class FrameHeader(object):
+    '''
+        The op, t and s fields of a gateway payload read without decoding "d".
+
+        partition -> The first guild_id (or channel_id when there is none) found in "d", used to pick the
+                     handler. Best effort, a nested id can come first in events that reference other guilds.
+    '''
+    __slots__ = ('op', 't', 's', 'partition')
+
+    def __init__(self, op: int, t: Optional[str], s: Optional[int], partition: Optional[str] = None):
+        self.op: int = op
+        self.t: Optional[str] = t
+        self.s: Optional[int] = s
+        self.partition: Optional[str] = partition
+
+#-------------------------------------------------------------------------------------------
+def peekHeader(message: Union[str, bytes]) -> Optional[FrameHeader]:
+    '''
+        Read the header fields of a JSON gateway payload from the text before "d".
+
+        Discord sends t, s and op ahead of d, the header is read from that prefix alone. Returns None
+        when the fields are not all ahead of "d" or the payload is not JSON (ETF), in which case the
+        caller decodes the whole payload.
+    '''
+    kind = bytes if isinstance(message, (bytes, bytearray)) else str
+    dataAt = message.find(DATA_KEY[kind])
+    if dataAt < 0:
+        return None
+
+    fields = dict()
+    for match in HEADER_FIELD[kind].finditer(message, 0, dataAt):
+        key, name, number = match.groups()
+        if kind is bytes:
+            key = key.decode()
+            name = name.decode() if name is not None else None
+        fields[key] = int(number) if number is not None else name
+
+    if len(fields) != 3 or fields['op'] is None:
+        return None
+
+    partition = None
+    for partitionKey in PARTITION_KEYS[kind]:
+        keyAt = message.find(partitionKey, dataAt)
+        if keyAt >= 0:
+            start = keyAt + len(partitionKey)
+            partition = message[start:message.find(QUOTE[kind], start)]
+            if kind is bytes:
+                partition = partition.decode()
+            break
+
+    return FrameHeader(fields['op'], fields['t'], fields['s'], partition)
@@ -0,0 +1,110 @@
+import multiprocessing
+import config
+
+from typing import Any, Dict, List, Optional
+
+__all__ = ['GatewayLatency', 'getLatency', 'setLatency']
+
+# Indexes into the shared counters.
+WRITES, MISSED = 0, 1
+
+#-----------------------------------------------------------------------------------------------------------
+class GatewayLatency(object):
+    '''
+        Rolling window of gateway latencies in shared memory, the time between a heartbeat and its ACK.
+
+        Created by the BotClient before it starts the processes and handed to the GatewayClient, whose
+        listeners add a sample for every ACK, and to the handlers, where commands read it with getLatency().
+        The last `capacity` samples of every shard are kept in one ring, each with the shard it came from.
+
+        The listeners of every shard write to it, so writes take the lock. Reads copy the ring under the
+        lock and sort the copy, they are meant for commands and stats, not for every event.
+
+        Attributes:
+            capacity (int): Samples kept.
+            samples (RawArray): Latencies in microseconds.
+            shards (RawArray): The shard of each sample, -1 for an empty slot.
+            counters (RawArray): Samples written and heartbeats that were never acknowledged.
+            lock (Lock): Serializes the writers.
+
+        Methods:
+            add(shardId, seconds)   -> None: Record the latency of an acknowledged heartbeat.
+            missed()                -> None: Count a heartbeat without ACK, the shard reconnects.
+            percentiles(shardId)    -> Dict[str, Any]: p50, p99 and last latency in ms, of a shard or of all of them.
+    '''
+    __slots__ = ('capacity', 'samples', 'shards', 'counters', 'lock')
+
+    def __init__(self, capacity: int = 256, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.capacity: int = max(1, capacity)
+        self.samples = ctx.RawArray('q', self.capacity)
+        self.shards = ctx.RawArray('i', [-1] * self.capacity)
+        self.counters = ctx.RawArray('q', 2)
+        self.lock = ctx.Lock()
+
+    #-------------------------------------------------------------------------------------------
+    def add(self, shardId: int, seconds: float) -> None:
+        with self.lock:
+            slot = self.counters[WRITES] % self.capacity
+            self.samples[slot] = int(seconds * 1_000_000)
+            self.shards[slot] = shardId
+            self.counters[WRITES] += 1
+
+    def missed(self) -> None:
+        with self.lock:
+            self.counters[MISSED] += 1
+
+    #-------------------------------------------------------------------------------------------
+    def window(self, shardId: Optional[int] = None) -> List[int]:
+        '''
+            The samples in microseconds, oldest first, of one shard or of all of them.
+        '''
+        with self.lock:
+            writes = self.counters[WRITES]
+            samples = self.samples[:]
+            shards = self.shards[:]
+
+        start = writes % self.capacity if writes >= self.capacity else 0
+        order = range(start, start + min(writes, self.capacity))
+        return [samples[n % self.capacity] for n in order if shardId is None or shards[n % self.capacity] == shardId]
+
+    #-------------------------------------------------------------------------------------------
+    def percentiles(self, shardId: Optional[int] = None) -> Dict[str, Any]:
+        '''
+            {'samples', 'p50', 'p99', 'last', 'missed'}, latencies in milliseconds, None without samples.
+            missed counts every shard.
+        '''
+        window = self.window(shardId)
+        ordered = sorted(window)
+
+        def rank(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000, 2)
+
+        return {
+            'samples': len(ordered),
+            'p50': rank(0.50),
+            'p99': rank(0.99),
+            'last': round(window[-1] / 1000, 2) if window else None,
+            'missed': self.counters[MISSED]
+        }
+
+#-----------------------------------------------------------------------------------------------------------
+# The latency window of this process. The BotClient creates it and passes it to the processes it starts,
+# which install it with setLatency().
+#-----------------------------------------------------------------------------------------------------------
+LATENCY: Optional[GatewayLatency] = None
+
+def getLatency() -> GatewayLatency:
+    '''
+        The gateway latency window of the current process, for commands and listeners.
+    '''
+    global LATENCY
+    if LATENCY is None:
+        LATENCY = GatewayLatency(int(config.OPTS.get('latencySamples', 256)))
+    return LATENCY
+
+def setLatency(latency: GatewayLatency) -> None:
+    global LATENCY
+    LATENCY = latency
@@ -1,6 +1,7 @@
 import json
 import config
 
+from src.ext import etf
 from src.models.bot.events.gateway_event import GatewayEvent
 
 
@@ -84,7 +85,7 @@ class EventGenerator(object):
             "MESSAGE_CREATE": Message,
             "MESSAGE_UPDATE": Message,
             "MESSAGE_DELETE": Message,
-            "MESSAGE_DELETE_BULK": Message,
+            "MESSAGE_DELETE_BULK": MessageDeleteBulk,
             "MESSAGE_REACTION_ADD": MessageReactionAdd,
             "MESSAGE_REACTION_REMOVE": MessageReactionRemove,
             "MESSAGE_REACTION_REMOVE_ALL": MessageReactionRemoveAll,
@@ -127,12 +128,17 @@ class EventGenerator(object):
             return event
         elif isinstance(event, str):
             return GatewayEvent(**json.loads(event))
+        elif isinstance(event, (bytes, bytearray)):
+            if config.OPTS['gatewayEncoding'] == 'etf':
+                return GatewayEvent(**etf.decode(event))
+            return GatewayEvent(**json.loads(event))
 
     #-------------------------------------------------------------------------------------------
     @classmethod
-    def auth_event(cls) -> GatewayEvent:
+    def auth_event(cls, shard=None) -> GatewayEvent:
         '''
             Create an auth event.
+            shard -> [shard_id, shard_count] when the bot is sharded.
         '''
         event_data = {
                         "token": config.OPTS['botToken'],
@@ -147,6 +153,9 @@ class EventGenerator(object):
                         }
                     }
 
+        if shard is not None:
+            event_data["shard"] = shard
+
         return GatewayEvent(2, None, None, event_data)
 
     #-------------------------------------------------------------------------------------------
@@ -0,0 +1,63 @@
+import bisect
+import hashlib
+
+from typing import Any, Hashable, List, Sequence
+
+__all__ = ['HashRing']
+
+#-----------------------------------------------------------------------------------------------------------
+class HashRing(object):
+    '''
+        Consistent hash ring mapping keys (guild or channel ids) onto a set of members.
+
+        Each member is placed on the ring replicas times, a key belongs to the first member point at or
+        after the key's hash. Adding or removing a member only moves the keys next to its points, so
+        resizing the pool keeps most guilds on the handler they were on.
+
+        Attributes:
+            members (List[Any]): The members in the ring.
+            replicas (int): Number of points per member.
+            points (List[int]): Sorted hashes of the member points.
+            owners (List[Any]): Member of each point, in the same order as points.
+    '''
+    __slots__ = ('members', 'replicas', 'points', 'owners')
+
+    def __init__(self, members: Sequence[Any] = (), replicas: int = 64):
+        self.members: List[Any] = list()
+        self.replicas: int = replicas
+        self.points: List[int] = list()
+        self.owners: List[Any] = list()
+
+        for member in members:
+            self.add(member)
+
+    #-------------------------------------------------------------------------------------------
+    @staticmethod
+    def hash(key: Hashable) -> int:
+        return int.from_bytes(hashlib.md5(str(key).encode('utf-8')).digest()[:8], 'big')
+
+    #-------------------------------------------------------------------------------------------
+    def add(self, member: Any) -> None:
+        self.members.append(member)
+        for replica in range(self.replicas):
+            point = self.hash(f"{member}:{replica}")
+            index = bisect.bisect(self.points, point)
+            self.points.insert(index, point)
+            self.owners.insert(index, member)
+
+    #-------------------------------------------------------------------------------------------
+    def remove(self, member: Any) -> None:
+        self.members.remove(member)
+        keep = [(point, owner) for point, owner in zip(self.points, self.owners) if owner != member]
+        self.points = [point for point, _ in keep]
+        self.owners = [owner for _, owner in keep]
+
+    #-------------------------------------------------------------------------------------------
+    def lookup(self, key: Hashable) -> Any:
+        '''
+            The member that owns key.
+        '''
+        if not self.points:
+            raise LookupError("HashRing.lookup() - The ring has no members")
+        index = bisect.bisect(self.points, self.hash(key))
+        return self.owners[index % len(self.points)]
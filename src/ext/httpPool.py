@@ -0,0 +1,120 @@
+import time
+import socket
+import config
+
+from typing import Dict
+from tornado.httpclient import AsyncHTTPClient, HTTPResponse
+from tornado.netutil import Resolver
+
+try:
+    from tornado.netutil import DefaultLoopResolver as BaseResolver
+except ImportError:
+    from tornado.netutil import DefaultExecutorResolver as BaseResolver
+
+__all__ = ['CachingResolver', 'HttpPoolStats', 'createHttpClient']
+
+#-----------------------------------------------------------------------------------------------------------
+class CachingResolver(Resolver):
+    '''
+        Resolver that keeps DNS results for ttl seconds so requests to discord.com don't pay for a
+        lookup every time a connection is opened.
+    '''
+    def initialize(self, ttl: float = 300, stats=None) -> None:
+        self.resolver = BaseResolver()
+        self.ttl = ttl
+        self.stats = stats
+        self.cache = dict()
+
+    #-------------------------------------------------------------------------------------------
+    async def resolve(self, host: str, port: int, family: socket.AddressFamily = socket.AF_UNSPEC):
+        key = (host, port, family)
+        now = time.monotonic()
+        cached = self.cache.get(key)
+
+        if cached is not None and cached[0] > now:
+            if self.stats is not None:
+                self.stats.counters['dnsHits'] += 1
+            return cached[1]
+
+        result = await self.resolver.resolve(host, port, family)
+        self.cache[key] = (now + self.ttl, result)
+        if self.stats is not None:
+            self.stats.counters['dnsMisses'] += 1
+        return result
+
+    #-------------------------------------------------------------------------------------------
+    def close(self) -> None:
+        self.resolver.close()
+
+#-----------------------------------------------------------------------------------------------------------
+class HttpPoolStats(object):
+    '''
+        Counters for the shared HTTP client, logged periodically by the request process.
+
+        requests -> Total responses received.
+        reused -> Responses sent over a connection that was already open (curl backend only).
+        newConnections -> Responses that needed a new connection.
+        dnsHits / dnsMisses -> CachingResolver lookups (simple backend only, curl keeps its own cache).
+    '''
+    __slots__ = ('backend', 'counters')
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.counters: Dict[str, int] = {
+            'requests': 0,
+            'reused': 0,
+            'newConnections': 0,
+            'dnsHits': 0,
+            'dnsMisses': 0
+        }
+
+    #-------------------------------------------------------------------------------------------
+    def record(self, response: HTTPResponse) -> None:
+        '''
+            Record a response. curl reports a connect time of 0 when an open connection was reused,
+            the simple backend opens a new connection for every request.
+        '''
+        self.counters['requests'] += 1
+        if response is not None and response.time_info.get('connect', None) == 0:
+            self.counters['reused'] += 1
+        else:
+            self.counters['newConnections'] += 1
+
+    #-------------------------------------------------------------------------------------------
+    def __str__(self) -> str:
+        return f"backend: {self.backend} " + " ".join(f"{k}: {v}" for k, v in self.counters.items())
+
+#-------------------------------------------------------------------------------------------
+def createHttpClient(stats: HttpPoolStats) -> AsyncHTTPClient:
+    '''
+        Configure and create the single HTTP client owned by the request process.
+        Must be called from inside the running event loop.
+
+        httpBackend -> 'curl' uses tornado's curl_httpclient (requires pycurl) which keeps connections
+                       alive and reuses them, 'simple' uses tornado's default client.
+        httpPoolSize -> Maximum number of simultaneous connections.
+        httpDnsCacheTtl -> Seconds to keep DNS results.
+    '''
+    poolSize = config.OPTS['httpPoolSize']
+    dnsTtl = config.OPTS['httpDnsCacheTtl']
+
+    if stats.backend == 'curl':
+        try:
+            import pycurl
+
+            def prepareCurl(curl):
+                curl.setopt(pycurl.DNS_CACHE_TIMEOUT, int(dnsTtl))
+                curl.setopt(pycurl.TCP_KEEPALIVE, 1)
+
+            AsyncHTTPClient.configure("tornado.curl_httpclient.CurlAsyncHTTPClient",
+                                      max_clients=poolSize,
+                                      defaults={'prepare_curl_callback': prepareCurl})
+            return AsyncHTTPClient()
+
+        except ImportError:
+            stats.backend = 'simple'
+
+    AsyncHTTPClient.configure(None,
+                              max_clients=poolSize,
+                              resolver=CachingResolver(ttl=dnsTtl, stats=stats))
+    return AsyncHTTPClient()
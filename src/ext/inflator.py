@@ -0,0 +1,62 @@
+import zlib
+
+from typing import Optional
+
+__all__ = ['ZlibStreamInflator', 'ZLIB_SUFFIX']
+
+# Every complete zlib-stream frame sent by the gateway ends with a Z_SYNC_FLUSH marker.
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+class ZlibStreamInflator(object):
+    '''
+        Incremental decompressor for the gateway's zlib-stream transport compression.
+
+        The gateway shares a single zlib context for the whole lifetime of a connection, so one
+        inflator must be kept per websocket and reset whenever a new connection is opened
+        (connect or resume).
+
+        A gateway payload may be split across several websocket messages. Partial messages are
+        collected in the buffer until the Z_SYNC_FLUSH suffix shows up, the common case of a
+        payload arriving in a single message is decompressed directly without being copied.
+
+        Attributes:
+            inflator (zlib.Decompress): The zlib context for the current connection.
+            buffer (bytearray): Holds the partial messages of a payload that has not been completed yet.
+    '''
+    __slots__ = ('inflator', 'buffer')
+
+    def __init__(self):
+        self.inflator = None
+        self.buffer = bytearray()
+        self.reset()
+
+    #-------------------------------------------------------------------------------------------
+    def reset(self) -> None:
+        '''
+            Start a fresh zlib context. Must be called for every new websocket connection.
+        '''
+        self.inflator = zlib.decompressobj()
+        self.buffer = bytearray()
+
+    #-------------------------------------------------------------------------------------------
+    def feed(self, data: bytes) -> Optional[bytes]:
+        '''
+            Feed a websocket message into the inflator.
+
+            Returns the decompressed payload once a complete frame has been received, otherwise None.
+        '''
+        #----------------------------------------
+        #   Fast path, the frame is complete on
+        #   its own and nothing is buffered.
+        #----------------------------------------
+        if not self.buffer and data[-4:] == ZLIB_SUFFIX:
+            return self.inflator.decompress(data)
+
+        self.buffer.extend(data)
+
+        if len(self.buffer) < 4 or self.buffer[-4:] != ZLIB_SUFFIX:
+            return None
+
+        payload = self.inflator.decompress(self.buffer)
+        self.buffer.clear()
+        return payload
@@ -0,0 +1,103 @@
+from collections import deque
+from typing import Dict, Hashable, List, Set
+
+__all__ = ['KeywordMatcher']
+
+class KeywordMatcher(object):
+    '''
+        Aho-Corasick automaton that finds every registered keyword in a single pass over a string.
+
+        Keywords are added with a tag, search() returns the set of tags whose keywords appear in the
+        text. The cost of a search grows with the length of the text and the number of matches, not
+        with the number of keywords, so many listeners can share the scan of a message's content.
+
+        Attributes:
+            goto (List[Dict[str, int]]): Trie transitions for each state.
+            fail (List[int]): Failure link for each state.
+            output (List[Set]): Tags of the keywords ending at each state, including those reached through failure links.
+            compiled (bool): Whether the failure links have been built for the current keywords.
+
+        Methods:
+            add(keyword, tag)   -> None: Register a keyword, reported as tag when found.
+            compile()           -> None: Build the failure links. Called automatically by search() when needed.
+            search(text)        -> Set: The tags of every keyword found in the text.
+    '''
+    __slots__ = ('goto', 'fail', 'output', 'compiled')
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [dict()]
+        self.fail: List[int] = [0]
+        self.output: List[Set[Hashable]] = [set()]
+        self.compiled: bool = True
+
+    #-------------------------------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.goto) - 1
+
+    #-------------------------------------------------------------------------------------------
+    def add(self, keyword: str, tag: Hashable) -> None:
+        if not keyword:
+            return
+
+        state = 0
+        for char in keyword:
+            nextState = self.goto[state].get(char)
+            if nextState is None:
+                nextState = len(self.goto)
+                self.goto.append(dict())
+                self.fail.append(0)
+                self.output.append(set())
+                self.goto[state][char] = nextState
+            state = nextState
+
+        self.output[state].add(tag)
+        self.compiled = False
+
+    #-------------------------------------------------------------------------------------------
+    def compile(self) -> None:
+        '''
+            Build the failure links breadth first, merging the outputs of each state's failure target.
+        '''
+        pending = deque()
+
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            pending.append(state)
+
+        while pending:
+            state = pending.popleft()
+
+            for char, nextState in self.goto[state].items():
+                pending.append(nextState)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nextState] = target if target != nextState else 0
+                self.output[nextState] |= self.output[self.fail[nextState]]
+
+        self.compiled = True
+
+    #-------------------------------------------------------------------------------------------
+    def search(self, text: str) -> Set[Hashable]:
+        if not self.compiled:
+            self.compile()
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+
+        found = set()
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if output[state]:
+                found |= output[state]
+
+        return found
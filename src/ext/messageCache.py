@@ -0,0 +1,218 @@
+import config
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+__all__ = ['MessageCache', 'ChannelRing', 'getMessages', 'CACHED_TYPES']
+
+# The event types that update the cache.
+CACHED_TYPES = frozenset(('MESSAGE_CREATE', 'MESSAGE_UPDATE', 'MESSAGE_DELETE', 'MESSAGE_DELETE_BULK', 'CHANNEL_DELETE', 'THREAD_DELETE'))
+
+#-----------------------------------------------------------------------------------------------------------
+class ChannelRing(object):
+    '''
+        The last messages of a channel in a fixed size ring, with an id -> slot index.
+
+        A new message takes the slot after the newest one, overwriting the oldest message once the
+        ring is full. Lookups, edits and deletes go through the index.
+
+        Attributes:
+            slots (List[Any]): The messages, None for empty or deleted slots.
+            index (Dict[str, int]): message_id -> slot.
+            head (int): Slot the next message goes into.
+    '''
+    __slots__ = ('slots', 'index', 'head')
+
+    def __init__(self, capacity: int):
+        self.slots: List[Any] = [None] * capacity
+        self.index: Dict[str, int] = dict()
+        self.head: int = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, messageId: str, message: Any) -> int:
+        '''
+            Add a message, returns the number of messages it overwrote (0 or 1).
+        '''
+        slot = self.index.get(messageId)
+        if slot is not None:
+            self.slots[slot] = message
+            return 0
+
+        slot = self.head
+        overwritten = self.slots[slot]
+        if overwritten is not None:
+            del self.index[str(overwritten.id)]
+
+        self.slots[slot] = message
+        self.index[messageId] = slot
+        self.head = (slot + 1) % len(self.slots)
+        return 1 if overwritten is not None else 0
+
+    #-------------------------------------------------------------------------------------------
+    def get(self, messageId: str) -> Optional[Any]:
+        slot = self.index.get(messageId)
+        return self.slots[slot] if slot is not None else None
+
+    def replace(self, messageId: str, message: Any) -> Optional[Any]:
+        slot = self.index.get(messageId)
+        if slot is None:
+            return None
+        original, self.slots[slot] = self.slots[slot], message
+        return original
+
+    def remove(self, messageId: str) -> Optional[Any]:
+        slot = self.index.pop(messageId, None)
+        if slot is None:
+            return None
+        original, self.slots[slot] = self.slots[slot], None
+        return original
+
+    #-------------------------------------------------------------------------------------------
+    def messages(self) -> List[Any]:
+        '''
+            The cached messages, oldest first.
+        '''
+        size = len(self.slots)
+        return [message for message in (self.slots[(self.head + n) % size] for n in range(size)) if message is not None]
+
+#-----------------------------------------------------------------------------------------------------------
+class MessageCache(object):
+    '''
+        Cache of the recent messages of each channel, so the MESSAGE_UPDATE, MESSAGE_DELETE and reaction
+        handlers can see the original message without fetching it.
+
+        Each channel has a ChannelRing of channelCapacity messages. maxMessages bounds the messages over
+        every channel. When it is exceeded, whole channels are evicted starting with the one least
+        recently written to or read from, so busy channels keep their history and cold ones go first.
+
+        The handler updates the cache after an event has been handled, so during MESSAGE_UPDATE
+        get() still returns the message as it was before the edit. MESSAGE_DELETE only carries ids,
+        the handler replaces it with the cached message when there is one.
+
+        Attributes:
+            enabled (bool): A disabled cache ignores every write.
+            channelCapacity (int): Messages kept per channel.
+            maxMessages (int): Messages kept over every channel, 0 for no limit.
+            channels (OrderedDict[str, ChannelRing]): channel_id -> ring, least recently used first.
+            count (int): Number of cached messages.
+            evictedChannels (int): Channels evicted to stay within maxMessages.
+
+        Methods:
+            update(eventType, resourceObject) -> None: Apply a message event to the cache.
+            get(channelId, messageId)         -> Optional[Message]
+            channelMessages(channelId)        -> List[Message]: The cached messages of a channel, oldest first.
+    '''
+    __slots__ = ('enabled', 'channelCapacity', 'maxMessages', 'channels', 'count', 'evictedChannels')
+
+    def __init__(self, enabled: bool = True, channelCapacity: int = 100, maxMessages: int = 0):
+        self.enabled: bool = enabled
+        self.channelCapacity: int = max(1, channelCapacity)
+        self.maxMessages: int = maxMessages
+        self.channels: OrderedDict = OrderedDict()
+        self.count: int = 0
+        self.evictedChannels: int = 0
+
+    #-------------------------------------------------------------------------------------------
+    @property
+    def eventTypes(self) -> frozenset:
+        return CACHED_TYPES if self.enabled else frozenset()
+
+    #-------------------------------------------------------------------------------------------
+    def get(self, channelId, messageId) -> Optional[Any]:
+        channelId = str(channelId)
+        ring = self.channels.get(channelId)
+        if ring is None:
+            return None
+        self.channels.move_to_end(channelId)
+        return ring.get(str(messageId))
+
+    def channelMessages(self, channelId) -> List[Any]:
+        ring = self.channels.get(str(channelId))
+        return ring.messages() if ring is not None else list()
+
+    #-------------------------------------------------------------------------------------------
+    def put(self, message: Any) -> None:
+        if not self.enabled:
+            return
+
+        channelId = str(message.channel_id)
+        ring = self.channels.get(channelId)
+        if ring is None:
+            ring = self.channels[channelId] = ChannelRing(self.channelCapacity)
+        else:
+            self.channels.move_to_end(channelId)
+
+        before = len(ring)
+        ring.put(str(message.id), message)
+        self.count += len(ring) - before
+
+        while self.maxMessages and self.count > self.maxMessages and len(self.channels) > 1:
+            _, evicted = self.channels.popitem(last=False)
+            self.count -= len(evicted)
+            self.evictedChannels += 1
+
+    #-------------------------------------------------------------------------------------------
+    def edit(self, message: Any) -> Optional[Any]:
+        '''
+            Replace a cached message with its edited version, returns the original.
+        '''
+        ring = self.channels.get(str(message.channel_id))
+        return ring.replace(str(message.id), message) if ring is not None else None
+
+    def delete(self, channelId, messageIds: Iterable) -> None:
+        ring = self.channels.get(str(channelId))
+        if ring is None:
+            return
+        for messageId in messageIds:
+            if ring.remove(str(messageId)) is not None:
+                self.count -= 1
+
+    def removeChannel(self, channelId) -> None:
+        ring = self.channels.pop(str(channelId), None)
+        if ring is not None:
+            self.count -= len(ring)
+
+    #-------------------------------------------------------------------------------------------
+    def update(self, eventType: str, resourceObject: Any) -> None:
+        '''
+            Apply a handled event to the cache, events that don't concern it are ignored.
+        '''
+        if eventType == "MESSAGE_CREATE":
+            self.put(resourceObject)
+        elif eventType == "MESSAGE_UPDATE":
+            self.edit(resourceObject)
+        elif eventType == "MESSAGE_DELETE":
+            self.delete(resourceObject.channel_id, (resourceObject.id,))
+        elif eventType == "MESSAGE_DELETE_BULK":
+            self.delete(resourceObject.channel_id, getattr(resourceObject, 'ids', None) or ())
+        elif eventType in ("CHANNEL_DELETE", "THREAD_DELETE"):
+            self.removeChannel(resourceObject.id)
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'channels': len(self.channels),
+            'messages': self.count,
+            'maxMessages': self.maxMessages,
+            'evictedChannels': self.evictedChannels
+        }
+
+#-----------------------------------------------------------------------------------------------------------
+# The message cache of this process, created on first use from config.OPTS['messageCache'].
+#-----------------------------------------------------------------------------------------------------------
+MESSAGES: Optional[MessageCache] = None
+
+def getMessages() -> MessageCache:
+    '''
+        The message cache of the current process, for commands and listeners.
+    '''
+    global MESSAGES
+    if MESSAGES is None:
+        options = config.OPTS.get('messageCache') or dict()
+        MESSAGES = MessageCache(bool(options.get('enabled', True)),
+                                int(options.get('channelCapacity', 100)),
+                                int(options.get('maxMessages', 0) or 0))
+    return MESSAGES
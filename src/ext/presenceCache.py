@@ -0,0 +1,239 @@
+import sys
+import time
+import config
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.bot.resources.activity import Activity
+
+__all__ = ['PresenceCache', 'PresenceEntry', 'getPresences', 'PRESENCE_MODES']
+
+#-----------------------------------------------------------------------------------------------------------
+# none   -> PRESENCE_UPDATE is dropped by the gateway from its header, it is never decoded.
+# status -> The status and the client status of each member are kept, packed in an int.
+# full   -> The activities are kept as well.
+#-----------------------------------------------------------------------------------------------------------
+PRESENCE_MODES = ('none', 'status', 'full')
+
+# Two bits per status. The overall status is in the low bits, then desktop, mobile and web.
+STATUS_CODES = {'offline': 0, 'online': 1, 'idle': 2, 'dnd': 3}
+STATUS_NAMES = ('offline', 'online', 'idle', 'dnd')
+CLIENTS = ('desktop', 'mobile', 'web')
+
+#-----------------------------------------------------------------------------------------------------------
+class PresenceEntry(object):
+    '''
+        Presence of a member in full mode.
+
+        packed -> The packed status bits.
+        activities -> Tuple of the activity payloads, kept as long as the member's activities don't change.
+    '''
+    __slots__ = ('packed', 'activities')
+
+    def __init__(self, packed: int, activities: Tuple[dict, ...]):
+        self.packed: int = packed
+        self.activities: Tuple[dict, ...] = activities
+
+#-----------------------------------------------------------------------------------------------------------
+class PresenceCache(object):
+    '''
+        Presences of the members of the guilds a handler serves, fed with the decoded "d" of
+        PRESENCE_UPDATE payloads. The gateway forwards PRESENCE_UPDATE raw, so no Presence, User,
+        ClientStatus or Activity objects are built for it.
+
+        Updates are applied as deltas against the cached presence. An update that changes nothing
+        leaves the entry alone, and the cached activities are only replaced when they differ, so an
+        update that only changes the status keeps the activity tuple it already had.
+        Offline members without activities are removed, a member missing from the cache is offline.
+
+        The counters in stats() (events, changes, time spent per event and the memory held) are
+        there to choose the mode of a deployment.
+
+        Attributes:
+            mode (str): One of PRESENCE_MODES.
+            guilds (Dict[str, Dict[int, Any]]): guild_id -> user_id -> packed status (status mode) or PresenceEntry (full mode).
+            events (int): Number of updates applied.
+            unchanged (int): Updates that changed nothing.
+            statusChanges (int): Updates that changed the status.
+            activityChanges (int): Updates that replaced the activities.
+            updateNs (int): Time spent applying updates, in nanoseconds.
+    '''
+    __slots__ = ('mode', 'guilds', 'events', 'unchanged', 'statusChanges', 'activityChanges', 'updateNs')
+
+    def __init__(self, mode: str = 'status'):
+        if mode not in PRESENCE_MODES:
+            raise ValueError(f"PresenceCache() - Unknown presence mode: {mode}")
+
+        self.mode: str = mode
+        self.guilds: Dict[str, Dict[int, Any]] = dict()
+        self.events: int = 0
+        self.unchanged: int = 0
+        self.statusChanges: int = 0
+        self.activityChanges: int = 0
+        self.updateNs: int = 0
+
+    #-------------------------------------------------------------------------------------------
+    @staticmethod
+    def pack(data: dict) -> int:
+        packed = STATUS_CODES.get(data.get('status'), 0)
+        clientStatus = data.get('client_status') or dict()
+        for shift, client in enumerate(CLIENTS, 1):
+            packed |= STATUS_CODES.get(clientStatus.get(client), 0) << (shift * 2)
+        return packed
+
+    #-------------------------------------------------------------------------------------------
+    def update(self, data: dict) -> None:
+        '''
+            Apply the "d" of a PRESENCE_UPDATE.
+        '''
+        if self.mode == 'none':
+            return
+
+        started = time.perf_counter_ns()
+        self.events += 1
+
+        guildId = str(data.get('guild_id'))
+        userId = int(data['user']['id'])
+        packed = self.pack(data)
+        members = self.guilds.get(guildId)
+        cached = members.get(userId) if members is not None else None
+
+        if self.mode == 'status':
+            if cached == packed or (cached is None and packed == 0):
+                self.unchanged += 1
+            else:
+                self.statusChanges += 1
+                self._store(guildId, members, userId, packed if packed else None)
+
+        else:
+            activities = data.get('activities') or ()
+            if cached is None:
+                if packed or activities:
+                    self.statusChanges += 1
+                    self.activityChanges += 1 if activities else 0
+                    self._store(guildId, members, userId, PresenceEntry(packed, tuple(activities)))
+                else:
+                    self.unchanged += 1
+            else:
+                statusChanged = cached.packed != packed
+                activitiesChanged = len(cached.activities) != len(activities) or any(old != new for old, new in zip(cached.activities, activities))
+
+                if not statusChanged and not activitiesChanged:
+                    self.unchanged += 1
+                elif not packed and not activities:
+                    self.statusChanges += 1
+                    self._store(guildId, members, userId, None)
+                else:
+                    if statusChanged:
+                        cached.packed = packed
+                        self.statusChanges += 1
+                    if activitiesChanged:
+                        cached.activities = tuple(activities)
+                        self.activityChanges += 1
+
+        self.updateNs += time.perf_counter_ns() - started
+
+    #-------------------------------------------------------------------------------------------
+    def loadGuild(self, guildId, presences) -> None:
+        '''
+            Apply the Presence objects of a GUILD_CREATE.
+        '''
+        for presence in presences or ():
+            clientStatus = presence.client_status
+            self.update({'guild_id': guildId,
+                         'user': {'id': presence.user.id},
+                         'status': presence.status,
+                         'client_status': {client: getattr(clientStatus, client, None) for client in CLIENTS} if clientStatus is not None else None,
+                         'activities': [activity._to_dict() for activity in presence.activities] if self.mode == 'full' else ()})
+
+    #-------------------------------------------------------------------------------------------
+    def _store(self, guildId: str, members: Optional[Dict[int, Any]], userId: int, value: Any) -> None:
+        if value is None:
+            if members is not None:
+                members.pop(userId, None)
+                if not members:
+                    del self.guilds[guildId]
+            return
+
+        if members is None:
+            members = self.guilds[guildId] = dict()
+        members[userId] = value
+
+    #-------------------------------------------------------------------------------------------
+    def removeGuild(self, guildId) -> None:
+        self.guilds.pop(str(guildId), None)
+
+    #-------------------------------------------------------------------------------------------
+    # Accessors
+    #-------------------------------------------------------------------------------------------
+    def _packed(self, guildId, userId) -> int:
+        cached = self.guilds.get(str(guildId), dict()).get(int(userId))
+        if cached is None:
+            return 0
+        return cached if self.mode == 'status' else cached.packed
+
+    def getStatus(self, guildId, userId) -> str:
+        return STATUS_NAMES[self._packed(guildId, userId) & 3]
+
+    def getClientStatus(self, guildId, userId) -> Dict[str, str]:
+        packed = self._packed(guildId, userId)
+        return {client: STATUS_NAMES[(packed >> (shift * 2)) & 3] for shift, client in enumerate(CLIENTS, 1) if (packed >> (shift * 2)) & 3}
+
+    def getActivities(self, guildId, userId) -> List[Activity]:
+        '''
+            The member's activities, built from the cached payloads. Empty unless the mode is full.
+        '''
+        cached = self.guilds.get(str(guildId), dict()).get(int(userId))
+        if self.mode != 'full' or cached is None:
+            return list()
+        return [Activity(**activity) for activity in cached.activities]
+
+    #-------------------------------------------------------------------------------------------
+    def memoryBytes(self) -> int:
+        '''
+            Estimate of the memory held by the cache. Walks the whole cache, only call it for stats.
+        '''
+        total = sys.getsizeof(self.guilds)
+        for members in self.guilds.values():
+            total += sys.getsizeof(members) + sum(sys.getsizeof(userId) for userId in members)
+            for cached in members.values():
+                if isinstance(cached, PresenceEntry):
+                    total += sys.getsizeof(cached) + sys.getsizeof(cached.activities)
+                    total += sum(self._deepSize(activity) for activity in cached.activities)
+        return total
+
+    @classmethod
+    def _deepSize(cls, value: Any) -> int:
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(cls._deepSize(item) for item in value.values())
+        elif isinstance(value, list):
+            size += sum(cls._deepSize(item) for item in value)
+        return size
+
+    #-------------------------------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'members': sum(len(members) for members in self.guilds.values()),
+            'events': self.events,
+            'unchanged': self.unchanged,
+            'statusChanges': self.statusChanges,
+            'activityChanges': self.activityChanges,
+            'usPerEvent': round(self.updateNs / self.events / 1000, 2) if self.events else 0,
+            'memoryBytes': self.memoryBytes()
+        }
+
+#-----------------------------------------------------------------------------------------------------------
+# The presence cache of this process, created on first use from config.OPTS['presenceMode'].
+#-----------------------------------------------------------------------------------------------------------
+PRESENCES: Optional[PresenceCache] = None
+
+def getPresences() -> PresenceCache:
+    '''
+        The presence cache of the current process, for commands and listeners.
+    '''
+    global PRESENCES
+    if PRESENCES is None:
+        PRESENCES = PresenceCache(config.OPTS.get('presenceMode', 'status'))
+    return PRESENCES
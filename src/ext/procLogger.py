@@ -0,0 +1,122 @@
+import time
+import asyncio
+import logging
+import config
+
+from typing import Any, Callable, Union
+from multiprocessing import JoinableQueue
+from src.models.procs.event import LogEvent, LogBatch
+
+__all__ = ['ProcLogger', 'LOG_LEVELS']
+
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+#-----------------------------------------------------------------------------------------------------------
+class ProcLogger(object):
+    '''
+        Level aware front end to the LOGGER queue, one per component in each process.
+
+        The level comes from config.OPTS['logLevel'], messages below it are dropped before anything is
+        formatted or pickled onto the queue. Messages are formatted lazily, either %-style from args or
+        by calling the message when it's a callable:
+
+            self.log.debug("[EventHandler] data: %s", resourceObject)
+            self.log.debug(lambda: f"[EventHandler] data: {resourceObject._to_dict()}")
+
+        Events are collected and shipped as one LogBatch when batchSize events are waiting, when the
+        oldest one has waited batchInterval seconds, or right away for ERROR and CRITICAL. The owning
+        process calls flush() when it goes idle or stops, async processes can run autoFlush() instead.
+
+        Attributes:
+            component (str): The LoggerClient logger the events are written to (GATEWAY, HTTP, ...).
+            logQueue (JoinableQueue): The LOGGER queue.
+            level (int): The lowest level that is sent to the logger.
+            batch (list): LogEvents waiting to be shipped.
+            batchSize (int): Ship the batch once it holds this many events, from config.OPTS['logBatchSize'].
+            batchInterval (float): Longest time an event waits in the batch, from config.OPTS['logBatchInterval'].
+            batchStarted (float): time.monotonic() of the oldest event in the batch.
+    '''
+    __slots__ = ('component', 'logQueue', 'level', 'batch', 'batchSize', 'batchInterval', 'batchStarted')
+
+    def __init__(self, component: str, logQueue: JoinableQueue, level: str = None, batchSize: int = None, batchInterval: float = None):
+        self.component: str = component
+        self.logQueue: JoinableQueue = logQueue
+        level = level if level is not None else config.OPTS['logLevel']
+        self.level: int = LOG_LEVELS.get(level, logging.DEBUG) if isinstance(level, str) else logging.DEBUG
+        self.batch: list = list()
+        self.batchSize: int = batchSize if batchSize is not None else config.OPTS['logBatchSize']
+        self.batchInterval: float = batchInterval if batchInterval is not None else config.OPTS['logBatchInterval']
+        self.batchStarted: float = 0.0
+
+    #-------------------------------------------------------------------------------------------
+    def isEnabledFor(self, level: str) -> bool:
+        return LOG_LEVELS[level] >= self.level
+
+    #-------------------------------------------------------------------------------------------
+    def log(self, levelNo: int, level: str, message: Union[str, Callable[[], str]], args: tuple) -> None:
+        if levelNo < self.level:
+            return
+
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+
+        logEvent = LogEvent(component=self.component, action="LOG", level=level, message=message)
+
+        if self.batchSize <= 1:
+            self.logQueue.put_nowait(logEvent)
+            return
+
+        if not self.batch:
+            self.batchStarted = time.monotonic()
+        self.batch.append(logEvent)
+
+        if levelNo >= logging.ERROR or len(self.batch) >= self.batchSize or time.monotonic() - self.batchStarted >= self.batchInterval:
+            self.flush()
+
+    #-------------------------------------------------------------------------------------------
+    def flush(self) -> None:
+        '''
+            Ship the waiting events to the LOGGER queue as one LogBatch.
+        '''
+        if not self.batch:
+            return
+
+        self.logQueue.put_nowait(LogBatch(action="LOG_BATCH", events=self.batch))
+        self.batch = list()
+
+    #-------------------------------------------------------------------------------------------
+    async def autoFlush(self) -> None:
+        '''
+            Flush every batchInterval seconds, for processes that run an event loop.
+            Run it as a task and cancel it when the loop is done.
+        '''
+        try:
+            while True:
+                await asyncio.sleep(self.batchInterval)
+                self.flush()
+        finally:
+            self.flush()
+
+    #-------------------------------------------------------------------------------------------
+    def debug(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
+        self.log(logging.DEBUG, "DEBUG", message, args)
+
+    def info(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
+        self.log(logging.INFO, "INFO", message, args)
+
+    def warning(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
+        self.log(logging.WARNING, "WARNING", message, args)
+
+    def error(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
+        self.log(logging.ERROR, "ERROR", message, args)
+
+    def critical(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
+        self.log(logging.CRITICAL, "CRITICAL", message, args)
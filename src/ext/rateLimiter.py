@@ -0,0 +1,185 @@
+import re
+import time
+import asyncio
+
+from typing import Dict, Optional, Tuple
+
+__all__ = ['RateLimiter', 'RateLimitBucket', 'routeKey']
+
+API_BASE = re.compile(r'^https?://[^/]+/api(?:/v\d+)?')
+ROUTE_ID = re.compile(r'/([a-z_-]+)/(\d{15,21})')
+MAJOR_PARAMS = ('channels', 'guilds', 'webhooks')
+
+#-------------------------------------------------------------------------------------------
+def routeKey(method: str, url: str) -> Tuple[str, str]:
+    '''
+        Build the rate limit route for a request.
+
+        Returns a tuple of (route, major), where route is the method and path with every
+        non-major id replaced by a placeholder, and major holds the values of the major
+        parameters (channel_id, guild_id, webhook_id) which get their own buckets.
+
+        ('POST', 'https://discord.com/api/v10/channels/123/messages/456')
+            -> ('POST /channels/{channels}/messages/{id}', '123')
+    '''
+    path = API_BASE.sub('', url).split('?', 1)[0]
+    major = list()
+
+    #----------------------------------------
+    #   Everything after the emoji in a
+    #   reactions route shares one bucket.
+    #----------------------------------------
+    if '/reactions/' in path:
+        path = path.split('/reactions/', 1)[0] + '/reactions'
+
+    def replace(match):
+        if match.group(1) in MAJOR_PARAMS:
+            major.append(match.group(2))
+            return f'/{match.group(1)}/{{{match.group(1)}}}'
+        return f'/{match.group(1)}/{{id}}'
+
+    path = ROUTE_ID.sub(replace, path)
+    return f'{method.upper()} {path}', ':'.join(major)
+
+#-----------------------------------------------------------------------------------------------------------
+class RateLimitBucket(object):
+    '''
+        Tracks the remaining requests of a single rate limit bucket.
+
+        Requests claim a slot with acquire() before being sent. When the bucket is exhausted
+        the claim waits until the bucket resets, other buckets are not affected.
+        remaining is None until the first response tells us the bucket's limits.
+    '''
+    __slots__ = ('key', 'limit', 'remaining', 'resetAt', 'lock')
+
+    def __init__(self, key):
+        self.key = key
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.resetAt: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    #-------------------------------------------------------------------------------------------
+    def reserve(self) -> float:
+        '''
+            Claim a slot in the bucket. Returns 0 if claimed, otherwise the seconds until reset.
+        '''
+        now = time.monotonic()
+
+        if self.resetAt is not None and now >= self.resetAt:
+            self.remaining = self.limit
+            self.resetAt = None
+
+        if self.remaining is None:
+            return 0
+
+        if self.remaining > 0:
+            self.remaining -= 1
+            return 0
+
+        return self.resetAt - now if self.resetAt is not None else 0
+
+    #-------------------------------------------------------------------------------------------
+    async def acquire(self) -> None:
+        '''
+            Wait until a slot is available. Requests queue up on the bucket lock so they are
+            released in order once the bucket resets.
+        '''
+        async with self.lock:
+            delay = self.reserve()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.reserve()
+
+    #-------------------------------------------------------------------------------------------
+    def update(self, headers) -> None:
+        '''
+            Update the bucket from the X-RateLimit headers of a response.
+        '''
+        if headers.get('X-RateLimit-Limit') is not None:
+            self.limit = int(headers.get('X-RateLimit-Limit'))
+
+        if headers.get('X-RateLimit-Remaining') is not None:
+            self.remaining = int(headers.get('X-RateLimit-Remaining'))
+
+        if headers.get('X-RateLimit-Reset-After') is not None:
+            self.resetAt = time.monotonic() + float(headers.get('X-RateLimit-Reset-After'))
+
+    #-------------------------------------------------------------------------------------------
+    def exhaust(self, retryAfter: float) -> None:
+        '''
+            Mark the bucket as empty until retryAfter seconds from now.
+        '''
+        self.remaining = 0
+        self.resetAt = time.monotonic() + retryAfter
+        if self.limit is None:
+            self.limit = 1
+
+#-----------------------------------------------------------------------------------------------------------
+class RateLimiter(object):
+    '''
+        Manages the per route rate limit buckets and the global rate limit for the request process.
+
+        Buckets are first keyed by route and major parameter. Once a response returns an
+        X-RateLimit-Bucket hash, every route sharing that hash and major parameter shares a bucket.
+
+        Attributes:
+            buckets (Dict): { (route or bucket hash, major), RateLimitBucket }
+            hashes (Dict): { route, bucket hash }
+            globalResetAt (float): time.monotonic() value at which the global rate limit is lifted.
+    '''
+    __slots__ = ('buckets', 'hashes', 'globalResetAt')
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[str, str], RateLimitBucket] = dict()
+        self.hashes: Dict[str, str] = dict()
+        self.globalResetAt: float = 0.0
+
+    #-------------------------------------------------------------------------------------------
+    def getBucket(self, method: str, url: str) -> RateLimitBucket:
+        route, major = routeKey(method, url)
+        key = (self.hashes.get(route, route), major)
+
+        if key not in self.buckets:
+            self.buckets[key] = RateLimitBucket(key)
+        return self.buckets[key]
+
+    #-------------------------------------------------------------------------------------------
+    async def acquire(self, bucket: RateLimitBucket) -> None:
+        '''
+            Wait for the global rate limit and then for a slot in the bucket.
+        '''
+        delay = self.globalResetAt - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await bucket.acquire()
+
+    #-------------------------------------------------------------------------------------------
+    def update(self, method: str, url: str, bucket: RateLimitBucket, headers) -> None:
+        '''
+            Update the bucket from the response headers and learn the bucket hash for the route.
+        '''
+        bucket.update(headers)
+
+        bucketHash = headers.get('X-RateLimit-Bucket')
+        if bucketHash is None:
+            return
+
+        route, major = routeKey(method, url)
+        if self.hashes.get(route) != bucketHash:
+            self.hashes[route] = bucketHash
+            self.buckets.setdefault((bucketHash, major), bucket)
+
+    #-------------------------------------------------------------------------------------------
+    def rateLimited(self, bucket: RateLimitBucket, headers) -> float:
+        '''
+            Handle a 429 response. Returns the number of seconds until the request may be retried.
+        '''
+        retryAfter = float(headers.get('Retry-After') or headers.get('X-RateLimit-Reset-After') or 1)
+
+        if headers.get('X-RateLimit-Global') or headers.get('X-RateLimit-Scope') == 'global':
+            self.globalResetAt = time.monotonic() + retryAfter
+        else:
+            bucket.exhaust(retryAfter)
+
+        return retryAfter
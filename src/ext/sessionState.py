@@ -0,0 +1,80 @@
+import time
+import multiprocessing
+
+from typing import Optional, Tuple
+
+__all__ = ['SessionState']
+
+# Indexes into the shared counters.
+SEQUENCE, UPDATED = 0, 1
+
+SESSION_ID_BYTES = 128
+RESUME_URL_BYTES = 512
+
+#-----------------------------------------------------------------------------------------------------------
+class SessionState(object):
+    '''
+        Gateway session of a shard in shared memory, created by the GatewayClient and handed to every
+        listener it starts for the shard.
+
+        The listener writes the session id and resume url on READY and the sequence with every dispatch,
+        so the values outlive the listener's process. When the process dies the GatewayClient starts the
+        replacement with the same SessionState, and the new listener resumes the session instead of
+        identifying.
+
+        There is one writer, the shard's listener. The values are plain shared memory without a lock, a
+        new listener only reads them after the previous one is gone.
+
+        Attributes:
+            counters (RawArray): The sequence (-1 for none) and the time of the last write in milliseconds.
+            sessionId (RawArray): The session id, empty when there is no session.
+            resumeUrl (RawArray): The resume_gateway_url of the session.
+    '''
+    __slots__ = ('counters', 'sessionId', 'resumeUrl')
+
+    def __init__(self, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.counters = ctx.RawArray('q', 2)
+        self.sessionId = ctx.RawArray('c', SESSION_ID_BYTES)
+        self.resumeUrl = ctx.RawArray('c', RESUME_URL_BYTES)
+        self.counters[SEQUENCE] = -1
+
+    #-------------------------------------------------------------------------------------------
+    def setSession(self, sessionId: str, resumeUrl: str) -> None:
+        self.sessionId.value = sessionId.encode()[:SESSION_ID_BYTES - 1]
+        self.resumeUrl.value = resumeUrl.encode()[:RESUME_URL_BYTES - 1]
+        self.touch()
+
+    def setSequence(self, sequence: Optional[int]) -> None:
+        self.counters[SEQUENCE] = sequence if sequence is not None else -1
+        self.counters[UPDATED] = int(time.time() * 1000)
+
+    def touch(self) -> None:
+        self.counters[UPDATED] = int(time.time() * 1000)
+
+    def clear(self) -> None:
+        '''
+            Forget the session, after an invalid session the shard has to identify.
+        '''
+        self.sessionId.value = b''
+        self.resumeUrl.value = b''
+        self.counters[SEQUENCE] = -1
+
+    #-------------------------------------------------------------------------------------------
+    def age(self) -> float:
+        '''
+            Seconds since the listener last wrote to the state.
+        '''
+        return time.time() - self.counters[UPDATED] / 1000
+
+    #-------------------------------------------------------------------------------------------
+    def load(self) -> Optional[Tuple[str, Optional[int], str]]:
+        '''
+            (session_id, sequence, resume_gateway_url), None when there is no session to resume.
+        '''
+        sessionId = self.sessionId.value.decode()
+        resumeUrl = self.resumeUrl.value.decode()
+        if not sessionId or not resumeUrl:
+            return None
+        sequence = self.counters[SEQUENCE]
+        return sessionId, sequence if sequence >= 0 else None, resumeUrl
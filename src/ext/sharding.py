@@ -0,0 +1,111 @@
+import time
+import asyncio
+import requests
+import config
+
+from multiprocessing import Lock, Array
+from typing import List
+
+__all__ = ['IdentifyLimiter', 'fetchGatewayBot', 'resolveShards', 'shardLayout']
+
+# Discord allows max_concurrency identifies per 5 second window.
+IDENTIFY_WINDOW = 5.0
+
+#-------------------------------------------------------------------------------------------
+def fetchGatewayBot() -> dict:
+    '''
+        Request the recommended shard count and identify limits from /gateway/bot.
+        Falls back to a single shard with a max_concurrency of 1 if the request fails.
+
+        {
+            "url": "wss://gateway.discord.gg",
+            "shards": 9,
+            "session_start_limit": {
+                "total": 1000,
+                "remaining": 999,
+                "reset_after": 14400000,
+                "max_concurrency": 1
+            }
+        }
+    '''
+    try:
+        response = requests.get("https://discord.com/api/v10/gateway/bot",
+                                headers={"Authorization": f"Bot {config.OPTS['botToken']}"},
+                                timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    except (requests.RequestException, ValueError):
+        return {"shards": 1, "session_start_limit": {"max_concurrency": 1}}
+
+#-------------------------------------------------------------------------------------------
+def resolveShards() -> tuple:
+    '''
+        The shard count and identify max_concurrency to run with.
+        The shard count comes from config.OPTS['shardCount'], or /gateway/bot when it is not set.
+    '''
+    shardCount = config.OPTS['shardCount']
+    if shardCount:
+        return shardCount, 1
+
+    gatewayInfo = fetchGatewayBot()
+    return gatewayInfo.get('shards', 1), gatewayInfo.get('session_start_limit', dict()).get('max_concurrency', 1)
+
+#-------------------------------------------------------------------------------------------
+def shardLayout(shardCount: int, procCount: int) -> List[List[int]]:
+    '''
+        Spread the shard ids over the given number of processes.
+        Shards are dealt out round robin so that consecutive shards, which share identify
+        buckets, end up in different processes.
+    '''
+    procCount = max(1, min(procCount, shardCount))
+    return [list(range(proc, shardCount, procCount)) for proc in range(procCount)]
+
+#-----------------------------------------------------------------------------------------------------------
+class IdentifyLimiter(object):
+    '''
+        Enforces the identify rate limit across every shard process.
+
+        Each shard belongs to the bucket `shard_id % max_concurrency`, and each bucket may only
+        identify once every 5 seconds. The timestamps of the last identify per bucket are kept in
+        shared memory so every shard process started from the gateway process sees the same state.
+
+        Attributes:
+            maxConcurrency (int): The max_concurrency value returned from /gateway/bot.
+            lock (Lock): Guards the shared timestamps.
+            lastIdentify (Array): Time of the last identify for each bucket.
+    '''
+    __slots__ = ('maxConcurrency', 'lock', 'lastIdentify')
+
+    def __init__(self, maxConcurrency: int = 1):
+        self.maxConcurrency: int = max(1, maxConcurrency)
+        self.lock = Lock()
+        self.lastIdentify = Array('d', self.maxConcurrency, lock=False)
+
+    #-------------------------------------------------------------------------------------------
+    def reserve(self, shardId: int) -> float:
+        '''
+            Try to claim the identify slot for the shard's bucket.
+            Returns 0 if the slot was claimed, otherwise the number of seconds to wait.
+        '''
+        bucket = shardId % self.maxConcurrency
+
+        with self.lock:
+            now = time.monotonic()
+            wait = self.lastIdentify[bucket] + IDENTIFY_WINDOW - now
+
+            if self.lastIdentify[bucket] == 0 or wait <= 0:
+                self.lastIdentify[bucket] = now
+                return 0
+
+        return wait
+
+    #-------------------------------------------------------------------------------------------
+    async def wait(self, shardId: int) -> None:
+        '''
+            Wait until the shard is allowed to identify.
+        '''
+        delay = self.reserve(shardId)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.reserve(shardId)
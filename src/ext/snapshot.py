@@ -0,0 +1,134 @@
+import os
+import mmap
+import time
+import pickle
+import struct
+
+from array import array
+from typing import Any, Dict, Optional, Tuple
+
+__all__ = ['writeSnapshot', 'Snapshot', 'SnapshotError']
+
+#-----------------------------------------------------------------------------------------------------------
+# Layout of a snapshot file:
+#
+#   header      -> MAGIC, version, section count, creation time
+#   directory   -> one entry per section: name, kind, array typecode, offset and length of its data
+#   data        -> the sections, pickles or the raw bytes of arrays
+#
+# Arrays are stored raw, so loading one is a copy out of the mapping instead of an unpickle.
+#-----------------------------------------------------------------------------------------------------------
+MAGIC = b'DSNP'
+VERSION = 1
+HEADER = struct.Struct('=4sHHd')
+ENTRY = struct.Struct('=32sBcQQ')
+
+PICKLED, ARRAY = 0, 1
+
+class SnapshotError(Exception):
+    '''
+        Raised when a snapshot file is not a snapshot or was written by another version.
+    '''
+
+#-------------------------------------------------------------------------------------------
+def writeSnapshot(path: str, sections: Dict[str, Any]) -> int:
+    '''
+        Write sections to path, arrays raw and anything else pickled.
+        The file is written next to path and renamed over it, a reader never sees a partial snapshot.
+        Returns the size of the file.
+    '''
+    blobs = list()
+    for name, value in sections.items():
+        if isinstance(value, array):
+            blobs.append((name, ARRAY, value.typecode.encode(), value.tobytes()))
+        else:
+            blobs.append((name, PICKLED, b' ', pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    offset = HEADER.size + ENTRY.size * len(blobs)
+    tmpPath = f"{path}.tmp"
+    with open(tmpPath, 'wb') as snapFile:
+        snapFile.write(HEADER.pack(MAGIC, VERSION, len(blobs), time.time()))
+        for name, kind, typecode, data in blobs:
+            snapFile.write(ENTRY.pack(name.encode(), kind, typecode, offset, len(data)))
+            offset += len(data)
+        for _, _, _, data in blobs:
+            snapFile.write(data)
+        snapFile.flush()
+        os.fsync(snapFile.fileno())
+
+    os.replace(tmpPath, path)
+    return offset
+
+#-----------------------------------------------------------------------------------------------------------
+class Snapshot(object):
+    '''
+        A snapshot file mapped into memory. Sections are only read when they are loaded.
+
+        Attributes:
+            path (str): The snapshot file.
+            created (float): Unix time the snapshot was written.
+            sections (Dict[str, Tuple[int, str, int, int]]): name -> (kind, typecode, offset, length).
+
+        Methods:
+            load(name) -> Any: The section, None if the snapshot doesn't have it.
+            age()      -> float: Seconds since the snapshot was written.
+            close()    -> None: Unmap the file.
+    '''
+    __slots__ = ('path', 'created', 'sections', 'mapping', 'snapFile')
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.snapFile = open(path, 'rb')
+        try:
+            self.mapping = mmap.mmap(self.snapFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.snapFile.close()
+            raise SnapshotError(f"Snapshot() - Empty snapshot file: {path}")
+
+        magic, version, count, self.created = HEADER.unpack_from(self.mapping, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError(f"Snapshot() - Not a version {VERSION} snapshot: {path}")
+
+        self.sections: Dict[str, Tuple[int, str, int, int]] = dict()
+        for n in range(count):
+            name, kind, typecode, offset, length = ENTRY.unpack_from(self.mapping, HEADER.size + n * ENTRY.size)
+            self.sections[name.rstrip(b'\0').decode()] = (kind, typecode.decode(), offset, length)
+
+    #-------------------------------------------------------------------------------------------
+    @classmethod
+    def open(cls, path: str) -> Optional['Snapshot']:
+        '''
+            The snapshot at path, None when there is none or it can't be read.
+        '''
+        try:
+            return cls(path)
+        except (OSError, SnapshotError, struct.error):
+            return None
+
+    #-------------------------------------------------------------------------------------------
+    def load(self, name: str) -> Any:
+        if name not in self.sections:
+            return None
+
+        kind, typecode, offset, length = self.sections[name]
+        with memoryview(self.mapping)[offset:offset + length] as data:
+            if kind == ARRAY:
+                loaded = array(typecode)
+                loaded.frombytes(data)
+                return loaded
+            return pickle.loads(data)
+
+    #-------------------------------------------------------------------------------------------
+    def age(self) -> float:
+        return time.time() - self.created
+
+    def close(self) -> None:
+        self.mapping.close()
+        self.snapFile.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
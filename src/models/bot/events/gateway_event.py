@@ -1,5 +1,6 @@
 import json
 import config
+from src.ext import etf
 from src.models.base import Base
 
 class GatewayEvent(Base):
@@ -29,8 +30,11 @@ class GatewayEvent(Base):
     def _to_payload(self) -> str:
         '''
             Convert the GatewayEvent to a payload.
+            Encoded as ETF bytes when the gateway is using the etf encoding, otherwise a JSON string.
         '''
         if self.checkPayloadSize():
+            if config.OPTS['gatewayEncoding'] == 'etf':
+                return etf.encode(self._to_dict())
             return json.dumps(self._to_dict())
         else:
             raise ValueError('Payload size is too large.')
@@ -2,6 +2,7 @@ from typing import List, Union, Dict, Generator, Any
 from typing_extensions import NotRequired, Self
 
 from src.models.base import Base
+from src.ext.filterCompiler import compileFilter
 from src.endpoints.message import ChannelMessage
 from tornado.httpclient import HTTPRequest
 from src.obj_types.proc_event import HttpEvent
@@ -63,70 +64,76 @@ class ListenerObject(Base):
         type -> The type of event to listen for
         filter -> The filters to apply to the event
         action -> The actions to take when the event is detected and passes the filters
+        keywordTags -> { filter index, tag } for the content keyword filters that are resolved by the shared KeywordMatcher
     '''
-    __slots__ = ('type', 'filters', 'actions', 'chanMessage')
+    __slots__ = ('type', 'filters', 'actions', 'chanMessage', 'keywordTags', 'predicates')
 
     def __init__(self, chanMessage, **kwargs):
         self.chanMessage = chanMessage
         self.type = kwargs.get('type')
         self.filters = [ListenerFilter(**x) for x in kwargs.get('filter')]
         self.actions = [ListenerAction(self.chanMessage, **x) for x in kwargs.get('actions')]
+        self.keywordTags = dict()
+        self.predicates = list()
+        self.compileFilters()
 
     #-------------------------------------------------------------------------------------------
-    def check(self, event: HttpEvent) -> bool:
+    def compileFilters(self) -> None:
         '''
-            Check the event against the listener's filters.
-            Use the generator created with self.checkFilters(event) and loop over it.
-            If any of the values are False, return False.
+            Compile the filters into predicates that read the fields straight off of the resource object.
+            Must be called again after keywordTags has been assigned so the content filters use the matched tags.
+        '''
+        self.predicates = list()
+        for filterIndex, filterObj in enumerate(self.filters):
+            self.predicates.extend(compileFilter(filterObj.condition, filterObj.fields, self.keywordTags.get(filterIndex)))
+
+    #-------------------------------------------------------------------------------------------
+    def check(self, event: HttpEvent, matched=None) -> bool:
+        '''
+            Check the event against the listener's compiled filters.
+            If any of the predicates fail, return False.
 
             event -> HTTP
+            matched -> Set of keyword tags found in the event's content by the KeywordMatcher, if one was run.
         '''
-        for result in self.checkFilters(event.data._to_dict()):
-            if not result:
+        if event.name != self.type:
+            return False
+
+        resource = event.data
+        for predicate in self.predicates:
+            if not predicate(resource, matched):
                 return False
         return True
 
     #-------------------------------------------------------------------------------------------
-    def checkFilters(self, event: Dict) -> Generator[bool, None, bool]:
+    def indexKey(self):
         '''
+            Return the (field, value) pair the listener can be indexed by, from the first equals
+            filter on a top level channel_id or guild_id. Returns (None, None) if there is none.
         '''
-        #----------------------------------------------------
-        # Check each filter
-        #----------------------------------------------------
         for filterObj in self.filters:
+            if filterObj.condition.lower() != "equals":
+                continue
 
-            for field_key, field_val in filterObj.fields.items():
-
-                result = self.traverseFields(event, field_key, field_val)
+            for field in ('channel_id', 'guild_id'):
+                value = filterObj.fields.get(field)
+                if value is not None and not isinstance(value, (dict, list)):
+                    return field, str(value)
 
-                if not result:
-                    yield False
+        return None, None
 
-                if filterObj.condition.lower() == "equals":
-                    yield result[0] == result[1]
-
-                elif filterObj.condition.lower() == "contains":
-                    yield result[1] in result[0]
-
-                elif filterObj.condition.lower() == "contains_any":
-                    for val in result[1]:
-                        yield val in result[0]
-
-
-    def traverseFields(self, obj: Any, key=None, val=None):
+    #-------------------------------------------------------------------------------------------
+    def keywordFilters(self) -> Generator[tuple, None, None]:
         '''
-            obj -> the event or section of the event being searched.
-            key -> the key from the filter field object that is being searched for in the event.
-            val -> the value from the filter field object that is being searched for in the event.
+            Yield (filter index, keywords) for every contains/contains_any filter on the content field.
+            A single keyword must be found, with a list any one of the keywords is enough.
         '''
-        # if the key is missing from the event obj, then anything inside the value
-        # will not be found either so return false.
-        if key not in obj:
-            return False
-
-        elif isinstance(val, dict):            
-            # the key does exist in the event, so loop to the next level.
-            for k, v in val.items():
-                return self.traverseFields(obj[key], k, v)
-        else:
-            return [obj[key], val]
\ No newline at end of file
+        for filterIndex, filterObj in enumerate(self.filters):
+            if filterObj.condition.lower() not in ("contains", "contains_any"):
+                continue
+
+            keywords = filterObj.fields.get('content')
+            if isinstance(keywords, str):
+                yield filterIndex, [keywords]
+            elif isinstance(keywords, list):
+                yield filterIndex, [str(x) for x in keywords]
@@ -80,7 +80,8 @@ __all__ = ['PartialMessage',
             'MessageReactionRemove',
             'MessageReactionAdd',
             'MessageReactionRemoveAll',
-            'MessageReactionRemoveEmoji']
+            'MessageReactionRemoveEmoji',
+            'MessageDeleteBulk']
 
 #-----------------------------------------------------------------------------------------------------------------
 class PartialMessage(BaseResourceObject):
@@ -550,4 +551,17 @@ class MessageReactionRemoveEmoji(BaseResourceObject):
         self.channel_id: Snowflake          = kwargs.get('channel_id')
         self.message_id: Snowflake          = kwargs.get('message_id')
         self.guild_id: Optional[Snowflake]  = kwargs.get('guild_id', None)
-        self.emoji: PartialEmoji            = Emoji(**kwargs.get('emoji'))
\ No newline at end of file
+        self.emoji: PartialEmoji            = Emoji(**kwargs.get('emoji'))
+
+#-----------------------------------------------------------------------------------------------------------------
+class MessageDeleteBulk(BaseResourceObject):
+    __slots__ = (
+        'ids',
+        'channel_id',
+        'guild_id'
+    )
+
+    def __init__(self, **kwargs):
+        self.ids: List[Snowflake]           = kwargs.get('ids', list())
+        self.channel_id: Snowflake          = kwargs.get('channel_id')
+        self.guild_id: Optional[Snowflake]  = kwargs.get('guild_id', None)
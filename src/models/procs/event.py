@@ -1,6 +1,6 @@
 from src.models.base import Base, BaseResourceObject
 
-__all__ = ['ProcessEvent', 'LogEvent', 'HttpEvent']
+__all__ = ['ProcessEvent', 'LogEvent', 'LogBatch', 'HttpEvent', 'HandlerEvent']
 
 class BaseProcEvent(Base):
     __slots__ = ('action')
@@ -15,12 +15,25 @@ class ProcessEvent(BaseProcEvent):
         self.processName: str = kwargs.get('processName', "")
 
 class LogEvent(BaseProcEvent):
-    __slots__ = ('level', 'message')
+    '''
+        Component is the LoggerClient logger the message is written to (GATEWAY, HTTP, HANDLER, ...).
+    '''
+    __slots__ = ('component', 'level', 'message')
     def __init__(self, level = "DEBUG", message = "", **kwargs):
         super().__init__(**kwargs)
+        self.component: str = kwargs.get('component', "HANDLER")
         self.level: str = level
         self.message: str = message
 
+class LogBatch(BaseProcEvent):
+    '''
+        Events is a list of LogEvents collected by a ProcLogger and shipped to the LOGGER queue together.
+    '''
+    __slots__ = ('events')
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events: list = kwargs.get('events', list())
+
 class HttpEvent(BaseProcEvent):
     '''
         Name is the GatewayEvent type.
@@ -30,4 +43,21 @@ class HttpEvent(BaseProcEvent):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name: str = kwargs.get('name', "")
-        self.data: BaseResourceObject = kwargs.get('data')
\ No newline at end of file
+        self.data: BaseResourceObject = kwargs.get('data')
+
+class HandlerEvent(BaseProcEvent):
+    '''
+        EventType is the GatewayEvent type.
+        ResourceObject is the resource object that represents the payload of the Gateway Event.
+        Shard is the id of the shard that received the event.
+        Raw is the gateway payload as received when gatewayForwardRaw is on, the handler builds the resource from it.
+        Partition is the guild (or channel) id the HandlerPool routes a raw event by.
+    '''
+    __slots__ = ('eventType', 'resourceObject', 'shard', 'raw', 'partition')
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.eventType: str = kwargs.get('eventType', "")
+        self.resourceObject: BaseResourceObject = kwargs.get('resourceObject')
+        self.shard: int = kwargs.get('shard', 0)
+        self.raw = kwargs.get('raw')
+        self.partition: str = kwargs.get('partition')
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+import config
+
+from types import SimpleNamespace
+
+asyncBot = pytest.importorskip('src.app.asyncBot', exc_type=ImportError)
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+class Log(object):
+    def __init__(self):
+        self.errors = list()
+
+    def error(self, message, *args) -> None:
+        self.errors.append(message() if callable(message) else message)
+
+class Listener(object):
+    '''
+        A shard that fails on its first connection and then runs until it is told to stop.
+    '''
+    started = list()
+
+    def __init__(self, *args, shard_id=0, sessionState=None, **kwargs):
+        self.listenerQueue = args[6]
+        self.shard_id = shard_id
+        self.sessionState = sessionState
+        self.log = Log()
+
+    async def socketClient(self) -> None:
+        Listener.started.append(self)
+        if sum(1 for x in Listener.started if x.shard_id == self.shard_id) == 1:
+            raise ConnectionError("connection refused")
+        while await self.listenerQueue.get() is not None:
+            pass
+
+class Handler(object):
+    '''
+        A handler that fails on its first event.
+    '''
+    def __init__(self, *args, **kwargs):
+        self.log = Log()
+        self.handled = list()
+        self.snapshots = 0
+
+    def restoreSnapshot(self) -> None:
+        pass
+
+    def writeSnapshot(self) -> None:
+        self.snapshots += 1
+
+    def dispatch(self, event) -> None:
+        if not self.handled:
+            self.handled.append(None)
+            raise KeyError(event.eventType)
+        self.handled.append(event.eventType)
+
+class RequestClient(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def asyncRequest(self, requestQueue, httpResponseQueue) -> None:
+        while await requestQueue.get() is not None:
+            pass
+
+@pytest.fixture
+def bot(monkeypatch, tmp_path):
+    monkeypatch.setitem(config.OPTS, 'shardCount', 2)
+    monkeypatch.setitem(config.OPTS, 'database', None)
+    monkeypatch.setitem(config.OPTS, 'logLevel', 'INFO')
+    monkeypatch.setitem(config.OPTS, 'logFile', {key: str(tmp_path / f'{key}.log') for key in ('DB', 'GATEWAY', 'HTTP', 'LISTENERS', 'COMMANDS', 'HANDLER')})
+    monkeypatch.setattr(asyncBot, 'GatewayListener', Listener)
+    monkeypatch.setattr(asyncBot, 'LocalRequestClient', RequestClient)
+    monkeypatch.setattr(asyncBot, 'SHARD_RESTART_DELAY', 0)
+    Listener.started = list()
+
+    handlers = list()
+    monkeypatch.setattr(asyncBot, 'HandlerClient', lambda *args, **kwargs: handlers.append(Handler()) or handlers[-1])
+    return asyncBot.AsyncBotClient(), handlers
+
+#-------------------------------------------------------------------------------
+#   Start and stop
+#-------------------------------------------------------------------------------
+def test_start_supervise_and_stop(bot) -> None:
+    '''
+        Every component should start, failed shards and events should not take the bot down, and stop()
+        should end every task.
+    '''
+    client, handlers = bot
+
+    async def scenario() -> None:
+        running = asyncio.create_task(client.run())
+        while len(Listener.started) < 4:
+            await asyncio.sleep(0.01)
+
+        client.queues['HANDLER'].put_nowait(SimpleNamespace(action='', eventType='INTERACTION_CREATE'))
+        client.queues['HANDLER'].put_nowait(SimpleNamespace(action='', eventType='MESSAGE_CREATE'))
+        await client.queues['HANDLER'].join()
+
+        client.stop()
+        await asyncio.wait_for(running, timeout=5)
+
+    asyncio.run(scenario())
+
+    handler = handlers[0]
+    assert handler.handled == [None, 'MESSAGE_CREATE'] and handler.snapshots == 1
+    assert any('INTERACTION_CREATE' in line for line in handler.log.errors)
+
+    # Each shard failed once and was restarted with the same SessionState.
+    assert sorted(x.shard_id for x in Listener.started) == [0, 0, 1, 1]
+    assert Listener.started[0].sessionState is next(x for x in Listener.started[1:] if x.shard_id == Listener.started[0].shard_id).sessionState
+    assert all(task.done() for task in client.tasks)
@@ -0,0 +1,94 @@
+import time
+import queue
+from types import SimpleNamespace
+
+from src.app.boundedQueue import BoundedQueue
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def event(eventType: str, n: int = 0):
+    return SimpleNamespace(eventType=eventType, n=n)
+
+def drain(boundedQueue: BoundedQueue) -> list:
+    # Give the feeder thread time to flush the buffered puts onto the pipe.
+    time.sleep(0.1)
+    events = list()
+    while boundedQueue.depth():
+        events.append(boundedQueue.get(timeout=1))
+        boundedQueue.task_done()
+    return events
+
+#-------------------------------------------------------------------------------
+#   Overload policies
+#-------------------------------------------------------------------------------
+def test_drop_oldest() -> None:
+    '''
+        A full drop_oldest queue should drop its oldest events to make room.
+    '''
+    boundedQueue = BoundedQueue('TEST', capacity=3, policy='drop_oldest')
+    for n in range(5):
+        boundedQueue.put_nowait(event('MESSAGE_CREATE', n))
+
+    assert [x.n for x in drain(boundedQueue)] == [2, 3, 4]
+    assert boundedQueue.stats()['shed'] == 2
+
+def test_drop_by_type() -> None:
+    '''
+        Shed types should be dropped once the queue is past shedAt, other events should still fit.
+    '''
+    boundedQueue = BoundedQueue('TEST', capacity=4, policy='drop_by_type', shedTypes=['TYPING_START'], shedAt=0.5)
+    boundedQueue.put_nowait(event('TYPING_START', 0))
+    boundedQueue.put_nowait(event('MESSAGE_CREATE', 1))
+    boundedQueue.put_nowait(event('TYPING_START', 2))
+    boundedQueue.put_nowait(event('MESSAGE_CREATE', 3))
+
+    assert [x.n for x in drain(boundedQueue)] == [0, 1, 3]
+    assert boundedQueue.stats()['shed'] == 1
+
+def test_spill_keeps_order(tmp_path) -> None:
+    '''
+        Events that don't fit should spill to disk and come back after the queued events, in order.
+    '''
+    boundedQueue = BoundedQueue('TEST', capacity=2, policy='spill', spillDir=str(tmp_path))
+    for n in range(6):
+        boundedQueue.put_nowait(event('MESSAGE_CREATE', n))
+
+    stats = boundedQueue.stats()
+    assert stats['spilled'] == 4 and stats['depth'] == 6
+
+    assert [x.n for x in drain(boundedQueue)] == [0, 1, 2, 3, 4, 5]
+    assert (tmp_path / 'TEST.spill').stat().st_size == 0
+
+    boundedQueue.join()
+
+def test_put_nowait_never_waits() -> None:
+    '''
+        A full block queue should shed put_nowait() events instead of waiting, put() with a timeout gives up.
+    '''
+    boundedQueue = BoundedQueue('TEST', capacity=2, policy='block')
+    for n in range(4):
+        boundedQueue.put_nowait(event('MESSAGE_CREATE', n))
+
+    try:
+        boundedQueue.put(event('MESSAGE_CREATE', 4), timeout=0.05)
+        assert False, "put() should have timed out"
+    except queue.Full:
+        pass
+
+    stats = boundedQueue.stats()
+    assert (stats['shed'], stats['blocked']) == (2, 1)
+    assert [x.n for x in drain(boundedQueue)] == [0, 1]
+
+def test_control_events_are_never_shed() -> None:
+    '''
+        drop_oldest should keep a queued STOP and shed the events around it.
+    '''
+    boundedQueue = BoundedQueue('TEST', capacity=3, policy='drop_oldest')
+    boundedQueue.put_nowait(SimpleNamespace(action='STOP', n=-1))
+    for n in range(5):
+        boundedQueue.put_nowait(event('MESSAGE_CREATE', n))
+
+    events = drain(boundedQueue)
+    assert len(events) == 3 and events[-1].n == 4
+    assert [x.action for x in events if x.n == -1] == ['STOP']
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from src.ext.commandRouter import CommandRouter
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def router(prefix: str = "!") -> CommandRouter:
+    add = SimpleNamespace(aliases=['new'], subcommands=None)
+    links = SimpleNamespace(aliases=['link'], subcommands={'add': add})
+    commandRouter = CommandRouter(prefix)
+    commandRouter.registerActions({'links': links, 'help': SimpleNamespace()})
+    return commandRouter
+
+#-------------------------------------------------------------------------------
+#   Routing
+#-------------------------------------------------------------------------------
+def test_non_commands_rejected() -> None:
+    '''
+        Messages without the prefix should not be routed at all.
+    '''
+    commandRouter = router()
+    assert commandRouter.route("hello there") is None
+    assert commandRouter.route("") is None
+    assert not commandRouter.isCommand("links")
+
+def test_aliases_and_subcommands() -> None:
+    '''
+        The deepest matching subcommand should win and the view should split path from args.
+    '''
+    commandRouter = router()
+    links = commandRouter.root.children['links'].action
+
+    action, view = commandRouter.route("!link   https://example.com")
+    assert action is links
+    assert view.path == ['link'] and view.args == ['https://example.com']
+
+    action, view = commandRouter.route("!links new https://example.com title")
+    assert action is links.subcommands['add']
+    assert view.path == ['links', 'new'] and view.rest() == "https://example.com title"
+
+def test_unknown_command_and_long_prefix() -> None:
+    '''
+        Unknown commands keep the view but have no action, longer prefixes are checked in full.
+    '''
+    action, view = router().route("!nope 1")
+    assert action is None and view.tokens == ['nope', '1']
+
+    commandRouter = router("$$")
+    assert commandRouter.route("$help") is None
+    assert commandRouter.route("$$help")[0] is commandRouter.root.children['help'].action
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+from src.ext.entityCache import EntityCache, EntityStore
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def member(userId, roles=()):
+    return SimpleNamespace(user=SimpleNamespace(id=userId, username=f'user{userId}'), roles=list(roles))
+
+def guildCreate(guildId='1', channels=('10', '11'), roles=('100', '101'), members=('1000', '1001')):
+    return SimpleNamespace(id=guildId,
+                           name='guild',
+                           unavailable=False,
+                           channels=[SimpleNamespace(id=x, guild_id=None) for x in channels],
+                           threads=[],
+                           roles=[SimpleNamespace(id=x) for x in roles],
+                           members=[member(x) for x in members])
+
+#-------------------------------------------------------------------------------
+#   Stores
+#-------------------------------------------------------------------------------
+def test_store_evicts_least_recently_written() -> None:
+    store = EntityStore('test', maxEntries=2)
+    store.put('a', 1)
+    store.put('b', 2)
+    store.put('a', 3)
+    store.put('c', 4)
+
+    assert 'b' not in store
+    assert store.get('a') == 3 and store.get('c') == 4
+    assert store.stats()['evicted'] == 1
+
+#-------------------------------------------------------------------------------
+def test_disabled_store_ignores_writes() -> None:
+    cache = EntityCache({'members': {'enabled': False}})
+    cache.update('GUILD_CREATE', guildCreate())
+
+    assert cache.getMember('1', '1000') is None
+    assert cache.getChannel('10') is not None
+    assert 'GUILD_MEMBER_ADD' not in cache.eventTypes
+
+#-------------------------------------------------------------------------------
+#   Guild lifecycle
+#-------------------------------------------------------------------------------
+def test_guild_create_fills_every_store() -> None:
+    cache = EntityCache()
+    event = guildCreate()
+    cache.update('GUILD_CREATE', event)
+
+    guild = cache.getGuild(1)
+    assert guild.name == 'guild' and guild.members is None
+    assert len(event.members) == 2 and len(event.channels) == 2
+    assert sorted(x.id for x in cache.guildChannels('1')) == ['10', '11']
+    assert sorted(x.id for x in cache.guildRoles('1')) == ['100', '101']
+    assert cache.getMember('1', 1001).user_id == '1001'
+
+#-------------------------------------------------------------------------------
+def test_guild_update_replaces_roles() -> None:
+    cache = EntityCache()
+    cache.update('GUILD_CREATE', guildCreate())
+    cache.update('GUILD_UPDATE', SimpleNamespace(id='1', name='renamed', roles=[SimpleNamespace(id='102')]))
+
+    assert cache.getGuild('1').name == 'renamed'
+    assert [x.id for x in cache.guildRoles('1')] == ['102']
+    assert cache.getRole('100') is None
+    assert len(cache.guildChannels('1')) == 2
+
+#-------------------------------------------------------------------------------
+def test_guild_delete() -> None:
+    cache = EntityCache()
+    cache.update('GUILD_CREATE', guildCreate())
+    cache.update('GUILD_CREATE', guildCreate('2', channels=('20',), roles=(), members=('2000',)))
+
+    cache.update('GUILD_DELETE', SimpleNamespace(id='1', unavailable=True))
+    assert cache.getGuild('1') is not None
+
+    cache.update('GUILD_DELETE', SimpleNamespace(id='1', unavailable=False))
+    assert cache.getGuild('1') is None
+    assert cache.getChannel('10') is None and cache.getRole('100') is None
+    assert cache.getMember('1', '1000') is None
+    assert cache.getMember('2', '2000') is not None and cache.getChannel('20') is not None
+
+#-------------------------------------------------------------------------------
+#   Entity events
+#-------------------------------------------------------------------------------
+def test_channel_role_and_member_events() -> None:
+    cache = EntityCache()
+    cache.update('GUILD_CREATE', guildCreate())
+
+    cache.update('CHANNEL_CREATE', SimpleNamespace(id='12', guild_id='1'))
+    cache.update('THREAD_CREATE', SimpleNamespace(id='13', guild_id='1'))
+    cache.update('CHANNEL_DELETE', SimpleNamespace(id='10', guild_id='1'))
+    assert sorted(x.id for x in cache.guildChannels('1')) == ['11', '12', '13']
+
+    cache.update('GUILD_ROLE_UPDATE', SimpleNamespace(guild_id='1', role=SimpleNamespace(id='100', name='mod')))
+    cache.update('GUILD_ROLE_DELETE', SimpleNamespace(guild_id='1', role_id='101'))
+    assert [x.name for x in cache.guildRoles('1')] == ['mod']
+
+    cache.update('GUILD_MEMBER_ADD', SimpleNamespace(guild_id='1', user=SimpleNamespace(id='1002', username='x'), roles=['100']))
+    cache.update('GUILD_MEMBER_REMOVE', SimpleNamespace(guild_id='1', user=SimpleNamespace(id='1000')))
+    assert cache.getMember('1', '1002').roles == ('100',)
+    assert cache.getMember('1', '1000') is None
+
+#-------------------------------------------------------------------------------
+def test_unrelated_events_are_ignored() -> None:
+    cache = EntityCache()
+    cache.update('MESSAGE_CREATE', SimpleNamespace(id='5', guild_id='1'))
+    assert all(stats['entries'] == 0 for stats in cache.stats().values())
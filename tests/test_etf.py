@@ -0,0 +1,57 @@
+import struct
+import pytest
+
+from src.ext.etf import ETFDecoder, ETFEncoder, ETFError
+
+#-------------------------------------------------------------------------------
+#   Encode and decode gateway payloads
+#-------------------------------------------------------------------------------
+def test_roundtrip_payload() -> None:
+    '''
+        A payload encoded by the bot should decode back to the same values.
+    '''
+    payload = {
+        "op": 2,
+        "s": None,
+        "d": {
+            "token": "abc",
+            "large": False,
+            "intents": 3276799,
+            "shard": [0, 1],
+            "negative": -12,
+            "ratio": 0.5,
+            "properties": {"os": "linux", "emoji": "🐿"},
+            "empty": []
+        }
+    }
+    data = ETFEncoder().encode(payload)
+    assert data[0] == 131
+    assert ETFDecoder(data).decode() == payload
+
+def test_snowflake_decoded_as_int() -> None:
+    '''
+        Snowflakes are sent as SMALL_BIG_EXT and should decode straight to int.
+    '''
+    snowflake = 1297327176697253972
+    data = ETFEncoder().encode({"id": snowflake})
+    assert struct.pack('>B', 110) in data
+
+    decoded = ETFDecoder(data).decode()
+    assert decoded["id"] == snowflake
+    assert isinstance(decoded["id"], int)
+
+def test_decode_atoms_and_strings() -> None:
+    '''
+        Atom keys, nil and STRING_EXT values should decode to python values.
+    '''
+    data = bytes([131, 116, 0, 0, 0, 2,
+                  100, 0, 1]) + b't' + bytes([100, 0, 3]) + b'nil' \
+         + bytes([119, 1]) + b'd' + bytes([107, 0, 2]) + b'hi'
+    assert ETFDecoder(data).decode() == {"t": None, "d": "hi"}
+
+def test_invalid_payload() -> None:
+    '''
+        Payloads without the version byte should raise an ETFError.
+    '''
+    with pytest.raises(ETFError):
+        ETFDecoder(b'\x00\x01').decode()
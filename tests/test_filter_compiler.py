@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from src.ext.filterCompiler import compileFilter, flattenFields
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def passes(predicates, resource, matched=None) -> bool:
+    return all(predicate(resource, matched) for predicate in predicates)
+
+def message(**kwargs):
+    fields = {'channel_id': '1297327176697253972', 'content': 'a patent for a bot', 'author': SimpleNamespace(id='343235146389913601'), 'resolved': {'channel': 'general'}}
+    fields.update(kwargs)
+    return SimpleNamespace(**fields)
+
+#-------------------------------------------------------------------------------
+#   Compiled filters
+#-------------------------------------------------------------------------------
+def test_flatten_fields() -> None:
+    '''
+        Nested filter fields should become attribute paths.
+    '''
+    assert flattenFields({'channel_id': '1', 'author': {'id': '2'}}) == [(('channel_id',), '1'), (('author', 'id'), '2')]
+
+def test_equals_nested_and_snowflake() -> None:
+    '''
+        equals should follow nested attributes and match ETF int snowflakes against quoted ids.
+    '''
+    predicates = compileFilter('equals', {'author': {'id': '343235146389913601'}})
+    assert passes(predicates, message())
+    assert passes(predicates, message(author=SimpleNamespace(id=343235146389913601)))
+    assert not passes(predicates, message(author=SimpleNamespace(id='1')))
+    assert not passes(predicates, message(author=None))
+
+def test_contains_conditions() -> None:
+    '''
+        contains and contains_any should check the field for any of the values.
+    '''
+    assert passes(compileFilter('contains', {'content': 'patent'}), message())
+    assert passes(compileFilter('CONTAINS_ANY', {'content': ['turvy', 'bot']}), message())
+    assert not passes(compileFilter('contains', {'content': ['turvy', 'alligator']}), message())
+
+def test_missing_field_and_dict_path() -> None:
+    '''
+        Missing fields fail the filter, paths through dicts fall back to key lookups.
+    '''
+    assert not passes(compileFilter('equals', {'guild_id': '1'}), message())
+    assert passes(compileFilter('equals', {'resolved': {'channel': 'general'}}), message())
+
+def test_keyword_tag() -> None:
+    '''
+        Content filters with a keyword tag should be answered from the matched tags.
+    '''
+    predicates = compileFilter('contains', {'content': ['turvy']}, keywordTag=(0, 0))
+    assert passes(predicates, message(), matched={(0, 0)})
+    assert not passes(predicates, message(), matched=set())
+    assert not passes(predicates, message())
@@ -0,0 +1,40 @@
+import json
+
+from src.ext.framePeek import peekHeader
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+MESSAGE = {'id': '1404889758995578921', 'channel_id': '1297327176697253972', 'guild_id': '1297327176697253000',
+           'content': '"op":9 "t":"READY"', 'author': {'id': '343235146389913601'}}
+
+def payload(op=0, t='MESSAGE_CREATE', s=42, d=MESSAGE) -> str:
+    return json.dumps({'t': t, 's': s, 'op': op, 'd': d}, separators=(',', ':'))
+
+#-------------------------------------------------------------------------------
+#   Header peeking
+#-------------------------------------------------------------------------------
+def test_dispatch_header() -> None:
+    '''
+        The header should be read from ahead of "d" for both text and bytes frames.
+    '''
+    for frame in (payload(), payload().encode()):
+        header = peekHeader(frame)
+        assert (header.op, header.t, header.s, header.partition) == (0, 'MESSAGE_CREATE', 42, '1297327176697253000')
+
+def test_null_fields_and_dm_partition() -> None:
+    '''
+        Non dispatch events have null t and s, DMs are partitioned by channel.
+    '''
+    header = peekHeader(payload(op=11, t=None, s=None, d=None))
+    assert (header.op, header.t, header.s, header.partition) == (11, None, None, None)
+
+    header = peekHeader(payload(d={'channel_id': '5', 'content': 'hi'}))
+    assert header.partition == '5'
+
+def test_fallback_when_data_first() -> None:
+    '''
+        Payloads with "d" ahead of the header, or that aren't JSON, can't be peeked.
+    '''
+    assert peekHeader(json.dumps({'d': MESSAGE, 'op': 0, 's': 1, 't': 'MESSAGE_CREATE'})) is None
+    assert peekHeader(b'\x83t\x00\x00\x00\x04') is None
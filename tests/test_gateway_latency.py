@@ -0,0 +1,56 @@
+import multiprocessing
+
+from src.ext.gatewayLatency import GatewayLatency
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def shard(latency: GatewayLatency, shardId: int) -> None:
+    for ms in range(1, 101):
+        latency.add(shardId, ms / 1000)
+    latency.missed()
+
+#-------------------------------------------------------------------------------
+#   Percentiles
+#-------------------------------------------------------------------------------
+def test_empty_window() -> None:
+    assert GatewayLatency(8).percentiles() == {'samples': 0, 'p50': None, 'p99': None, 'last': None, 'missed': 0}
+
+#-------------------------------------------------------------------------------
+def test_percentiles_of_the_window() -> None:
+    latency = GatewayLatency(100)
+    for ms in range(100, 0, -1):
+        latency.add(0, ms / 1000)
+
+    stats = latency.percentiles()
+    assert stats['samples'] == 100
+    assert stats['p50'] == 51.0
+    assert stats['p99'] == 100.0
+    assert stats['last'] == 1.0
+
+#-------------------------------------------------------------------------------
+def test_window_keeps_the_latest_samples() -> None:
+    latency = GatewayLatency(4)
+    for ms in range(1, 11):
+        latency.add(ms % 2, ms / 1000)
+
+    assert latency.window() == [7000, 8000, 9000, 10000]
+    assert latency.window(shardId=1) == [7000, 9000]
+    assert latency.percentiles(shardId=0)['last'] == 10.0
+
+#-------------------------------------------------------------------------------
+#   Sharing
+#-------------------------------------------------------------------------------
+def test_samples_from_shard_processes() -> None:
+    latency = GatewayLatency(256)
+    procs = [multiprocessing.Process(target=shard, args=(latency, shardId)) for shardId in range(2)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    stats = latency.percentiles()
+    assert stats['samples'] == 200
+    assert stats['missed'] == 2
+    assert stats['p99'] == 100.0
+    assert latency.percentiles(shardId=1)['samples'] == 100
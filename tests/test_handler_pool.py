@@ -0,0 +1,93 @@
+import pytest
+
+from collections import Counter
+from queue import Queue
+from types import SimpleNamespace
+
+from src.ext.hashRing import HashRing
+from src.app.handlerPool import HandlerPool, partitionKey, dataKey
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def event(guild_id=None, channel_id=None):
+    return SimpleNamespace(eventType='MESSAGE_CREATE', resourceObject=SimpleNamespace(guild_id=guild_id, channel_id=channel_id))
+
+#-------------------------------------------------------------------------------
+#   Consistent hashing
+#-------------------------------------------------------------------------------
+def test_ring_spreads_and_is_stable() -> None:
+    '''
+        Keys should spread over all members and only move off of a removed member.
+    '''
+    ring = HashRing(range(4))
+    keys = [str(1297327176697253000 + x) for x in range(2000)]
+    before = {key: ring.lookup(key) for key in keys}
+
+    counts = Counter(before.values())
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 250
+
+    ring.remove(3)
+    after = {key: ring.lookup(key) for key in keys}
+    assert all(after[key] == before[key] for key in keys if before[key] != 3)
+
+def test_pool_keeps_guild_order() -> None:
+    '''
+        Every event of a guild should land on the same queue in order, DMs go by channel.
+    '''
+    queues = [Queue() for _ in range(3)]
+    pool = HandlerPool(queues)
+
+    for n in range(10):
+        pool.put_nowait(event(guild_id='1297327176697253000'))
+        pool.put_nowait(event(channel_id=f'{n}'))
+    pool.put_nowait(SimpleNamespace(action="STOP"))
+
+    guildQueue = pool.queueFor(event(guild_id='1297327176697253000'))
+    assert sum(1 for x in guildQueue.queue if getattr(x, 'resourceObject', None) and x.resourceObject.guild_id) == 10
+    assert sum(x.qsize() for x in queues) == 21
+    assert queues[0].queue[-1].action == "STOP"
+
+def test_guild_events_follow_the_guild() -> None:
+    '''
+        GUILD_CREATE/UPDATE/DELETE only carry the guild's id, they should land with the guild's other events.
+    '''
+    pool = HandlerPool([Queue() for _ in range(4)])
+    guildIds = [str(1297327176697253000 + x) for x in range(50)]
+
+    for guildId in guildIds:
+        guildQueue = pool.queueFor(event(guild_id=guildId))
+        for eventType in ('GUILD_CREATE', 'GUILD_UPDATE', 'GUILD_DELETE'):
+            assert pool.queueFor(SimpleNamespace(eventType=eventType, resourceObject=SimpleNamespace(id=guildId))) is guildQueue
+        assert pool.queueFor(SimpleNamespace(eventType='GUILD_MEMBER_ADD', resourceObject=SimpleNamespace(id='1', guild_id=guildId))) is guildQueue
+        assert dataKey('GUILD_CREATE', {'id': guildId, 'channels': [{'id': '5'}]}) == guildId
+
+    # Only guild events fall back to the id.
+    assert partitionKey(SimpleNamespace(eventType='MESSAGE_DELETE', resourceObject=SimpleNamespace(id='7', channel_id='5'))) == '5'
+    assert dataKey('CHANNEL_CREATE', {'id': '7', 'channel_id': None}) is None
+
+def test_guild_create_resource() -> None:
+    '''
+        A real GuildCreate is partitioned by its id.
+    '''
+    guild = pytest.importorskip('src.models.bot.resources.guild')
+    guildCreate = guild.GuildCreate(id='1297327176697253000', name='guild', emojis=[], roles=[], features=[],
+                                    voice_states=[], members=[], channels=[], threads=[], presences=[],
+                                    stage_instances=[], guild_scheduled_events=[], soundboard_sounds=[])
+
+    assert partitionKey(SimpleNamespace(eventType='GUILD_CREATE', resourceObject=guildCreate)) == '1297327176697253000'
+
+def test_assigned_keys_are_bounded() -> None:
+    '''
+        Only the most recently seen keys are remembered, a key keeps its handler when it comes back.
+    '''
+    pool = HandlerPool([Queue() for _ in range(3)], maxAssigned=8)
+    first = pool.queueFor(event(channel_id='0'))
+
+    for n in range(1, 100):
+        pool.queueFor(event(channel_id=str(n)))
+
+    assert len(pool.assigned) == 8
+    assert '0' not in pool.assigned
+    assert pool.queueFor(event(channel_id='0')) is first
@@ -0,0 +1,58 @@
+import json
+import zlib
+
+from src.ext.inflator import ZlibStreamInflator, ZLIB_SUFFIX
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def compress_frames(payloads) -> list:
+    '''
+        Compress each payload with a shared zlib context the way the gateway does.
+    '''
+    compressor = zlib.compressobj()
+    frames = list()
+    for payload in payloads:
+        data = compressor.compress(json.dumps(payload).encode('utf-8'))
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        frames.append(data)
+    return frames
+
+#-------------------------------------------------------------------------------
+#   Check the inflator against zlib-stream frames
+#-------------------------------------------------------------------------------
+def test_inflate_complete_frames() -> None:
+    '''
+        Each complete frame should decompress using the shared context.
+    '''
+    payloads = [{"op": 10, "d": {"heartbeat_interval": 41250}}, {"op": 11, "d": None}]
+    inflator = ZlibStreamInflator()
+
+    for frame, payload in zip(compress_frames(payloads), payloads):
+        assert frame.endswith(ZLIB_SUFFIX)
+        assert json.loads(inflator.feed(frame)) == payload
+
+def test_inflate_split_frame() -> None:
+    '''
+        A frame split across messages should only be returned once the suffix arrives.
+    '''
+    payload = {"op": 0, "t": "GUILD_CREATE", "d": {"members": ["x" * 50] * 200}}
+    frame = compress_frames([payload])[0]
+    inflator = ZlibStreamInflator()
+
+    assert inflator.feed(frame[:10]) is None
+    assert inflator.feed(frame[10:-2]) is None
+    assert json.loads(inflator.feed(frame[-2:])) == payload
+    assert len(inflator.buffer) == 0
+
+def test_inflate_reset() -> None:
+    '''
+        Resetting the inflator should allow a new connection's stream to be read.
+    '''
+    inflator = ZlibStreamInflator()
+    inflator.feed(compress_frames([{"op": 10}])[0])
+    inflator.feed(b'partial')
+
+    inflator.reset()
+    assert len(inflator.buffer) == 0
+    assert json.loads(inflator.feed(compress_frames([{"op": 9}])[0])) == {"op": 9}
@@ -0,0 +1,44 @@
+from src.ext.keywordMatcher import KeywordMatcher
+
+#-------------------------------------------------------------------------------
+#   Check the automaton against a plain substring scan
+#-------------------------------------------------------------------------------
+def naive_search(keywords, text) -> set:
+    return {tag for keyword, tag in keywords if keyword in text}
+
+def test_matches_listener_keywords() -> None:
+    '''
+        Keywords from several listeners should be reported by their tags in one pass.
+    '''
+    keywords = [('patent', 0), ('turvy', 0), ('alligator', 0), ('bad bot', 1), ('good bot', 2)]
+    matcher = KeywordMatcher()
+    for keyword, tag in keywords:
+        matcher.add(keyword, tag)
+
+    assert matcher.search("that is a patent pending alligator") == {0}
+    assert matcher.search("good bot, not a bad bot") == {1, 2}
+    assert matcher.search("nothing to see here") == set()
+
+def test_overlapping_keywords() -> None:
+    '''
+        Keywords that are suffixes or prefixes of each other should all be found.
+    '''
+    keywords = [('he', 'a'), ('she', 'b'), ('his', 'c'), ('hers', 'd'), ('ushers', 'e'), ('s', 'f')]
+    matcher = KeywordMatcher()
+    for keyword, tag in keywords:
+        matcher.add(keyword, tag)
+
+    for text in ["ushers", "ahishers", "shhe", "h", "", "usher his hers"]:
+        assert matcher.search(text) == naive_search(keywords, text)
+
+def test_add_after_search() -> None:
+    '''
+        Adding a keyword after a search should recompile the automaton.
+    '''
+    matcher = KeywordMatcher()
+    matcher.add('bot', 1)
+    assert matcher.search('robot') == {1}
+
+    matcher.add('rob', 2)
+    assert matcher.search('robot') == {1, 2}
+    assert len(matcher) == 6
@@ -0,0 +1,76 @@
+from src.ext.memberStore import MemberStore
+from src.models.bot.resources.user import GuildMember
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def guildMember(userId, roles=('1', '2'), **kwargs):
+    return GuildMember(user={'id': str(userId), 'username': f'user{userId}', 'global_name': None},
+                       roles=list(roles),
+                       joined_at='2024-01-01T00:00:00.000000+00:00',
+                       **kwargs)
+
+#-------------------------------------------------------------------------------
+#   Lookups
+#-------------------------------------------------------------------------------
+def test_load_and_lookup() -> None:
+    store = MemberStore()
+    ids = [1297327176697253000 + x * 7919 for x in range(500)]
+    store.load('1', [guildMember(x) for x in reversed(ids)])
+
+    view = store.get('1', str(ids[123]))
+    assert view.user_id == str(ids[123])
+    assert view.username == f'user{ids[123]}' and view.display_name == view.username
+    assert view.roles == ('1', '2')
+    assert view.joined_at == 1704067200
+    assert store.get('1', '5') is None and store.get('2', ids[0]) is None
+    assert len(store) == 500
+
+#-------------------------------------------------------------------------------
+def test_roles_are_interned() -> None:
+    store = MemberStore()
+    store.load('1', [guildMember(x) for x in range(10)])
+    store.put('2', guildMember(99))
+
+    assert store.get('1', 3).roles is store.get('2', 99).roles
+    assert store.stats()['roleTuples'] == 1
+
+#-------------------------------------------------------------------------------
+def test_flags_are_packed() -> None:
+    store = MemberStore()
+    store.put('1', guildMember(5, deaf=True, pending=True, nick='nick'))
+
+    view = store.get('1', 5)
+    assert view.deaf and view.pending and not view.mute and not view.bot
+    assert view.display_name == 'nick'
+
+#-------------------------------------------------------------------------------
+#   Updates
+#-------------------------------------------------------------------------------
+def test_put_replace_and_remove_keep_rows_sorted() -> None:
+    store = MemberStore()
+    for userId in (30, 10, 20):
+        store.put('1', guildMember(userId))
+    store.put('1', guildMember(20, roles=('3',)))
+
+    assert [view.user_id for view in store.members('1')] == ['10', '20', '30']
+    assert store.get('1', 20).roles == ('3',)
+
+    store.remove('1', 10)
+    assert [view.user_id for view in store.members('1')] == ['20', '30']
+    assert len(store) == 2
+
+    store.removeGuild('1')
+    assert len(store) == 0 and store.get('1', 20) is None
+
+#-------------------------------------------------------------------------------
+def test_full_store_drops_new_members() -> None:
+    store = MemberStore(maxEntries=3)
+    store.load('1', [guildMember(x) for x in range(2)])
+    store.put('2', guildMember(7))
+    store.put('2', guildMember(8))
+    store.put('2', guildMember(7, roles=()))
+
+    assert len(store) == 3
+    assert store.get('2', 8) is None and store.get('2', 7).roles == ()
+    assert store.stats()['evicted'] == 1
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from src.ext.messageCache import MessageCache, ChannelRing
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def message(messageId, channelId='1', content='hello'):
+    return SimpleNamespace(id=str(messageId), channel_id=channelId, content=content)
+
+#-------------------------------------------------------------------------------
+#   Rings
+#-------------------------------------------------------------------------------
+def test_ring_overwrites_the_oldest() -> None:
+    ring = ChannelRing(3)
+    for messageId in range(5):
+        ring.put(str(messageId), message(messageId))
+
+    assert [x.id for x in ring.messages()] == ['2', '3', '4']
+    assert ring.get('1') is None and ring.get('4').id == '4'
+    assert len(ring) == 3
+
+#-------------------------------------------------------------------------------
+#   Events
+#-------------------------------------------------------------------------------
+def test_edit_and_delete() -> None:
+    cache = MessageCache(channelCapacity=10)
+    cache.update('MESSAGE_CREATE', message(1))
+    cache.update('MESSAGE_CREATE', message(2))
+
+    original = cache.get('1', 1)
+    cache.update('MESSAGE_UPDATE', message(1, content='edited'))
+    assert original.content == 'hello' and cache.get('1', '1').content == 'edited'
+
+    cache.update('MESSAGE_DELETE', SimpleNamespace(id='1', channel_id='1'))
+    assert cache.get('1', '1') is None
+    assert cache.stats()['messages'] == 1
+
+    cache.update('MESSAGE_DELETE_BULK', SimpleNamespace(ids=['2', '3'], channel_id='1'))
+    cache.update('MESSAGE_UPDATE', message(9, content='not cached'))
+    assert cache.channelMessages('1') == [] and cache.stats()['messages'] == 0
+
+#-------------------------------------------------------------------------------
+def test_channel_delete() -> None:
+    cache = MessageCache()
+    cache.update('MESSAGE_CREATE', message(1, channelId='5'))
+    cache.update('CHANNEL_DELETE', SimpleNamespace(id='5'))
+    assert cache.get('5', '1') is None and cache.stats()['channels'] == 0
+
+#-------------------------------------------------------------------------------
+#   Budget
+#-------------------------------------------------------------------------------
+def test_budget_evicts_the_least_recently_used_channel() -> None:
+    cache = MessageCache(channelCapacity=4, maxMessages=6)
+    for channelId in ('a', 'b', 'c'):
+        cache.put(message(f'{channelId}1', channelId))
+        cache.put(message(f'{channelId}2', channelId))
+
+    cache.get('a', 'a1')
+    cache.put(message('c3', 'c'))
+
+    assert cache.get('b', 'b1') is None
+    assert cache.get('a', 'a1') is not None and cache.get('c', 'c3') is not None
+    assert cache.stats() == {'channels': 2, 'messages': 5, 'maxMessages': 6, 'evictedChannels': 1}
+
+#-------------------------------------------------------------------------------
+def test_disabled_cache() -> None:
+    cache = MessageCache(enabled=False)
+    cache.update('MESSAGE_CREATE', message(1))
+    assert cache.get('1', '1') is None and cache.eventTypes == frozenset()
@@ -0,0 +1,75 @@
+import pytest
+
+from types import SimpleNamespace
+
+from src.ext.presenceCache import PresenceCache
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+GAME = {'name': 'Factorio', 'type': 0, 'created_at': 1700000000000}
+
+def presence(userId='5', status='online', activities=(), **clientStatus):
+    return {'guild_id': '1',
+            'user': {'id': userId},
+            'status': status,
+            'client_status': clientStatus or {'desktop': status},
+            'activities': [dict(activity) for activity in activities]}
+
+#-------------------------------------------------------------------------------
+#   Modes
+#-------------------------------------------------------------------------------
+def test_unknown_mode() -> None:
+    with pytest.raises(ValueError):
+        PresenceCache('everything')
+
+#-------------------------------------------------------------------------------
+def test_none_mode_keeps_nothing() -> None:
+    cache = PresenceCache('none')
+    cache.update(presence())
+    assert cache.getStatus('1', '5') == 'offline' and cache.stats()['events'] == 0
+
+#-------------------------------------------------------------------------------
+def test_status_mode_packs_the_status() -> None:
+    cache = PresenceCache('status')
+    cache.update(presence(status='dnd', activities=[GAME], desktop='dnd', mobile='idle'))
+
+    assert cache.getStatus('1', 5) == 'dnd'
+    assert cache.getClientStatus('1', 5) == {'desktop': 'dnd', 'mobile': 'idle'}
+    assert cache.getActivities('1', 5) == []
+
+    cache.update(presence(status='offline', desktop='offline'))
+    assert cache.guilds == dict()
+    assert cache.stats()['statusChanges'] == 2
+
+#-------------------------------------------------------------------------------
+#   Deltas
+#-------------------------------------------------------------------------------
+def test_full_mode_keeps_unchanged_activities() -> None:
+    cache = PresenceCache('full')
+    cache.update(presence(activities=[GAME]))
+    activities = cache.guilds['1'][5].activities
+
+    cache.update(presence(activities=[GAME]))
+    cache.update(presence(status='idle', activities=[GAME]))
+    assert cache.guilds['1'][5].activities is activities
+    assert cache.getStatus('1', '5') == 'idle'
+
+    cache.update(presence(status='idle', activities=[dict(GAME, name='Celeste')]))
+    assert [activity.name for activity in cache.getActivities('1', '5')] == ['Celeste']
+
+    stats = cache.stats()
+    assert (stats['events'], stats['unchanged'], stats['statusChanges'], stats['activityChanges']) == (4, 1, 2, 2)
+    assert stats['memoryBytes'] > 0
+
+#-------------------------------------------------------------------------------
+def test_guild_create_presences_and_removal() -> None:
+    cache = PresenceCache('status')
+    cache.loadGuild('2', [SimpleNamespace(user=SimpleNamespace(id='7'),
+                                          status='idle',
+                                          client_status=SimpleNamespace(desktop=None, mobile='idle', web=None),
+                                          activities=[])])
+    assert cache.getClientStatus('2', '7') == {'mobile': 'idle'}
+
+    cache.removeGuild('2')
+    assert cache.getStatus('2', '7') == 'offline'
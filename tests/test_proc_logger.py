@@ -0,0 +1,63 @@
+from queue import Queue
+
+from src.ext.procLogger import ProcLogger
+
+#-------------------------------------------------------------------------------
+#   Level filtering and lazy formatting
+#-------------------------------------------------------------------------------
+def test_suppressed_levels_skip_the_queue() -> None:
+    '''
+        Messages under the configured level should not be formatted or queued.
+    '''
+    logQueue = Queue()
+    log = ProcLogger("HANDLER", logQueue, level="INFO")
+
+    def expensive() -> str:
+        raise AssertionError("suppressed message was formatted")
+
+    log.debug(expensive)
+    log.debug("%s", object())
+    assert logQueue.empty()
+    assert not log.isEnabledFor("DEBUG") and log.isEnabledFor("ERROR")
+
+def test_enabled_levels_are_formatted() -> None:
+    '''
+        Enabled messages should be formatted from args or the callable and tagged with the component.
+    '''
+    logQueue = Queue()
+    log = ProcLogger("HTTP", logQueue, level="DEBUG", batchSize=1)
+
+    log.info("[RequestClient] %s --> %d", "GET", 200)
+    log.warning(lambda: "[RequestClient] rate limited")
+    log.error("100% literal")
+
+    events = [logQueue.get_nowait() for _ in range(3)]
+    assert [(x.component, x.level, x.message) for x in events] == [
+        ("HTTP", "INFO", "[RequestClient] GET --> 200"),
+        ("HTTP", "WARNING", "[RequestClient] rate limited"),
+        ("HTTP", "ERROR", "100% literal")
+    ]
+
+def test_batches_ship_together() -> None:
+    '''
+        Events should be shipped as one LogBatch when the batch fills, on flush, and right away for errors.
+    '''
+    logQueue = Queue()
+    log = ProcLogger("GATEWAY", logQueue, level="DEBUG", batchSize=3, batchInterval=60)
+
+    log.info("one")
+    log.info("two")
+    assert logQueue.empty()
+    log.info("three")
+    assert [x.message for x in logQueue.get_nowait().events] == ["one", "two", "three"]
+
+    log.debug("four")
+    log.flush()
+    log.flush()
+    assert [x.message for x in logQueue.get_nowait().events] == ["four"]
+    assert logQueue.empty()
+
+    log.info("five")
+    log.error("six")
+    batch = logQueue.get_nowait()
+    assert batch.action == "LOG_BATCH" and [x.level for x in batch.events] == ["INFO", "ERROR"]
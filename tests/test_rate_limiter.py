@@ -0,0 +1,73 @@
+import time
+import asyncio
+
+from src.ext.rateLimiter import RateLimiter, routeKey
+
+API = "https://discord.com/api/v10"
+
+#-------------------------------------------------------------------------------
+#   Route keys
+#-------------------------------------------------------------------------------
+def test_route_key_major_params() -> None:
+    '''
+        Channel ids are kept as major parameters, other ids are replaced.
+    '''
+    route, major = routeKey("post", f"{API}/channels/1297327176697253972/messages/1404889758995578921")
+    assert route == "POST /channels/{channels}/messages/{id}"
+    assert major == "1297327176697253972"
+
+def test_route_key_reactions() -> None:
+    '''
+        Every reaction on a channel's messages should share a route.
+    '''
+    first = routeKey("PUT", f"{API}/channels/1297327176697253972/messages/1404889758995578921/reactions/%F0%9F%87%A7/@me")
+    second = routeKey("PUT", f"{API}/channels/1297327176697253972/messages/1404889758995578922/reactions/windows%3A1335862321909731369/@me")
+    assert first == second
+
+#-------------------------------------------------------------------------------
+#   Buckets
+#-------------------------------------------------------------------------------
+def test_bucket_waits_for_reset() -> None:
+    '''
+        An exhausted bucket should hold requests until it resets, other buckets keep flowing.
+    '''
+    limiter = RateLimiter()
+    spammy = limiter.getBucket("POST", f"{API}/channels/111111111111111111/messages")
+    quiet = limiter.getBucket("POST", f"{API}/channels/222222222222222222/messages")
+    limiter.update("POST", f"{API}/channels/111111111111111111/messages", spammy,
+                   {"X-RateLimit-Limit": "5", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.2", "X-RateLimit-Bucket": "abc"})
+
+    async def run():
+        start = time.monotonic()
+        await limiter.acquire(quiet)
+        quietTime = time.monotonic() - start
+        await limiter.acquire(spammy)
+        return quietTime, time.monotonic() - start
+
+    quietTime, spammyTime = asyncio.run(run())
+    assert quietTime < 0.05
+    assert spammyTime >= 0.15
+    assert spammy.remaining == 4
+
+def test_bucket_hash_shared() -> None:
+    '''
+        Routes that share a bucket hash and major parameter should share a bucket.
+    '''
+    limiter = RateLimiter()
+    url = f"{API}/channels/111111111111111111/messages"
+    bucket = limiter.getBucket("POST", url)
+    limiter.update("POST", url, bucket, {"X-RateLimit-Bucket": "abc", "X-RateLimit-Remaining": "3"})
+
+    assert limiter.getBucket("POST", url) is bucket
+
+def test_global_rate_limit() -> None:
+    '''
+        A global 429 should set the global reset instead of exhausting the bucket.
+    '''
+    limiter = RateLimiter()
+    bucket = limiter.getBucket("GET", f"{API}/guilds/111111111111111111")
+    retryAfter = limiter.rateLimited(bucket, {"Retry-After": "2", "X-RateLimit-Global": "true"})
+
+    assert retryAfter == 2.0
+    assert limiter.globalResetAt > time.monotonic()
+    assert bucket.remaining is None
@@ -0,0 +1,35 @@
+import multiprocessing
+
+from src.ext.sessionState import SessionState
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def listener(state: SessionState) -> None:
+    state.setSession('a1b2c3', 'wss://gateway-us-east1-b.discord.gg')
+    for sequence in range(1, 43):
+        state.setSequence(sequence)
+
+#-------------------------------------------------------------------------------
+#   Sharing
+#-------------------------------------------------------------------------------
+def test_session_outlives_the_listener_process() -> None:
+    state = SessionState()
+    assert state.load() is None
+
+    proc = multiprocessing.Process(target=listener, args=(state,))
+    proc.start()
+    proc.join()
+
+    assert state.load() == ('a1b2c3', 42, 'wss://gateway-us-east1-b.discord.gg')
+    assert 0 <= state.age() < 60
+
+#-------------------------------------------------------------------------------
+def test_cleared_session_is_not_resumed() -> None:
+    state = SessionState()
+    state.setSession('a1b2c3', 'wss://gateway.discord.gg')
+    state.setSequence(None)
+    assert state.load() == ('a1b2c3', None, 'wss://gateway.discord.gg')
+
+    state.clear()
+    assert state.load() is None
@@ -0,0 +1,54 @@
+import multiprocessing
+import queue
+
+import pytest
+
+from src.app.shmRing import ShmRingQueue
+
+#-------------------------------------------------------------------------------
+#   Helpers
+#-------------------------------------------------------------------------------
+def produce(ring: ShmRingQueue, count: int) -> None:
+    for n in range(count):
+        ring.put_nowait({'n': n, 'content': 'x' * (n % 300)})
+
+#-------------------------------------------------------------------------------
+#   Ring behaviour
+#-------------------------------------------------------------------------------
+def test_wraps_in_order() -> None:
+    '''
+        Frames of varying sizes should come back in order across many wraps of a small ring.
+    '''
+    ring = ShmRingQueue('TEST', capacity=4096, ownerProduces=True)
+    try:
+        for n in range(2000):
+            ring.put_nowait({'n': n, 'content': 'x' * (n % 300)})
+            if n % 3 == 2:
+                for m in range(n - 2, n + 1):
+                    assert ring.get_nowait()['n'] == m
+        assert ring.qsize() == 2
+        assert [ring.get_nowait()['n'] for _ in range(2)] == [1998, 1999]
+        with pytest.raises(queue.Empty):
+            ring.get(timeout=0.01)
+    finally:
+        ring.close()
+
+def test_cross_process_and_control() -> None:
+    '''
+        A producer in another process should stream through the ring, the creating process goes through the control queue.
+    '''
+    ring = ShmRingQueue('TEST', capacity=8192)
+    try:
+        producer = multiprocessing.get_context('fork').Process(target=produce, args=(ring, 3000))
+        producer.start()
+
+        assert [ring.get(timeout=5)['n'] for _ in range(3000)] == list(range(3000))
+        producer.join()
+
+        ring.put_nowait(None)
+        assert ring.control.qsize() == 1
+        assert ring.get(timeout=1) is None
+        assert ring.stats()['depth'] == 0
+        ring.join()
+    finally:
+        ring.close()
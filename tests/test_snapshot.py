@@ -0,0 +1,72 @@
+import os
+
+from array import array
+from types import SimpleNamespace
+
+from src.ext.snapshot import Snapshot, writeSnapshot
+from src.ext.entityCache import EntityCache
+from src.models.bot.resources.user import GuildMember
+
+#-------------------------------------------------------------------------------
+#   File format
+#-------------------------------------------------------------------------------
+def test_sections_round_trip(tmp_path) -> None:
+    path = str(tmp_path / 'test.snap')
+    writeSnapshot(path, {'ids': array('Q', [1, 2 ** 63]), 'meta': {'a': [1, 2]}})
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.load('ids') == array('Q', [1, 2 ** 63])
+        assert snapshot.load('meta') == {'a': [1, 2]}
+        assert snapshot.load('missing') is None
+        assert 0 <= snapshot.age() < 60
+
+    assert not os.path.exists(f"{path}.tmp")
+
+#-------------------------------------------------------------------------------
+def test_unreadable_snapshots(tmp_path) -> None:
+    garbage = tmp_path / 'garbage.snap'
+    garbage.write_bytes(b'not a snapshot at all, not at all')
+    (tmp_path / 'empty.snap').write_bytes(b'')
+
+    assert Snapshot.open(str(garbage)) is None
+    assert Snapshot.open(str(tmp_path / 'empty.snap')) is None
+    assert Snapshot.open(str(tmp_path / 'missing.snap')) is None
+
+#-------------------------------------------------------------------------------
+#   Entity cache
+#-------------------------------------------------------------------------------
+def test_entity_cache_round_trip(tmp_path) -> None:
+    cache = EntityCache()
+    for guildId in ('1', '2'):
+        cache.update('GUILD_CREATE', SimpleNamespace(id=guildId,
+                                                     name=f'guild{guildId}',
+                                                     channels=[SimpleNamespace(id=f'{guildId}0', guild_id=guildId)],
+                                                     threads=[],
+                                                     roles=[SimpleNamespace(id=f'{guildId}00')],
+                                                     members=[GuildMember(user={'id': f'{guildId}{x}', 'username': f'user{x}'}, roles=[f'{guildId}00'], deaf=True) for x in range(5)]))
+
+    path = str(tmp_path / 'HANDLER_0.snap')
+    writeSnapshot(path, cache.snapshot())
+
+    restored = EntityCache()
+    with Snapshot(path) as snapshot:
+        restored.restore(snapshot)
+
+    assert restored.getGuild('2').name == 'guild2'
+    assert [x.id for x in restored.guildChannels('1')] == ['10']
+    assert [x.id for x in restored.guildRoles('2')] == ['200']
+    member = restored.getMember('2', '23')
+    assert member.username == 'user3' and member.roles == ('200',) and member.deaf
+    assert restored.stats() == cache.stats()
+
+#-------------------------------------------------------------------------------
+def test_restore_skips_disabled_stores(tmp_path) -> None:
+    cache = EntityCache()
+    cache.update('CHANNEL_CREATE', SimpleNamespace(id='5', guild_id='1'))
+    path = str(tmp_path / 'HANDLER_0.snap')
+    writeSnapshot(path, cache.snapshot())
+
+    restored = EntityCache({'channels': {'enabled': False}})
+    with Snapshot(path) as snapshot:
+        restored.restore(snapshot)
+    assert restored.getChannel('5') is None